@@ -0,0 +1,51 @@
+"""
+Densidad en pista de una temporada a partir de las cachés binned por partido.
+----------------------------------------------------------------------------
+Cada análisis de pipeline_golpes deja junto a su golpes.parquet un
+<golpes>.densidad_<nx>x<ny>.npz. Aquí solo se cargan y suman esos arrays:
+no se vuelve a leer ningún golpe. Las cachés deben compartir rejilla y
+clasificación de eventos.
+
+Uso:
+    python scripts/densidad_temporada.py data/processed/golpes.densidad_10x20.npz --jugador "Jorge Nieto"
+    python scripts/densidad_temporada.py cache1.npz cache2.npz --jugador "Jorge Nieto" --set 1
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# --- Acceso a src/ ---
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from src.analysis.densidad_pista import DensidadPista
+from src.viz.graficos import heatmap_pista
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Densidad en pista acumulada de varios partidos")
+    parser.add_argument("caches", nargs="+", help="ficheros .npz de densidad (misma rejilla)")
+    parser.add_argument("--jugador", action="append", help="filtrar por jugador (repetible)")
+    parser.add_argument("--categoria", action="append", help="filtrar por categoría (repetible)")
+    parser.add_argument("--set", dest="set_", action="append", help="filtrar por set (repetible)")
+    parser.add_argument("--salida", default="outputs/temporada/densidad_pista.png")
+    args = parser.parse_args()
+
+    dens = DensidadPista.combinar([DensidadPista.cargar(c) for c in args.caches])
+    filtro = dict(jugador=args.jugador, categoria=args.categoria, set_=args.set_)
+    matrices = {e.capitalize(): dens.matriz(e, **filtro) for e in ("inicio", "fin")}
+
+    nx, ny = dens.rejilla
+    total = int(matrices["Fin"].sum())
+    print(f"🗺️ {len(args.caches)} partidos, rejilla {nx}×{ny}, {total} golpes con fin")
+
+    Path(args.salida).parent.mkdir(parents=True, exist_ok=True)
+    quien = ", ".join(args.jugador) if args.jugador else "todos"
+    heatmap_pista(args.salida, matrices, dens.ancho, dens.largo, f"Densidad en pista — {quien}")
+    print(f"📁 {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
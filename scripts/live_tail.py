@@ -0,0 +1,58 @@
+"""
+Modo en vivo: sigue un CSV de M3 que se está exportando mientras se etiqueta
+el partido y refresca marcador + métricas por jugador en un JSON ligero.
+
+Uso:
+    python scripts/live_tail.py data/raw/partido.csv
+    python scripts/live_tail.py data/raw/partido.csv --salida outputs/live/estado_partido.json --intervalo 0.5
+
+Ctrl+C cierra el último evento abierto y escribe el estado final.
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+# --- Acceso a src/ ---
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from src.common.logging_setup import setup_logging
+from src.data.load_data import load_config
+from src.data.partido_en_vivo import PartidoEnVivo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seguimiento en vivo de un CSV de M3")
+    parser.add_argument("csv", help="CSV que M3 va ampliando durante el etiquetado")
+    parser.add_argument("--salida", default="outputs/live/estado_partido.json")
+    parser.add_argument("--intervalo", type=float, default=0.5, help="segundos entre lecturas")
+    parser.add_argument("--config", default="config/config.toml")
+    args = parser.parse_args()
+
+    logger = setup_logging()
+    vivo = PartidoEnVivo(args.csv, load_config(args.config))
+    logger.info(f"👀 Siguiendo {args.csv} → {args.salida} (cada {args.intervalo}s)")
+
+    try:
+        while True:
+            # clean_dataset imprime avisos por bloque: en vivo solo interesa el log
+            with contextlib.redirect_stdout(io.StringIO()):
+                nuevos = vivo.actualizar()
+            if nuevos:
+                vivo.escribir_estado(args.salida)
+                logger.info(f"🎾 +{nuevos} eventos | {vivo.marcador}")
+            time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        with contextlib.redirect_stdout(io.StringIO()):
+            vivo.cerrar()
+        vivo.escribir_estado(args.salida)
+        logger.info(f"✅ Estado final guardado en {args.salida} | {vivo.marcador}")
+
+
+if __name__ == "__main__":
+    main()
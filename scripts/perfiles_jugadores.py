@@ -0,0 +1,62 @@
+"""
+Índice de perfiles de juego por jugador (todos los partidos) y jugadores parecidos.
+----------------------------------------------------------------------------------
+Lee uno o varios golpes.parquet (el de pipeline_full lleva todos los partidos
+procesados), resume a cada jugador en su reparto de golpes, categorías, zonas
+de destino y uso de pared, y guarda el índice para que el recomendador busque
+los rivales más parecidos a uno nuevo.
+
+Uso:
+    python scripts/perfiles_jugadores.py data/processed/golpes.parquet
+    python scripts/perfiles_jugadores.py data/processed/golpes.parquet --similares "Galán" -k 5
+    python scripts/perfiles_jugadores.py --similares "Galán" --similares "Chingotto"   # índice ya guardado
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# --- Acceso a src/ ---
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+import pandas as pd
+
+from src.analysis.perfiles_jugadores import MIN_GOLPES, IndicePerfiles, conteos_perfil
+from src.analysis.zonas_pista import rejilla_zonas_configurada
+from src.data.carga_golpes import ALIAS_COORDENADAS, leer_golpes
+
+RUTA_PERFILES = Path("data/processed/perfiles_jugadores.parquet")
+
+COLUMNAS = ["jugador", "golpe_q", "categoria_punto", "error", "winner", "fuerza_error", "pared",
+            "inicio_x", "inicio_y", "fin_x", "fin_y", "celda_inicio", "celda_fin"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de perfiles de jugadores y búsqueda de parecidos")
+    parser.add_argument("golpes", nargs="*", help="golpes.parquet de uno o varios partidos")
+    parser.add_argument("--salida", default=str(RUTA_PERFILES))
+    parser.add_argument("--min-golpes", type=int, default=MIN_GOLPES)
+    parser.add_argument("--similares", action="append", help="jugador a buscar (repetible: pareja)")
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.golpes:
+        rejilla = rejilla_zonas_configurada()
+        conteos = []
+        for ruta in args.golpes:
+            # las celdas guardadas se reutilizan si su rejilla (attrs del parquet) es la del config
+            conteos.append(conteos_perfil(leer_golpes(ruta, COLUMNAS, alias=ALIAS_COORDENADAS), rejilla))
+        indice = IndicePerfiles.desde_conteos(pd.concat(conteos, ignore_index=True), args.min_golpes)
+        print(f"👤 {len(indice)} jugadores, {indice.perfiles.shape[1]} features → {indice.guardar(args.salida)}")
+    else:
+        indice = IndicePerfiles.cargar(args.salida)
+
+    if args.similares:
+        print(f"\n🔎 Más parecidos a {', '.join(args.similares)}:")
+        print(indice.vecinos(args.similares, args.k).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
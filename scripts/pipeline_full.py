@@ -30,6 +30,9 @@ from src.data.clean_data import clean_dataset
 from src.data.schemas import RAW_SCHEMA
 from src.data.score_utils import crear_marcador
 from src.data.score_utils import asignar_informacion_saque_y_punto
+from src.data.registro_jugadores import RegistroJugadores
+from src.data.categorias import clasificar_punto
+from src.analysis.zonas_pista import ATRIBUTO_REJILLA, COLUMNAS_CELDA, asignar_celdas, rejilla_zonas_configurada
 
 
 def main():
@@ -88,11 +91,19 @@ def main():
     # ============================================================
     # 4️⃣ LIMPIEZA GENERAL + MARCADOR
     # ============================================================
+    processed_dir = Path("data/processed")
     try:
         df_clean = clean_dataset(df_norm)
         df_clean = crear_marcador(df_clean)
+
+        # Registro de jugadores/parejas: ids enteros estables entre ejecuciones
+        registro = RegistroJugadores.cargar(processed_dir).actualizar(df_clean)
+        df_clean = registro.anotar(df_clean)
         df_clean = asignar_informacion_saque_y_punto(df_clean)
 
+        # Categoría del evento una sola vez (categórica); los análisis la leen
+        df_clean["categoria_punto"] = clasificar_punto(df_clean)
+
         logger.info("MARCADOR añadido correctamente.")
         logger.info(f"CLEAN: {len(df_clean):,} filas, {len(df_clean.columns)} columnas")
     except Exception as e:
@@ -128,8 +139,9 @@ def main():
     # ============================================================
     # 7️⃣ DATASETS PROCESADOS
     # ============================================================
-    processed_dir = Path("data/processed")
     processed_dir.mkdir(parents=True, exist_ok=True)
+    registro.guardar(processed_dir)
+    logger.info(f"👥 Registro: {len(registro.jugadores)} jugadores, {registro.parejas['partido'].nunique()} partidos")
 
     df_clean = df_clean.sort_values("clip_start").reset_index(drop=True)
 
@@ -164,16 +176,9 @@ def main():
         df_golpes = df_golpes.sort_values("clip_start")
 
         # -------------------------
-        # CATEGORIA PUNTO
+        # CATEGORIA PUNTO (ya calculada en el paso 4)
         # -------------------------
-        def obtener_categoria(row):
-            for col in ["error", "winner", "fuerza_error"]:
-                val = row.get(col)
-                if pd.notna(val) and str(val).strip() != "":
-                    return val
-            return "bola dentro"
-
-        df_golpes["categoria_punto"] = df_golpes.apply(obtener_categoria, axis=1)
+        df_golpes["categoria_punto"] = df_golpes["categoria_punto"].cat.remove_unused_categories()
 
         # ============================================================
         # 🔒 NORMALIZACIÓN DEFINITIVA DE COORDENADAS
@@ -206,6 +211,13 @@ def main():
             if col not in df_golpes.columns:
                 df_golpes[col] = pd.NA
 
+        # -------------------------
+        # CELDAS DE ZONA (rejilla [zonas], calculadas una vez para el recomendador)
+        # -------------------------
+        rejilla = rejilla_zonas_configurada()
+        celdas = asignar_celdas(df_golpes, ["inicio_x", "inicio_y", "fin_x", "fin_y"], rejilla)
+        df_golpes[list(COLUMNAS_CELDA)] = celdas
+
         # ============================================================
         # 🔧 LIMPIEZA SEGURA FINAL
         # ============================================================
@@ -240,7 +252,8 @@ def main():
             "golpe_q", "cara_pala", "marcador", "jugador",
             "categoria_punto", "error", "winner", "fuerza_error",
             "zona_saque", "zona_resto",
-            "inicio_x", "inicio_y", "fin_x", "fin_y"
+            "inicio_x", "inicio_y", "fin_x", "fin_y",
+            *COLUMNAS_CELDA,
         ]
 
         columnas_ordenadas = [c for c in columnas_principales if c in df_golpes.columns] + \
@@ -248,7 +261,8 @@ def main():
 
         df_golpes = df_golpes[columnas_ordenadas]
 
-        # guardar
+        # guardar (la rejilla de las celdas viaja en los metadatos del parquet)
+        df_golpes.attrs[ATRIBUTO_REJILLA] = rejilla.clave
         df_golpes.to_parquet(processed_dir / "golpes.parquet", index=False)
 
     logger.info("📦 Datasets procesados guardados en data/processed/")
@@ -4,18 +4,37 @@
 #   (CORREGIDO: marcador_pre/post con sets+juegos + gano_juego + info_break)
 # ================================================================
 
+import argparse
 import os
-import re
 import sys
+from functools import partial
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
 
 # --- Fix import cuando ejecutas desde /scripts ---
 # Permite: python pipeline_golpes.py desde scripts/
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from src.analysis.cubo_metricas import CuboMetricas
+from src.common.artefactos import Artefacto, Etapa, orden_etapas, seleccionar
+from src.data.load_data import load_config
+from src.data.carga_golpes import ALIAS_COORDENADAS, leer_golpes
+from src.data.categorias import COLORES_CATEGORIA, asegurar_categoria
+from src.analysis.densidad_pista import DensidadPista, cargar_cache, rejilla_configurada, ruta_cache
+from src.analysis.secuencias_golpes import ModeloSecuencias
+from src.analysis.simulador_partido import (
+    probabilidades_saque,
+    puntos_desde_golpes,
+    sensibilidad,
+    simulacion_configurada,
+    simular_partidos,
+)
+from src.analysis.zonas_pista import rejilla_zonas_configurada
+from src.data.registro_jugadores import RegistroJugadores, columna_partido
+from src.viz.pista import render_pista_html
+from src.viz.graficos import barras_horizontales, heatmap_evolucion, heatmap_pista
+from src.viz.html_compartido import MODOS_HTML, asegurar_plotlyjs, escribir_indice
+from src.viz.render import ejecutar_trabajos
 from src.data.saque_utils import (
     inferir_parejas,
     extraer_sacador,
@@ -34,67 +53,22 @@ COL_JUGADOR = "jugador"
 COL_GOLPE = "golpe_q"
 COL_CATEG = "categoria_punto"
 
-# columnas alias (soluciona typos tipo “gople”)
-COLUMN_ALIASES = {
-    "inicio_x": ["inicio_golpe:_x", "inicio_gople:_x", "inicio_golpe_x"],
-    "inicio_y": ["inicio_golpe:_y", "inicio_gople:_y", "inicio_golpe_y"],
-    "fin_x":    ["fin_golpe:_x", "fin_gople:_x", "fin_golpe_x"],
-    "fin_y":    ["fin_golpe:_y", "fin_gople:_y", "fin_golpe_y"],
-}
+# columnas alias (soluciona typos tipo “gople”), compartidas con perfiles_jugadores
+COLUMN_ALIASES = ALIAS_COORDENADAS
 
-COLORES_EVENTO = {
-    "winner": "#00BFFF",
-    "error no forzado": "#FF9800",
-    "fuerza_error": "#FF3B3B",
-    "bola dentro": "#4CAF50"
-}
+# columnas que usa el análisis completo (las que falten en el parquet se ignoran)
+COLUMNAS_ANALISIS = [
+    "clip_start", COL_JUGADOR, "pareja", COL_GOLPE, COL_CATEG, "error", "winner", "fuerza_error",
+    "servicio", "punto_p1", "punto_p2", "marcador_sets", "marcador_juegos", "marcador_puntos",
+    "partido", "_source_file", "jugador_id", "pareja_id", "saca_jugador_id", "saca_pareja_id",
+    "inicio_x", "inicio_y", "fin_x", "fin_y", "celda_inicio", "celda_fin", "pared",
+]
+
+COLORES_EVENTO = COLORES_CATEGORIA
 
 # ==========================================================
 # HELPERS
 # ==========================================================
-def _normalize_colname(c: str) -> str:
-    c = str(c).strip().lower()
-    c = c.replace(" ", "_")
-    c = c.replace(":", "")
-    c = c.replace("-", "_")
-    c = re.sub(r"__+", "_", c)
-    return c
-
-
-def normalizar_columnas(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [_normalize_colname(c) for c in df.columns]
-    return df
-
-
-def resolve_coordinate_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Crea (si existen) las columnas canónicas inicio_x/inicio_y/fin_x/fin_y desde alias."""
-    df = df.copy()
-    for key, candidates in COLUMN_ALIASES.items():
-        if key in df.columns:
-            continue
-        found = None
-        for c in candidates:
-            c_norm = _normalize_colname(c)
-            if c_norm in df.columns:
-                found = c_norm
-                break
-        if found is not None:
-            df[key] = df[found]
-    return df
-
-
-def norm_name(x: str) -> str:
-    """Normaliza para comparar nombres robustamente (case/espacios/acentos simples)."""
-    if x is None or pd.isna(x):
-        return ""
-    s = str(x).strip().lower()
-    s = re.sub(r"\s+", " ", s)
-    s = (s.replace("á", "a").replace("é", "e").replace("í", "i")
-           .replace("ó", "o").replace("ú", "u").replace("ü", "u").replace("ñ", "n"))
-    return s
-
-
 def parse_score(x):
     """Parsea 'a-b' o 'a:b' y devuelve (a,b) ints. Si falla, (None,None)."""
     if pd.isna(x):
@@ -112,14 +86,25 @@ def parse_score(x):
         return (None, None)
 
 
+def _encolar_o_ejecutar(propios: list, trabajos: list | None):
+    """Añade los renders a la cola común o, si no hay cola, los ejecuta ya (secuencial)."""
+    if trabajos is None:
+        ejecutar_trabajos(propios, procesos=1)
+    else:
+        trabajos.extend(propios)
+
+
 # ==========================================================
 # 1. CARGA
 # ==========================================================
-def cargar_golpes(path="data/processed/golpes.parquet"):
+def cargar_golpes(path="data/processed/golpes.parquet", columnas=COLUMNAS_ANALISIS):
+    """Solo `columnas` (None = todas), con alias de coordenadas resueltos desde el esquema."""
     print(f"📂 Cargando golpes: {os.path.abspath(path)}")
-    df = pd.read_parquet(path)
-    df = normalizar_columnas(df)
-    df = resolve_coordinate_columns(df)
+    df = leer_golpes(path, columnas, alias=COLUMN_ALIASES)
+
+    # golpes.parquet antiguos (sin ids): registro construido al vuelo desde los datos
+    if "jugador_id" not in df.columns:
+        df = RegistroJugadores().actualizar(df).anotar(df)
     print(f"✅ {len(df)} golpes cargados.\n")
     return df
 
@@ -132,23 +117,7 @@ def clasificar_eventos(df: pd.DataFrame) -> pd.DataFrame:
 
     if COL_CATEG not in df.columns:
         print("⚠ Creando categoria_punto automáticamente...")
-
-        def obtener(row):
-            for col in ["error", "winner", "fuerza_error"]:
-                if col in row.index:
-                    val = row.get(col)
-                    if pd.notna(val) and str(val).strip():
-                        return str(val).strip()
-            return "bola dentro"
-
-        df[COL_CATEG] = df.apply(obtener, axis=1)
-
-    df[COL_CATEG] = df[COL_CATEG].astype(str).str.lower().str.strip()
-
-    df[COL_CATEG] = df[COL_CATEG].replace({
-        "fuerza error": "fuerza_error",
-        "fuerza_error": "fuerza_error",
-    })
+    df[COL_CATEG] = asegurar_categoria(df, COL_CATEG)
 
     return df
 
@@ -186,7 +155,13 @@ def reconstruir_marcadores(df: pd.DataFrame) -> pd.DataFrame:
 # 4. MÉTRICAS + SUMA + MEDIA + STD
 # ==========================================================
 def resumen_metricas_por_jugador(df: pd.DataFrame) -> pd.DataFrame:
-    tabla = df.groupby([COL_JUGADOR, COL_CATEG]).size().unstack(fill_value=0)
+    tabla = df.groupby([COL_JUGADOR, COL_CATEG], observed=True).size().unstack(fill_value=0)
+    return resumen_desde_conteos(tabla)
+
+
+def resumen_desde_conteos(tabla: pd.DataFrame) -> pd.DataFrame:
+    """Añade total, % y filas SUMA/MEDIA/STD a una tabla jugador × categoría."""
+    tabla = tabla.copy()
     tabla["total"] = tabla.sum(axis=1)
 
     porcentajes = tabla.div(tabla["total"], axis=0).mul(100).round(2)
@@ -204,7 +179,8 @@ def resumen_metricas_por_jugador(df: pd.DataFrame) -> pd.DataFrame:
 # ==========================================================
 # 5. TOP GOLPES POR SET
 # ==========================================================
-def top_golpes_por_set(df: pd.DataFrame, output_dir: str):
+def top_golpes_por_set(df: pd.DataFrame, output_dir: str, trabajos: list | None = None):
+    """Un PNG por jugador y set. Con `trabajos` solo se encolan (render en paralelo)."""
     print("🎯 TOP golpes por set")
     os.makedirs(output_dir, exist_ok=True)
 
@@ -212,6 +188,7 @@ def top_golpes_por_set(df: pd.DataFrame, output_dir: str):
         print(f"⚠ Falta {COL_GOLPE} → se omite top golpes por set.")
         return
 
+    propios = []
     for s in sorted(df["set_real"].dropna().unique()):
         df_s = df[df["set_real"] == s]
         print(f"  ➤ Set {s}: {len(df_s)} golpes")
@@ -223,21 +200,22 @@ def top_golpes_por_set(df: pd.DataFrame, output_dir: str):
         for jugador, dfj in conteo.groupby(COL_JUGADOR):
             df_top = dfj.sort_values("conteo", ascending=False).head(5)
 
-            plt.figure(figsize=(6, 4))
-            plt.barh(df_top[COL_GOLPE], df_top["conteo"])
-            plt.title(f"Top golpes — {jugador} — Set {s}")
-            plt.tight_layout()
-
             fname = f"top_golpes_{jugador}_set_{s}.png"
-            plt.savefig(os.path.join(output_dir, fname), dpi=300)
-            plt.close()
+            propios.append(partial(
+                barras_horizontales, os.path.join(output_dir, fname),
+                df_top[COL_GOLPE].tolist(), df_top["conteo"].tolist(),
+                f"Top golpes — {jugador} — Set {s}", figsize=(6, 4), dpi=300,
+            ))
             print(f"      📁 {fname}")
 
+    _encolar_o_ejecutar(propios, trabajos)
+
 
 # ==========================================================
 # 6. PISTA POR SET
 # ==========================================================
-def pintar_pista_por_set(df: pd.DataFrame, output_dir: str):
+def pintar_pista_por_set(df: pd.DataFrame, output_dir: str, modo_html: str = "compartido",
+                         trabajos: list | None = None):
     print("\n🎾 Pintando pista por set...")
     os.makedirs(output_dir, exist_ok=True)
 
@@ -247,276 +225,221 @@ def pintar_pista_por_set(df: pd.DataFrame, output_dir: str):
         print(f"⚠ FALTAN columnas de coordenadas: {missing} → se omite pista por set.\n")
         return
 
+    propios = []
     for s in sorted(df["set_real"].dropna().unique()):
         print(f"  ➤ Set {s}")
         df_s = df[df["set_real"] == s]
 
         for jugador in df_s[COL_JUGADOR].dropna().unique():
-            sub = df_s[df_s[COL_JUGADOR] == jugador].copy().dropna(subset=REQUIRED)
+            sub = df_s[df_s[COL_JUGADOR] == jugador].dropna(subset=REQUIRED)
             if sub.empty:
                 print(f"     ⚠ Jugador {jugador} sin coordenadas → se omite.")
                 continue
 
-            fig = go.Figure()
-
-            SERVICIO_Y_OFFSET = 60
-            CENTRO_X = ANCHO_PISTA / 2
-
-            fig.add_shape(type="rect", x0=0, y0=0, x1=ANCHO_PISTA, y1=LARGO_PISTA,
-                          line=dict(color="white", width=3))
-            fig.add_shape(type="line", x0=0, y0=LARGO_PISTA / 2, x1=ANCHO_PISTA, y1=LARGO_PISTA / 2,
-                          line=dict(color="white", width=4))
-            fig.add_shape(type="line", x0=0, y0=LARGO_PISTA/2 - SERVICIO_Y_OFFSET,
-                          x1=ANCHO_PISTA, y1=LARGO_PISTA/2 - SERVICIO_Y_OFFSET,
-                          line=dict(color="white", width=2))
-            fig.add_shape(type="line", x0=0, y0=LARGO_PISTA/2 + SERVICIO_Y_OFFSET,
-                          x1=ANCHO_PISTA, y1=LARGO_PISTA/2 + SERVICIO_Y_OFFSET,
-                          line=dict(color="white", width=2))
-            fig.add_shape(type="line", x0=CENTRO_X, y0=LARGO_PISTA/2,
-                          x1=CENTRO_X, y1=LARGO_PISTA/2 - SERVICIO_Y_OFFSET,
-                          line=dict(color="white", width=2))
-            fig.add_shape(type="line", x0=CENTRO_X, y0=LARGO_PISTA/2,
-                          x1=CENTRO_X, y1=LARGO_PISTA/2 + SERVICIO_Y_OFFSET,
-                          line=dict(color="white", width=2))
-
-            traces = []
-            for cat, color in COLORES_EVENTO.items():
-                df_cat = sub[sub[COL_CATEG] == cat]
-                if df_cat.empty:
-                    continue
-
-                first_legend = True
-                for _, r in df_cat.iterrows():
-                    traces.append(go.Scatter(
-                        x=[r["inicio_x"], r["fin_x"]],
-                        y=[r["inicio_y"], r["fin_y"]],
-                        mode="lines+markers",
-                        line=dict(color=color, width=2),
-                        marker=dict(size=6, symbol="circle"),
-                        name=cat,
-                        legendgroup=cat,
-                        showlegend=first_legend,
-                    ))
-                    traces.append(go.Scatter(
-                        x=[r["fin_x"]],
-                        y=[r["fin_y"]],
-                        mode="markers",
-                        marker=dict(size=8, color=color, symbol="triangle-up"),
-                        name=f"{cat}_fin",
-                        showlegend=False,
-                        legendgroup=cat,
-                    ))
-                    first_legend = False
-
-            fig.add_traces(traces)
-
-            fig.update_layout(
-                title=f"Pista — {jugador} — Set {s}",
-                height=1000,
-                width=800,
-                plot_bgcolor="#003C77",
-                paper_bgcolor="#00244D",
-                xaxis=dict(visible=False, range=[0, ANCHO_PISTA]),
-                yaxis=dict(visible=False, range=[0, LARGO_PISTA], scaleanchor="x", scaleratio=1),
-                font=dict(color="white"),
-                legend=dict(groupclick="togglegroup", itemclick="toggle")
-            )
-
+            # Una traza de líneas + una de fin por categoría (no por golpe)
             filename = f"pista_jugador_{jugador}_set_{s}.html"
-            fig.write_html(os.path.join(output_dir, filename))
+            propios.append(partial(
+                render_pista_html, os.path.join(output_dir, filename),
+                sub[REQUIRED + [COL_CATEG]], REQUIRED, COL_CATEG, COLORES_EVENTO,
+                ANCHO_PISTA, LARGO_PISTA, f"Pista — {jugador} — Set {s}",
+                layout=dict(height=1000, width=800), estilo=dict(hover=False),
+                modo_html=modo_html, raiz_html=output_dir,
+            ))
             print(f"     📁 Guardado: {filename}")
 
+    _encolar_o_ejecutar(propios, trabajos)
+
 
 # ==========================================================
 # 7. MÉTRICAS — PARTIDO / SET / JUEGO (+ info_break)
 # ==========================================================
-def exportar_metricas(df: pd.DataFrame, out: str, pareja1, pareja2):
-    print("\n📊 Exportando métricas...")
+def _ganador_juego(sets_pre, juegos_pre, sets_post, juegos_post):
+    """1 => pareja1, 2 => pareja2, None si el marcador no lo deja claro."""
+    a_pre, b_pre = parse_score(juegos_pre)
+    a_post, b_post = parse_score(juegos_post)
+    s1_pre, s2_pre = parse_score(sets_pre)
+    s1_post, s2_post = parse_score(sets_post)
+
+    # Caso 1: juego normal (no cambia el set)
+    if None not in (a_pre, b_pre, a_post, b_post) and (s1_pre == s1_post and s2_pre == s2_post):
+        d = (a_post - a_pre, b_post - b_pre)
+    # Caso 2: cambio de set → el ganador del set gana el último juego
+    elif None not in (s1_pre, s2_pre, s1_post, s2_post):
+        d = (s1_post - s1_pre, s2_post - s2_pre)
+    else:
+        return None
+    return {(1, 0): 1, (0, 1): 2}.get(d)
+
+
+def resumen_por_juego(df: pd.DataFrame, cubo: CuboMetricas) -> pd.DataFrame:
+    """
+    Tabla por juego y jugador (conteos, %, marcador_pre/post, info_saque,
+    gano_juego, info_break) con una fila vacía tras cada juego.
+
+    Todo sale de agregados por juego_real: los conteos son las filas del cubo
+    (partido, set, juego, jugador) y los atributos del juego un groupby
+    first/last, así que el coste es lineal en eventos.
+    """
+    cats = list(cubo.categorias)
+    tabla = cubo.por_juego().rename(columns={"juego": "juego_real"}).reset_index(drop=True)
+    tabla["total"] = tabla[cats].sum(axis=1)
+    pct = tabla[cats + ["total"]].div(tabla["total"], axis=0).mul(100).round(2).add_suffix("_%")
+    tabla = pd.concat([tabla, pct], axis=1)
+
+    # ---------- atributos de cada juego ----------
+    vacia = pd.Series(pd.NA, index=df.index, dtype="Int32")
+    g = pd.DataFrame({
+        "juego_real": df["juego_real"],
+        "set": df["set_real"],
+        "marcador_sets": df["marcador_sets"],
+        "marcador_juegos": df["marcador_juegos"],
+        "saca_jugador_id": df.get("saca_jugador_id", vacia),
+        "saca_pareja_id": df.get("saca_pareja_id", vacia),
+        "saca_pareja": df.get("saca_pareja", vacia),
+    }).groupby("juego_real", sort=True)
+
+    juegos = g[["saca_jugador_id", "saca_pareja_id", "saca_pareja"]].first()   # primer valor no nulo
+    juegos["set"] = g["set"].first()
+    primero = g[["marcador_sets", "marcador_juegos"]].first()
+    ultimo = g[["marcador_sets", "marcador_juegos"]].last()
+
+    # marcador_post = inicio del juego siguiente si existe; si no, final del propio juego
+    siguiente = primero.reindex(primero.index + 1).set_axis(primero.index)
+    usar_sig = siguiente.notna().all(axis=1)
+    post = siguiente.where(usar_sig, ultimo, axis=0)
+
+    juegos["marcador_pre"] = "sets: " + primero["marcador_sets"].astype(str) + " | juegos: " + primero["marcador_juegos"].astype(str)
+    juegos["marcador_post"] = "sets: " + post["marcador_sets"].astype(str) + " | juegos: " + post["marcador_juegos"].astype(str)
+    juegos["ganador"] = pd.array([
+        _ganador_juego(*v) for v in zip(primero["marcador_sets"], primero["marcador_juegos"],
+                                         post["marcador_sets"], post["marcador_juegos"])
+    ], dtype="Int8")
+
+    # Pareja que saca: la del sacador según el registro; si falta, saca_pareja
+    juegos["sacador_team"] = juegos["saca_pareja_id"].fillna(juegos["saca_pareja"]).astype("Int8")
+
+    tabla = tabla.merge(juegos, left_on="juego_real", right_index=True, how="left")
+
+    # ---------- ids del jugador (registro): cruces de enteros ----------
+    ids = df.drop_duplicates(COL_JUGADOR).set_index(COL_JUGADOR)[["jugador_id", "pareja_id"]]
+    jugador_id = tabla[COL_JUGADOR].map(ids["jugador_id"])
+    equipo = tabla[COL_JUGADOR].map(ids["pareja_id"])
+
+    saca_id = tabla["saca_jugador_id"]
+    sacador_team = tabla["sacador_team"]
+    ganador = tabla["ganador"]
+
+    tabla["info_saque"] = pd.Series(
+        np.select([(jugador_id == saca_id).fillna(False), (equipo == sacador_team).fillna(False)], [1, 2], default=3),
+        index=tabla.index,
+    ).where(saca_id.notna())
+
+    tabla["gano_juego"] = (equipo == ganador).fillna(False).astype(bool)
+
+    tabla["info_break"] = np.select(
+        [(sacador_team.isna() | ganador.isna()).to_numpy(),
+         (sacador_team == ganador).fillna(False).to_numpy(),
+         (equipo == sacador_team).fillna(False).to_numpy()],
+        ["desconocido", "no_break", "recibe_break"], default="hace_break",
+    )
+
+    columnas = ([COL_JUGADOR] + cats + ["total"] + list(pct.columns)
+                + ["marcador_pre", "marcador_post", "set", "juego", "info_saque", "gano_juego", "info_break"])
+    tabla = tabla.rename(columns={"juego_real": "juego"})
+
+    # Fila vacía tras cada juego (formato histórico del Excel)
+    huecos = pd.DataFrame("", index=range(tabla["juego"].nunique()), columns=columnas)
+    huecos["_orden"] = tabla["juego"].drop_duplicates().to_numpy()
+    tabla["_orden"] = tabla["juego"]
+    huecos["_hueco"], tabla["_hueco"] = 1, 0
+    out = pd.concat([tabla[columnas + ["_orden", "_hueco"]], huecos], ignore_index=True)
+    out = out.sort_values(["_orden", "_hueco"], kind="stable")
+    return out.drop(columns=["_orden", "_hueco"]).reset_index(drop=True)
+
+
+def cubo_metricas(df: pd.DataFrame) -> CuboMetricas:
+    """Conteos (partido, set, juego, jugador) × categoría en una sola agregación."""
+    return CuboMetricas.desde_eventos(df, COL_JUGADOR, COL_CATEG, "set_real", "juego_real",
+                                      partido=columna_partido(df))
+
+
+def exportar_resumenes(df: pd.DataFrame, out: str, cubo: CuboMetricas | None = None):
+    """resumen_partido.xlsx + resumen_set_<n>.xlsx (sumas del cubo)."""
     os.makedirs(out, exist_ok=True)
-
     max_set = int(df["set_real"].max())
-    max_juego = int(df["juego_real"].max())
-    print(f"   Sets: {max_set} | Juegos: {max_juego}")
+    cubo = cubo if cubo is not None else cubo_metricas(df)
 
     # RESUMEN PARTIDO
-    resumen = resumen_metricas_por_jugador(df)
+    resumen = resumen_desde_conteos(cubo.conteos())
     resumen = resumen[~resumen[COL_JUGADOR].isin(["SUMA", "MEDIA", "STD"])]
     resumen.to_excel(os.path.join(out, "resumen_partido.xlsx"), index=False)
 
     # RESUMEN POR SET
     for s in range(1, max_set + 1):
-        res_s = resumen_metricas_por_jugador(df[df["set_real"] == s])
+        res_s = resumen_desde_conteos(cubo.conteos(set_=s))
         res_s = res_s[~res_s[COL_JUGADOR].isin(["SUMA", "MEDIA", "STD"])]
         res_s.to_excel(os.path.join(out, f"resumen_set_{s}.xlsx"), index=False)
 
-    # RESUMEN POR JUEGO
-    rows = []
 
-    for j in range(1, max_juego + 1):
-        df_j = df[df["juego_real"] == j].copy()
-        if df_j.empty:
-            continue
+def exportar_resumen_juegos(df: pd.DataFrame, out: str, cubo: CuboMetricas | None = None):
+    """resumen_juegos.xlsx (necesita las columnas de saque)."""
+    os.makedirs(out, exist_ok=True)
+    cubo = cubo if cubo is not None else cubo_metricas(df)
 
-        set_j = df_j["set_real"].iloc[0]
-
-        resumen_j = resumen_metricas_por_jugador(df_j)
-        resumen_j = resumen_j[~resumen_j[COL_JUGADOR].isin(["SUMA", "MEDIA", "STD"])]
-
-        # marcador_pre (sets+juegos al inicio del juego)
-        ms_pre_series = df_j["marcador_sets"].dropna()
-        mj_pre_series = df_j["marcador_juegos"].dropna()
-        sets_pre = ms_pre_series.iloc[0] if len(ms_pre_series) else np.nan
-        juegos_pre = mj_pre_series.iloc[0] if len(mj_pre_series) else np.nan
-
-        # marcador_post (sets+juegos al final del juego) => inicio del siguiente juego si existe
-        df_next = df[df["juego_real"] == (j + 1)]
-        ms_next = df_next["marcador_sets"].dropna() if not df_next.empty else pd.Series([], dtype=object)
-        mj_next = df_next["marcador_juegos"].dropna() if not df_next.empty else pd.Series([], dtype=object)
-
-        if len(ms_next) and len(mj_next):
-            sets_post = ms_next.iloc[0]
-            juegos_post = mj_next.iloc[0]
-        else:
-            ms_last = df_j["marcador_sets"].dropna()
-            mj_last = df_j["marcador_juegos"].dropna()
-            sets_post = ms_last.iloc[-1] if len(ms_last) else np.nan
-            juegos_post = mj_last.iloc[-1] if len(mj_last) else np.nan
-
-        resumen_j["marcador_pre"] = f"sets: {sets_pre} | juegos: {juegos_pre}"
-        resumen_j["marcador_post"] = f"sets: {sets_post} | juegos: {juegos_post}"
-        resumen_j["set"] = set_j
-        resumen_j["juego"] = j
-
-        # info_saque
-        saca_jugador = df_j.get("saca_jugador", pd.Series(dtype=object)).dropna().unique()
-        saca_jugador = saca_jugador[0] if len(saca_jugador) else None
-
-        saca_pareja = df_j.get("saca_pareja", pd.Series(dtype=object)).dropna().unique()
-        saca_pareja = saca_pareja[0] if len(saca_pareja) else None
-
-        def info_saque(jugador):
-            if "pareja_id" not in df.columns:
-                return np.nan
-            pareja_j = df[df[COL_JUGADOR] == jugador]["pareja_id"].iloc[0]
-            if saca_jugador is None:
-                return np.nan
-            if jugador == saca_jugador:
-                return 1
-            if saca_pareja is not None and pareja_j == saca_pareja:
-                return 2
-            return 3
-
-        resumen_j["info_saque"] = resumen_j[COL_JUGADOR].apply(info_saque)
-
-        # # gano_juego (pareja1-pareja2)
-        # a_pre, b_pre = parse_score(juegos_pre)
-        # a_post, b_post = parse_score(juegos_post)
-
-        # ganador = None  # 1 => pareja1, 2 => pareja2
-        # if None not in (a_pre, b_pre, a_post, b_post):
-        #     da, db = (a_post - a_pre), (b_post - b_pre)
-        #     if (da, db) == (1, 0):
-        #         ganador = 1
-        #     elif (da, db) == (0, 1):
-        #         ganador = 2
-
-        # ---------- determinar ganador del juego ----------
-        a_pre, b_pre = parse_score(juegos_pre)
-        a_post, b_post = parse_score(juegos_post)
-
-        s1_pre, s2_pre = parse_score(sets_pre)
-        s1_post, s2_post = parse_score(sets_post)
-
-        ganador = None  # 1 => pareja1, 2 => pareja2
-
-        # Caso 1: juego normal (no cambia el set)
-        if None not in (a_pre, b_pre, a_post, b_post) and (s1_pre == s1_post and s2_pre == s2_post):
-            da, db = (a_post - a_pre), (b_post - b_pre)
-            if (da, db) == (1, 0):
-                ganador = 1
-            elif (da, db) == (0, 1):
-                ganador = 2
-
-        # Caso 2: cambio de set → el ganador del set gana el último juego
-        elif None not in (s1_pre, s2_pre, s1_post, s2_post):
-            ds1, ds2 = (s1_post - s1_pre), (s2_post - s2_pre)
-            if (ds1, ds2) == (1, 0):
-                ganador = 1
-            elif (ds1, ds2) == (0, 1):
-                ganador = 2
-
-
-        P1_KEYS = ("chingotto", "galan")
-        P2_KEYS = ("coello", "tapia")
-
-        def pertenece_p1(nombre_norm: str) -> bool:
-            return any(k in nombre_norm for k in P1_KEYS)
-
-        def pertenece_p2(nombre_norm: str) -> bool:
-            return any(k in nombre_norm for k in P2_KEYS)
-
-        def gano_juego_por_jugador(jugador):
-            jn = norm_name(jugador)
-            if ganador == 1:
-                return pertenece_p1(jn)
-            if ganador == 2:
-                return pertenece_p2(jn)
-            return False
-
-        resumen_j["gano_juego"] = resumen_j[COL_JUGADOR].apply(gano_juego_por_jugador)
-
-        # ==========================
-        # NUEVO: info_break
-        # ==========================
-        # Determinar pareja que saca (1 o 2)
-        sacador_team = None  # 1 => pareja1, 2 => pareja2
-
-        if saca_jugador is not None:
-            sj = norm_name(saca_jugador)
-            if pertenece_p1(sj):
-                sacador_team = 1
-            elif pertenece_p2(sj):
-                sacador_team = 2
-        elif saca_pareja is not None and "pareja_id" in df.columns:
-            # fallback por pareja_id si tu saque_utils lo rellena así
-            try:
-                # pareja1/2 se asumen como ids 1/2 (si es tu caso); si no, no lo forzamos
-                if int(saca_pareja) in (1, 2):
-                    sacador_team = int(saca_pareja)
-            except:
-                sacador_team = None
-
-        def info_break_por_jugador(jugador):
-            # Si no sabemos sacador o ganador, no inventamos
-            if sacador_team is None or ganador is None:
-                return "desconocido"
-
-            # Si gana el que saca => no break para todos
-            if sacador_team == ganador:
-                return "no_break"
-
-            # Si pierde el que saca => hay break:
-            # - Sacador: recibe_break
-            # - Restador: hace_break
-            jn = norm_name(jugador)
-            in_sacador = pertenece_p1(jn) if sacador_team == 1 else pertenece_p2(jn)
-            return "recibe_break" if in_sacador else "hace_break"
-
-        resumen_j["info_break"] = resumen_j[COL_JUGADOR].apply(info_break_por_jugador)
-
-        rows.append(resumen_j)
-        rows.append(pd.DataFrame([[""] * len(resumen_j.columns)], columns=resumen_j.columns))
-
-    df_juegos = pd.concat(rows, ignore_index=True)
+    # RESUMEN POR JUEGO (una pasada: juego_real es contiguo y no decreciente)
+    df_juegos = resumen_por_juego(df, cubo)
     df_juegos.to_excel(os.path.join(out, "resumen_juegos.xlsx"), index=False)
 
     print("   ✔ resumen_juegos.xlsx generado con marcador_pre/post, gano_juego e info_break.\n")
 
 
+def exportar_metricas(df: pd.DataFrame, out: str, pareja1, pareja2, cubo: CuboMetricas | None = None):
+    print("\n📊 Exportando métricas...")
+    print(f"   Sets: {int(df['set_real'].max())} | Juegos: {int(df['juego_real'].max())}")
+
+    # una sola agregación; partido, sets y juegos son cortes y sumas del cubo
+    cubo = cubo if cubo is not None else cubo_metricas(df)
+    cubo.guardar(os.path.join(out, "cubo_metricas.parquet"))
+    exportar_resumenes(df, out, cubo)
+    exportar_resumen_juegos(df, out, cubo)
+
+
+# ==========================================================
+# HEAT MAP — EVOLUCIÓN A LO LARGO DEL PARTIDO
+# ==========================================================
+def heatmap_evolucion_partido(df: pd.DataFrame, output_dir: str, trabajos: list | None = None,
+                              cubo: CuboMetricas | None = None):
+    """
+    % de cada categoría por jugador y juego (juego_real), pintado como heat map.
+    Sale de las filas por juego del cubo de métricas, sin re-agrupar.
+    """
+    print("🔥 Heat map de evolución por juego")
+    os.makedirs(output_dir, exist_ok=True)
+
+    cubo = cubo if cubo is not None else cubo_metricas(df)
+    evol = cubo.evolucion_porcentajes().rename(columns={"juego": "juego_real"})
+    evol.to_excel(os.path.join(output_dir, "evolucion_por_juego.xlsx"), index=False)
+
+    cats = list(cubo.categorias)
+    propios = []
+    for jugador, dfj in evol.groupby(COL_JUGADOR):
+        matriz = dfj.set_index("juego_real")[cats].T
+
+        fname = f"evolucion_{jugador}.png"
+        propios.append(partial(
+            heatmap_evolucion, os.path.join(output_dir, fname),
+            matriz.to_numpy(dtype=float), cats, matriz.columns.tolist(),
+            f"Evolución por juego — {jugador}", dpi=150,
+        ))
+        print(f"   📁 {fname}")
+
+    _encolar_o_ejecutar(propios, trabajos)
+
+
 # ==========================================================
 # TOP GOLPES PARTIDO
 # ==========================================================
-def top_golpes_partido(df: pd.DataFrame, output_dir: str):
+def top_golpes_partido(df: pd.DataFrame, output_dir: str, trabajos: list | None = None):
     print("🎯 TOP golpes del partido entero")
     os.makedirs(output_dir, exist_ok=True)
 
@@ -527,24 +450,26 @@ def top_golpes_partido(df: pd.DataFrame, output_dir: str):
     df_valid = df[~df[COL_GOLPE].astype(str).str.lower().isin(["saque", "servicio", "service"])]
     conteo = df_valid.groupby([COL_JUGADOR, COL_GOLPE]).size().reset_index(name="conteo")
 
+    propios = []
     for jugador, dfj in conteo.groupby(COL_JUGADOR):
         df_top = dfj.sort_values("conteo", ascending=False).head(10)
 
-        plt.figure(figsize=(7, 5))
-        plt.barh(df_top[COL_GOLPE], df_top["conteo"])
-        plt.title(f"Top golpes — Partido Completo — {jugador}")
-        plt.tight_layout()
-
         fname = f"top_golpes_partido_{jugador}.png"
-        plt.savefig(os.path.join(output_dir, fname), dpi=300)
-        plt.close()
+        propios.append(partial(
+            barras_horizontales, os.path.join(output_dir, fname),
+            df_top[COL_GOLPE].tolist(), df_top["conteo"].tolist(),
+            f"Top golpes — Partido Completo — {jugador}", figsize=(7, 5), dpi=300,
+        ))
         print(f"   📁 {fname}")
 
+    _encolar_o_ejecutar(propios, trabajos)
+
 
 # ==========================================================
 # PISTA PARTIDO
 # ==========================================================
-def pintar_pista_partido(df: pd.DataFrame, output_dir: str):
+def pintar_pista_partido(df: pd.DataFrame, output_dir: str, modo_html: str = "compartido",
+                         trabajos: list | None = None):
     print("🎾 Pintando pista del PARTIDO ENTERO...")
     os.makedirs(output_dir, exist_ok=True)
 
@@ -554,124 +479,265 @@ def pintar_pista_partido(df: pd.DataFrame, output_dir: str):
         print(f"⚠ FALTAN columnas: {missing} → NO SE PUEDE PINTAR PISTA COMPLETA\n")
         return
 
+    propios = []
     for jugador in df[COL_JUGADOR].dropna().unique():
-        sub = df[df[COL_JUGADOR] == jugador].dropna(subset=REQUIRED).copy()
+        sub = df[df[COL_JUGADOR] == jugador].dropna(subset=REQUIRED)
         if sub.empty:
             print(f"  ⚠ Jugador {jugador} sin golpes → omitiendo.")
             continue
 
-        fig = go.Figure()
-
-        SERVICIO_Y_OFFSET = 60
-        CENTRO_X = ANCHO_PISTA / 2
-
-        fig.add_shape(type="rect", x0=0, y0=0, x1=ANCHO_PISTA, y1=LARGO_PISTA,
-                      line=dict(color="white", width=3))
-        fig.add_shape(type="line", x0=0, y0=LARGO_PISTA / 2, x1=ANCHO_PISTA, y1=LARGO_PISTA / 2,
-                      line=dict(color="white", width=4))
-        fig.add_shape(type="line", x0=0, y0=LARGO_PISTA/2 - SERVICIO_Y_OFFSET,
-                      x1=ANCHO_PISTA, y1=LARGO_PISTA/2 - SERVICIO_Y_OFFSET,
-                      line=dict(color="white", width=2))
-        fig.add_shape(type="line", x0=0, y0=LARGO_PISTA/2 + SERVICIO_Y_OFFSET,
-                      x1=ANCHO_PISTA, y1=LARGO_PISTA/2 + SERVICIO_Y_OFFSET,
-                      line=dict(color="white", width=2))
-        fig.add_shape(type="line", x0=CENTRO_X, y0=LARGO_PISTA/2,
-                      x1=CENTRO_X, y1=LARGO_PISTA/2 - SERVICIO_Y_OFFSET,
-                      line=dict(color="white", width=2))
-        fig.add_shape(type="line", x0=CENTRO_X, y0=LARGO_PISTA/2,
-                      x1=CENTRO_X, y1=LARGO_PISTA/2 + SERVICIO_Y_OFFSET,
-                      line=dict(color="white", width=2))
-
-        traces = []
-        for cat, color in COLORES_EVENTO.items():
-            df_cat = sub[sub[COL_CATEG] == cat]
-            if df_cat.empty:
-                continue
-
-            first_legend = True
-            for _, r in df_cat.iterrows():
-                traces.append(go.Scatter(
-                    x=[r["inicio_x"], r["fin_x"]],
-                    y=[r["inicio_y"], r["fin_y"]],
-                    mode="lines+markers",
-                    line=dict(color=color, width=2),
-                    marker=dict(size=6, symbol="circle"),
-                    name=cat,
-                    legendgroup=cat,
-                    showlegend=first_legend,
-                ))
-                traces.append(go.Scatter(
-                    x=[r["fin_x"]],
-                    y=[r["fin_y"]],
-                    mode="markers",
-                    marker=dict(size=8, color=color, symbol="triangle-up"),
-                    name=f"{cat}_fin",
-                    hoverinfo="none",
-                    showlegend=False,
-                    legendgroup=cat,
-                ))
-                first_legend = False
-
-        fig.add_traces(traces)
-
-        fig.update_layout(
-            title=f"Pista — Partido Completo — {jugador}",
-            height=900,
-            width=700,
-            plot_bgcolor="#003C77",
-            paper_bgcolor="#00244D",
-            xaxis=dict(visible=False, range=[0, ANCHO_PISTA]),
-            yaxis=dict(visible=False, range=[0, LARGO_PISTA], scaleanchor="x", scaleratio=1),
-            font=dict(color="white"),
-            legend=dict(groupclick="togglegroup", itemclick="toggle")
-        )
-
+        # Una traza de líneas + una de fin por categoría (no por golpe)
         filename = f"pista_partido_completo_{jugador}.html"
-        fig.write_html(os.path.join(output_dir, filename))
+        propios.append(partial(
+            render_pista_html, os.path.join(output_dir, filename),
+            sub[REQUIRED + [COL_CATEG]], REQUIRED, COL_CATEG, COLORES_EVENTO,
+            ANCHO_PISTA, LARGO_PISTA, f"Pista — Partido Completo — {jugador}",
+            layout=dict(height=900, width=700), estilo=dict(hover=False),
+            modo_html=modo_html, raiz_html=output_dir,
+        ))
         print(f"   📁 guardado: {filename}")
 
+    _encolar_o_ejecutar(propios, trabajos)
+
+
+# ==========================================================
+# DENSIDAD EN PISTA (HISTOGRAMAS 2D)
+# ==========================================================
+def densidad_pista(df: pd.DataFrame, ruta_golpes: str | None = None,
+                   rejilla: tuple[int, int] | None = None) -> DensidadPista | None:
+    """
+    Conteos binned por jugador × categoría × set. Si se pasa `ruta_golpes`, se
+    cachean en disco junto a él y se reutilizan mientras ni el parquet ni la
+    clasificación de eventos cambien.
+    """
+    REQUIRED = ["inicio_x", "inicio_y", "fin_x", "fin_y"]
+    if any(c not in df.columns for c in REQUIRED):
+        return None
+
+    nx, ny = rejilla or rejilla_configurada()
+    cache = ruta_cache(ruta_golpes, nx, ny) if ruta_golpes else None
+    dens = cargar_cache(cache, ruta_golpes) if cache is not None else None
+    if dens is not None:
+        print(f"🗺️ Densidad en pista desde caché: {cache.name}")
+        return dens
+
+    dens = DensidadPista.desde_golpes(df, REQUIRED, ANCHO_PISTA, LARGO_PISTA, nx, ny,
+                                      COL_JUGADOR, COL_CATEG, "set_real")
+    if cache is not None:
+        dens.guardar(cache)
+        print(f"🗺️ Densidad en pista cacheada en {cache.name}")
+    return dens
+
+
+def pintar_densidad_pista(df: pd.DataFrame, output_dir: str, ruta_golpes: str | None = None,
+                          rejilla: tuple[int, int] | None = None, trabajos: list | None = None):
+    """Un PNG por jugador: inicio, fin y fin de cada categoría de evento."""
+    print("\n🗺️ Densidad de golpes en pista...")
+    dens = densidad_pista(df, ruta_golpes, rejilla)
+    if dens is None:
+        print("⚠ FALTAN columnas de coordenadas → se omite la densidad en pista.\n")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+
+    categorias = [c for c in COLORES_EVENTO if c in set(dens.claves["categoria"])]
+    propios = []
+    for jugador in dens.claves["jugador"].unique():
+        if jugador == "":
+            continue
+        matrices = {
+            "Inicio": dens.matriz("inicio", jugador=jugador),
+            "Fin": dens.matriz("fin", jugador=jugador),
+        }
+        for c in categorias:
+            matrices[f"Fin — {c}"] = dens.matriz("fin", jugador=jugador, categoria=c)
+
+        fname = f"densidad_pista_{jugador}.png"
+        propios.append(partial(
+            heatmap_pista, os.path.join(output_dir, fname), matrices,
+            ANCHO_PISTA, LARGO_PISTA, f"Densidad en pista — {jugador}",
+        ))
+        print(f"   📁 {fname}")
+
+    _encolar_o_ejecutar(propios, trabajos)
+
+
+# ==========================================================
+# ARTEFACTOS DEL INFORME (qué se genera y qué necesita)
+# ==========================================================
+def _etapa_golpes(estado: dict):
+    df = cargar_golpes(estado["ruta_golpes"])
+    df = clasificar_eventos(df)
+    estado["df"] = reconstruir_marcadores(df)
+
+
+def _etapa_saque(estado: dict):
+    df, estado["pareja1"], estado["pareja2"] = inferir_parejas(estado["df"])  # pareja_id del registro: 1 = primera pareja
+    df = extraer_sacador(df)
+    df = inferir_ganador_punto(df)
+    estado["df"] = etiquetar_puntos_saque(df)
+
+
+def _etapa_cubo(estado: dict):
+    # una sola agregación; partido, sets, juegos y evolución son cortes del cubo
+    estado["cubo"] = cubo_metricas(estado["df"])
+
+
+def _etapa_secuencias(estado: dict):
+    # estados (jugador, golpe, pared, zona) y transiciones entre golpes de cada punto
+    rejilla = rejilla_zonas_configurada(ancho=ANCHO_PISTA, largo=LARGO_PISTA)
+    estado["secuencias"] = ModeloSecuencias.desde_golpes(estado["df"], col_categ=COL_CATEG, rejilla=rejilla)
+
+
+def _estadisticas_saque(estado: dict, out: str, trabajos: list):
+    stats_saque = resumen_estadisticas_saque(estado["df"], estado["pareja1"], estado["pareja2"])
+    stats_saque.to_excel(os.path.join(out, "estadisticas_saque.xlsx"), index=False)
+    print("📄 Estadísticas de saque guardadas en estadisticas_saque.xlsx\n")
+
+
+def _simulacion_partido(estado: dict, out: str, trabajos: list):
+    # P(punto al saque) por pareja y situación → partidos simulados y sensibilidad de cada estadística
+    cfg = simulacion_configurada()
+    nombres = (estado["pareja1"], estado["pareja2"])
+    p_saque, tabla = probabilidades_saque(puntos_desde_golpes(estado["df"]), cfg["min_puntos"])
+    r = simular_partidos(p_saque, cfg["n"], semilla=cfg["semilla"])
+
+    filas = []
+    for i, nombre in enumerate(nombres):
+        fila = {"pareja": nombre, "p_gana": r["p_gana"] if i == 0 else 1 - r["p_gana"],
+                "p_juego_saque": r["p_juego_saque_exacta"][i]}
+        for marcador, p in r["resultados"].items():
+            a, b = marcador.split("-")
+            fila[f"sets {a}-{b}" if i == 0 else f"sets {b}-{a}"] = p
+        filas.append(fila)
+    resumen = pd.DataFrame(filas)
+    resumen = resumen[["pareja", "p_gana", "p_juego_saque"] + sorted(c for c in resumen if c.startswith("sets "))]
+    resumen.to_excel(os.path.join(out, "simulacion_partido.xlsx"), index=False)
+
+    sens = sensibilidad(p_saque, cfg["delta"], cfg["n"], semilla=cfg["semilla"], nombres=nombres)
+    tabla = tabla.assign(saca=tabla["pareja"].map(dict(enumerate(nombres, start=1))))
+    sens = sens.merge(tabla[["saca", "situacion", "puntos"]], how="left", on=["saca", "situacion"])
+    sens.to_excel(os.path.join(out, "simulacion_sensibilidad.xlsx"), index=False)
+    print(f"🎲 Simulación ({cfg['n']:,} partidos): P(gana {nombres[0]}) = {r['p_gana']:.1%}\n")
+
+
+ETAPAS = {
+    "golpes": Etapa("golpes", _etapa_golpes),
+    "saque": Etapa("saque", _etapa_saque, ("golpes",)),
+    "cubo": Etapa("cubo", _etapa_cubo, ("golpes",)),
+    "secuencias": Etapa("secuencias", _etapa_secuencias, ("golpes",)),
+}
+
+ARTEFACTOS = [
+    Artefacto("saque", _estadisticas_saque, ("saque",), ("estadisticas_saque.xlsx",)),
+    Artefacto("cubo", lambda e, out, t: e["cubo"].guardar(os.path.join(out, "cubo_metricas.parquet")),
+              ("cubo",), ("cubo_metricas.parquet",)),
+    Artefacto("resumenes", lambda e, out, t: exportar_resumenes(e["df"], out, e["cubo"]),
+              ("cubo",), ("resumen_partido.xlsx", "resumen_set_*.xlsx")),
+    Artefacto("juegos", lambda e, out, t: exportar_resumen_juegos(e["df"], out, e["cubo"]),
+              ("saque", "cubo"), ("resumen_juegos.xlsx",)),
+    Artefacto("evolucion", lambda e, out, t: heatmap_evolucion_partido(e["df"], out, t, e["cubo"]),
+              ("cubo",), ("evolucion_por_juego.xlsx", "evolucion_*.png")),
+    Artefacto("top_set", lambda e, out, t: top_golpes_por_set(e["df"], out, t),
+              ("golpes",), ("top_golpes_*_set_*.png",)),
+    Artefacto("pista_set", lambda e, out, t: pintar_pista_por_set(e["df"], out, e["modo_html"], t),
+              ("golpes",), ("pista_jugador_*_set_*.html",)),
+    Artefacto("top_partido", lambda e, out, t: top_golpes_partido(e["df"], out, t),
+              ("golpes",), ("top_golpes_partido_*.png",)),
+    Artefacto("pista_partido", lambda e, out, t: pintar_pista_partido(e["df"], out, e["modo_html"], t),
+              ("golpes",), ("pista_partido_completo_*.html",)),
+    Artefacto("secuencias", lambda e, out, t: e["secuencias"].guardar(out),
+              ("secuencias",), ("secuencias_estados.parquet", "secuencias_transiciones.parquet")),
+    Artefacto("simulacion", _simulacion_partido, ("saque",),
+              ("simulacion_partido.xlsx", "simulacion_sensibilidad.xlsx")),
+    Artefacto("densidad", lambda e, out, t: pintar_densidad_pista(e["df"], out, e["ruta_golpes"], trabajos=t),
+              ("golpes",), ("densidad_pista_*.png",)),
+]
+
+
+def artefactos_configurados(config_path: str = "config/config.toml") -> tuple[list[str] | None, bool]:
+    """[informes] artefactos (vacío = todos) y forzar del config."""
+    if not os.path.exists(config_path):
+        return None, False
+    cfg = load_config(config_path).get("informes", {})
+    return (cfg.get("artefactos") or None), bool(cfg.get("forzar", False))
+
 
 # ==========================================================
 # PIPELINE COMPLETO
 # ==========================================================
 def analizar_partido_completo_trazado(
     ruta_golpes="data/processed/golpes.parquet",
-    out_dir="outputs/analisis"
+    out_dir="outputs/analisis",
+    modo_html="compartido",
+    procesos=None,
+    artefactos=None,
+    forzar=None,
 ):
+    """
+    modo_html="compartido": un solo plotly.min.js en out_dir + index.html con
+    carga diferida de cada pista; "embebido": cada HTML lleva plotly.js dentro.
+    procesos: workers para la fase de figuras (None = [render] procesos del config).
+    artefactos: nombres de ARTEFACTOS a generar (None = [informes] del config;
+    si tampoco hay, todos). Los que ya están al día respecto a golpes.parquet se
+    omiten salvo con forzar=True, y solo se calculan las etapas que necesitan
+    los demás. Devuelve el DataFrame procesado (None si no hizo falta cargarlo).
+    """
     print("\n========================================")
     print("🔎 INICIANDO ANÁLISIS COMPLETO")
     print("========================================\n")
 
-    df = cargar_golpes(ruta_golpes)
-    df = clasificar_eventos(df)
-    df = reconstruir_marcadores(df)
-
-    # Procesamiento de saque
-    df, pareja1, pareja2 = inferir_parejas(df)  # pareja1=Chingotto-Galán, pareja2=Coello-Tapia
-    df = extraer_sacador(df)
-    df = inferir_ganador_punto(df)
-    df = etiquetar_puntos_saque(df)
+    pedidos_cfg, forzar_cfg = artefactos_configurados()
+    pedidos = list(artefactos) if artefactos is not None else pedidos_cfg
+    forzar = forzar_cfg if forzar is None else forzar
 
-    # guardar estadísticas de saque
     os.makedirs(out_dir, exist_ok=True)
-    stats_saque = resumen_estadisticas_saque(df, pareja1, pareja2)
-    stats_saque.to_excel(os.path.join(out_dir, "estadisticas_saque.xlsx"), index=False)
-    print("📄 Estadísticas de saque guardadas en estadisticas_saque.xlsx\n")
-
-    # métricas + gráficos
-    exportar_metricas(df, out_dir, pareja1, pareja2)
-    top_golpes_por_set(df, out_dir)
-    pintar_pista_por_set(df, out_dir)
-    top_golpes_partido(df, out_dir)
-    pintar_pista_partido(df, out_dir)
+    a_generar, vigentes = seleccionar(ARTEFACTOS, pedidos, out_dir, [ruta_golpes], forzar)
+    for a in vigentes:
+        print(f"⏭️ {a.nombre}: al día, se omite")
+    if not a_generar:
+        print("✅ Nada que generar: todo está al día.\n")
+        return None
+
+    estado = {"ruta_golpes": ruta_golpes, "modo_html": modo_html}
+    for etapa in orden_etapas(a_generar, ETAPAS):
+        etapa.calcular(estado)
+
+    # Tablas al momento; las figuras se encolan y se ejecutan en un pool
+    trabajos = []
+    for a in a_generar:
+        a.generar(estado, out_dir, trabajos)
+
+    html = any(p.endswith(".html") for a in a_generar for p in a.salidas)
+    if html and modo_html == "compartido":
+        asegurar_plotlyjs(out_dir)     # antes del pool: un único escritor del asset
+    ejecutar_trabajos(trabajos, procesos)
+    if html and modo_html == "compartido":
+        print(f"🗂️ Índice de pistas: {escribir_indice(out_dir, 'Pistas del partido')}")
 
     print("\n========================================")
     print("✅ ANÁLISIS COMPLETO GENERADO EN:")
     print(os.path.abspath(out_dir))
     print("========================================\n")
 
-    return df
+    return estado["df"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe completo de golpes de un partido")
+    parser.add_argument("--golpes", default="data/processed/golpes.parquet")
+    parser.add_argument("--salida", default="outputs/analisis")
+    parser.add_argument("--solo", nargs="+", metavar="ARTEFACTO",
+                        help=f"generar solo estos: {', '.join(a.nombre for a in ARTEFACTOS)}")
+    parser.add_argument("--forzar", action="store_true", help="regenerar aunque esté al día")
+    parser.add_argument("--modo-html", default="compartido", choices=MODOS_HTML)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    analizar_partido_completo_trazado(
+        args.golpes, args.salida, args.modo_html, args.procesos,
+        artefactos=args.solo, forzar=True if args.forzar else None,
+    )
 
 
 if __name__ == "__main__":
-    analizar_partido_completo_trazado()
+    main()
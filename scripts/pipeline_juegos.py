@@ -1,8 +1,23 @@
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
+from functools import partial
+
+# Permite importar src/ al ejecutar desde /scripts
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.analysis.cubo_metricas import CuboMetricas
+from src.analysis.metricas_acumuladas import LineaTemporalMetricas
+from src.analysis.zonas_pista import ATRIBUTO_REJILLA, asignar_celdas, rejilla_zonas_configurada
+from src.common.artefactos import nombre_carpeta
+from src.data.categorias import COL_CATEGORIA, COLORES_CATEGORIA, asegurar_categoria
+from src.data.contexto import ContextoPartido
+from src.viz.pista import render_pista_html
+from src.viz.graficos import barras_horizontales
+from src.viz.html_compartido import asegurar_plotlyjs, escribir_indice
+from src.viz.render import crear_pool, ejecutar_trabajos
 
 # ======================================================
 # CONFIGURACIÓN GENERAL
@@ -19,12 +34,24 @@ COL_INICIO_Y = "inicio_golpe:_y"  # corregido
 COL_FIN_X    = "fin_golpe:_x"
 COL_FIN_Y    = "fin_golpe:_y"
 
-COLORES_EVENTO = {
-    "winner": "#00BFFF",
-    "error no forzado": "#FF9800",
-    "missed": "#FF3B3B",
-    "bola dentro": "#4CAF50"
-}
+# Mapeo de columnas por defecto. Cada partido trabaja con su propia copia
+# (ContextoPartido.con_coordenadas) en vez de sobrescribir estas constantes.
+CONTEXTO_POR_DEFECTO = ContextoPartido(
+    col_jugador=COL_JUGADOR,
+    col_winner=COL_WINNER,
+    col_error=COL_ERROR,
+    col_inicio_x=COL_INICIO_X,
+    col_inicio_y=COL_INICIO_Y,
+    col_fin_x=COL_FIN_X,
+    col_fin_y=COL_FIN_Y,
+)
+
+# Fichero tipado (Arrow IPC) que consume recomendador.py: solo estas columnas.
+# Las coordenadas se guardan con los nombres del contexto por defecto, que es el que usa el recomendador.
+COLUMNAS_CATEGORICAS_HANDOFF = [COL_JUGADOR, "categoria", "golpe_q"]
+COLUMNAS_ID_HANDOFF = {"jugador_id": "Int32", "pareja_id": "Int8"}   # registro de jugadores
+
+COLORES_EVENTO = COLORES_CATEGORIA
 
 # ======================================================
 # UTILIDADES
@@ -51,10 +78,10 @@ def cargar_datos(ruta=None):
 # PROCESAMIENTO DE MARCADOR ROBUSTO
 # ======================================================
 
-def procesar_marcador_robusto(df_clean):
+def procesar_marcador_robusto(df_clean, ctx=CONTEXTO_POR_DEFECTO):
     df = df_clean.copy()
-    cols = ["clip_start", "juego_p1", "juego_p2", "set_p1", "set_p2", COL_JUGADOR, COL_WINNER, COL_ERROR, 
-        COL_INICIO_X, COL_INICIO_Y, COL_FIN_X, COL_FIN_Y]
+    cols = ["clip_start", "juego_p1", "juego_p2", "set_p1", "set_p2", ctx.col_jugador, ctx.col_winner, ctx.col_error,
+        "fuerza_error", COL_CATEGORIA, *ctx.columnas_coordenadas]
     df = df[[c for c in cols if c in df.columns]].copy()
     df = df.sort_values("clip_start").reset_index(drop=True)
 
@@ -206,38 +233,70 @@ def procesar_marcador_robusto(df_clean):
 # RESTO DE FUNCIONES (sin cambios de lógica)
 # ======================================================
 
-def recortar_por_limite(df, limite_juegos, resumen_sets):
-    mask = df["juegos_totales_acumulados"] >= limite_juegos
-    if mask.any():
-        idx = mask.idxmax()
-        fila = df.loc[idx]
-        resumen_prev = resumen_sets.loc[resumen_sets["clip_start"] <= fila["clip_start"]]
-        marcadores_cerrados = resumen_prev["Marcador_Set"].tolist() if not resumen_prev.empty else []
+def construir_indice_juegos(df, resumen_sets):
+    """
+    Precalcula una sola vez por partido las fronteras de juego.
+    'juegos_totales_acumulados' es un contador no decreciente, así que la primera
+    fila con contador >= N sale de un searchsorted para todos los N a la vez.
+    Devuelve un dict con arrays indexados por N (0..total):
+      - "fila": posición de la fila de corte (primera fila con contador >= N)
+      - "fin": nº de filas incluidas en el recorte (hasta el último clip_start <= corte)
+      - "sets_cerrados": nº de sets de resumen_sets cerrados hasta la fila de corte
+    """
+    contador = df["juegos_totales_acumulados"].to_numpy()
+    total = int(contador.max()) if len(contador) else 0
+    fila = np.searchsorted(contador, np.arange(total + 1), side="left")
+
+    clips = df["clip_start"].to_numpy()
+    fin = np.searchsorted(clips, clips[fila], side="right") if len(clips) else fila
+
+    if not resumen_sets.empty:
+        marcadores_set = resumen_sets["Marcador_Set"].tolist()
+        sets_cerrados = np.searchsorted(resumen_sets["clip_start"].to_numpy(), clips[fila], side="right")
+    else:
+        marcadores_set = []
+        sets_cerrados = np.zeros(total + 1, dtype=int)
+
+    return {
+        "total": total,
+        "fila": fila,
+        "fin": fin,
+        "sets_cerrados": sets_cerrados,
+        "marcadores_set": marcadores_set,
+    }
+
+def recortar_por_limite(df, limite_juegos, resumen_sets, indice=None):
+    if indice is None:
+        indice = construir_indice_juegos(df, resumen_sets)
+    n = max(int(limite_juegos), 0)
+    if n <= indice["total"]:
+        fila = df.iloc[indice["fila"][n]]
+        marcadores_cerrados = indice["marcadores_set"][:indice["sets_cerrados"][n]]
         marcador_completo = " ".join(marcadores_cerrados + [f"{int(fila['juego_p1'])}-{int(fila['juego_p2'])}"])
     else:
         fila = df.iloc[-1]
-        marcadores_cerrados = resumen_sets["Marcador_Set"].tolist() if not resumen_sets.empty else []
-        marcador_completo = " ".join(marcadores_cerrados)
+        marcador_completo = " ".join(indice["marcadores_set"])
     return fila, marcador_completo
 
-def clasificar_eventos(df):
+def clasificar_eventos(df, ctx=CONTEXTO_POR_DEFECTO):
     d = df.copy()
-    for c in [COL_WINNER, COL_ERROR]:
+    # misma categoría que el dataset procesado (categoria_punto); si falta, se clasifica igual
+    d["categoria"] = asegurar_categoria(d, columnas=[ctx.col_error, ctx.col_winner, "fuerza_error"])
+
+    for c in [ctx.col_winner, ctx.col_error]:
         if c not in d.columns:
             d[c] = ""
         d[c] = d[c].astype(str).str.lower().str.strip()
-
-    # --- AÑADE ESTO PARA DEPURACIÓN ---
-    # ----------------------------------
-    d["categoria"] = "bola dentro"
-    d.loc[d[COL_ERROR].str.contains("error no forzado", na=False), "categoria"] = "error no forzado"
-    d.loc[d[COL_ERROR].str.contains("missed", na=False), "categoria"] = "missed"
-    d.loc[d[COL_WINNER].str.contains("winner", na=False), "categoria"] = "winner"
     return d
 
 def resumen_metricas_por_jugador(df):
     # LÓGICA ORIGINAL: Conteos y Porcentajes por jugador
-    conteos = df.groupby(["jugador", "categoria"]).size().unstack(fill_value=0)
+    conteos = df.groupby(["jugador", "categoria"], observed=True).size().unstack(fill_value=0)
+    return resumen_desde_conteos(conteos)
+
+def resumen_desde_conteos(conteos):
+    """Resumen (conteos, %, SUMA/MEDIA/STD) a partir de una tabla jugador × categoría ya contada."""
+    conteos = conteos.copy()
     conteos["total"] = conteos.sum(axis=1)
     
     # Redondeo de Porcentajes a 2 decimales
@@ -270,21 +329,50 @@ def resumen_metricas_por_jugador(df):
     
     return resumen_final
 
-def top_golpes_por_jugador(df, output_dir, top_n=5):
+def barrido_metricas_por_juego(df_proc, resumen_sets, indice=None, ctx=CONTEXTO_POR_DEFECTO):
+    """
+    Métricas acumuladas por jugador para TODOS los cortes N = 1..total en una pasada.
+    Se clasifica una vez y cada corte es una fila de la línea temporal acumulada,
+    localizada con el índice de juegos.
+    """
+    if indice is None:
+        indice = construir_indice_juegos(df_proc, resumen_sets)
+
+    linea = LineaTemporalMetricas(clasificar_eventos(df_proc, ctx), ctx.col_jugador, "categoria")
+
+    bloques = []
+    for n in range(1, indice["total"] + 1):
+        _, marcador = recortar_por_limite(df_proc, n, resumen_sets, indice)
+        conteos = linea.conteos(0, indice["fin"][n])
+        conteos["total"] = conteos.sum(axis=1)
+        porcentajes = conteos.div(conteos["total"], axis=0).mul(100).round(2)
+        bloque = pd.concat([conteos, porcentajes.add_suffix("_%")], axis=1).reset_index()
+        bloque.insert(0, "marcador", marcador)
+        bloque.insert(0, "juegos", n)
+        bloques.append(bloque)
+
+    if not bloques:
+        return pd.DataFrame()
+    return pd.concat(bloques, ignore_index=True)
+
+def top_golpes_por_jugador(df, output_dir, top_n=5, trabajos=None):
     if "golpe_q" not in df.columns:
         print("⚠️ No hay columna 'golpe_q' para top golpes.")
         return
     conteo = df.groupby(["jugador", "golpe_q"]).size().reset_index(name="conteo")
     top = conteo.sort_values(["jugador", "conteo"], ascending=[True, False]).groupby("jugador").head(top_n)
     os.makedirs(output_dir, exist_ok=True)
-    for jug, g in top.groupby("jugador"):
-        plt.figure(figsize=(6, 4))
-        plt.barh(g["golpe_q"], g["conteo"], color="#2196F3")
-        plt.title(f"Top {top_n} golpes — {jug}")
-        plt.xlabel("Repeticiones")
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_dir, f"top_golpes_{jug}.png"), dpi=300)
-        plt.close()
+    # Cada PNG es un trabajo independiente (Figure + Agg, sin estado de pyplot)
+    propios = [
+        partial(barras_horizontales, os.path.join(output_dir, f"top_golpes_{jug}.png"),
+                g["golpe_q"].tolist(), g["conteo"].tolist(), f"Top {top_n} golpes — {jug}",
+                figsize=(6, 4), dpi=300, color="#2196F3", xlabel="Repeticiones")
+        for jug, g in top.groupby("jugador")
+    ]
+    if trabajos is None:
+        ejecutar_trabajos(propios, procesos=1)
+    else:
+        trabajos.extend(propios)
 
 # ======================================================
 # DETECCIÓN AUTOMÁTICA DE COLUMNAS DE COORDENADAS
@@ -319,123 +407,92 @@ def detectar_columnas_coordenadas(df):
     return encontrados
 
 
-def pintar_pista_interactiva(df, output_dir="outputs/html_pistas"):
-    import os
-    import plotly.graph_objects as go
-    # Importamos las constantes globales necesarias (asumo que están definidas fuera de la función)
-    # COL_JUGADOR, COL_INICIO_X, COL_INICIO_Y, COL_FIN_X, COL_FIN_Y, 
-    # ANCHO_PISTA, LARGO_PISTA, COLORES_EVENTO, etc.
+def pintar_pista_interactiva(df, output_dir="outputs/html_pistas", ctx=CONTEXTO_POR_DEFECTO,
+                             modo_html="compartido", raiz_html=None, trabajos=None):
+    # Las columnas de jugador y coordenadas vienen del contexto del partido (ctx),
+    # no de variables globales: así se pueden pintar varios partidos a la vez.
+    # En modo "compartido" los HTML apuntan al plotly.min.js de raiz_html.
+    # Con `trabajos` los renders solo se encolan para el pool de procesos.
 
     # Asegurarse de que la carpeta exista
     os.makedirs(output_dir, exist_ok=True)
     #print(f"🎾 Guardando pistas interactivas en: {os.path.abspath(output_dir)}")
 
-    jugadores = df[COL_JUGADOR].dropna().unique().tolist()
+    jugadores = df[ctx.col_jugador].dropna().unique().tolist()
     #print(f"👥 Jugadores detectados: {jugadores}")
 
+    propios = []
     for jugador in jugadores:
-        # Usamos las constantes de columna que definiste en tu código original
-        sub = df[df[COL_JUGADOR] == jugador].dropna(
-            subset=[COL_INICIO_X, COL_INICIO_Y, COL_FIN_X, COL_FIN_Y]
+        sub = df[df[ctx.col_jugador] == jugador].dropna(
+            subset=ctx.columnas_coordenadas
         ).reset_index(drop=True)
         
         if sub.empty:
             print(f"⚠️ Sin coordenadas válidas para {jugador}, no se genera pista.")
             continue
 
-        # Crear figura
-        fig = go.Figure()
+        # Pista + una traza de líneas y una de fin por categoría (WebGL).
+        # Círculo en los extremos y triángulo en el fin; legendgroup por categoría
+        salida_html = os.path.join(output_dir, f"pista_{jugador}_diferenciada.html")
+        propios.append(partial(
+            render_pista_html, salida_html,
+            sub[ctx.columnas_coordenadas + ["categoria"]], ctx.columnas_coordenadas, "categoria", COLORES_EVENTO,
+            ANCHO_PISTA, LARGO_PISTA, f"Pista Interactivo — {jugador} (Inicio/Fin Diferenciado)",
+            layout=dict(showlegend=True),
+            estilo=dict(tam_inicio=5, tam_fin=8, simbolo_fin="triangle-right"),
+            modo_html=modo_html, raiz_html=raiz_html,
+        ))
+
+    if trabajos is None:
+        ejecutar_trabajos(propios, procesos=1)
+        print("✅ Finalizado: pistas interactivas creadas correctamente.")
+    else:
+        trabajos.extend(propios)
 
-        # --- DIBUJO DE LA PISTA DE PÁDEL (Líneas 33-40 de tu original, más detalle) ---
-        SERVICIO_Y_OFFSET = 60 
-        CENTRO_X = ANCHO_PISTA / 2
-        
-        fig.add_shape(type="rect", x0=0, y0=0, x1=ANCHO_PISTA, y1=LARGO_PISTA, line=dict(color="white", width=3)) 
-        fig.add_shape(type="line", x0=0, y0=LARGO_PISTA/2, x1=ANCHO_PISTA, y1=LARGO_PISTA/2, line=dict(color="white", width=4)) 
-        fig.add_shape(type="line", x0=0, y0=LARGO_PISTA/2 - SERVICIO_Y_OFFSET, x1=ANCHO_PISTA, y1=LARGO_PISTA/2 - SERVICIO_Y_OFFSET, line=dict(color="white", width=2))
-        fig.add_shape(type="line", x0=0, y0=LARGO_PISTA/2 + SERVICIO_Y_OFFSET, x1=ANCHO_PISTA, y1=LARGO_PISTA/2 + SERVICIO_Y_OFFSET, line=dict(color="white", width=2))
-        fig.add_shape(type="line", x0=CENTRO_X, y0=LARGO_PISTA/2, x1=CENTRO_X, y1=LARGO_PISTA/2 - SERVICIO_Y_OFFSET, line=dict(color="white", width=2))
-        fig.add_shape(type="line", x0=CENTRO_X, y0=LARGO_PISTA/2, x1=CENTRO_X, y1=LARGO_PISTA/2 + SERVICIO_Y_OFFSET, line=dict(color="white", width=2))
-
-        # --- DIBUJO DE TRAYECTORIAS CON DOBLE TRAZA (Marcador de inicio y fin diferente) ---
-        traces_to_add = []
-        
-        for cat, color in COLORES_EVENTO.items():
-            df_cat = sub[sub["categoria"] == cat]
-            if df_cat.empty: continue
-            
-            is_first_trace = True
-            
-            for i, r in df_cat.iterrows():
-                
-                # 1. Traza de la LÍNEA + MARCADOR DE INICIO (Círculo)
-                traces_to_add.append(go.Scatter(
-                    x=[r[COL_INICIO_X], r[COL_FIN_X]], # La línea va de inicio a fin
-                    y=[r[COL_INICIO_Y], r[COL_FIN_Y]], 
-                    mode="lines+markers",
-                    line=dict(color=color, width=2),
-                    
-                    # --- MARCADOR DE INICIO: Círculo ---
-                    marker=dict(size=5, symbol='circle'), 
-                    
-                    showlegend=is_first_trace, 
-                    name=cat,
-                    hovertext=f"Golpe ({cat})",
-                    hoverinfo="text",
-                    legendgroup=cat, # Mismo grupo
-                    
-                    # Ocultación a prueba de fallos
-                    unselected=dict(marker=dict(opacity=0)) 
-                ))
-
-                # 2. Traza de solo el MARCADOR FINAL (Triángulo/Flecha)
-                traces_to_add.append(go.Scatter(
-                    x=[r[COL_FIN_X]], # Solo el punto final
-                    y=[r[COL_FIN_Y]],
-                    mode="markers", # SOLO marcadores
-                    
-                    # --- MARCADOR DE FIN: Triángulo/Flecha ---
-                    marker=dict(size=8, symbol='triangle-right', color=color),
-                    
-                    showlegend=False, # Nunca muestra esta traza en la leyenda
-                    name=cat,
-                    hovertext=f"Fin ({cat})",
-                    hoverinfo="text",
-                    legendgroup=cat, # Mismo grupo
-                    
-                    # Ocultación a prueba de fallos
-                    unselected=dict(marker=dict(opacity=0))
-                ))
-                
-                is_first_trace = False
-
-        fig.add_traces(traces_to_add)
-
-        # --- CONFIGURACIÓN VISUAL, TAMAÑO Y LEYENDA (Tu original modificado) ---
-        fig.update_layout(
-            title=f"Pista Interactivo — {jugador} (Inicio/Fin Diferenciado)",
-            plot_bgcolor="#003C77",
-            paper_bgcolor="#00244D",
-            xaxis=dict(visible=False, range=[0, ANCHO_PISTA]),
-            # Aseguramos el ratio 1:1 y el rango de Y correcto
-            yaxis=dict(visible=False, range=[0,LARGO_PISTA], scaleanchor="x", scaleratio=1), 
-            font=dict(color="white"),
-            showlegend=True,
-            
-            # --- CONFIGURACIÓN PARA OCULTACIÓN TOTAL AL CLIC ---
-            legend=dict(
-                groupclick="togglegroup", 
-                itemclick="toggle"      
-            )
-            # ----------------------------------------------------
-        )
 
-        # --- RUTA DE GUARDADO (Tu original) ---
-        salida_html = os.path.join(output_dir, f"pista_{jugador}_diferenciada.html")
-        fig.write_html(salida_html)
-        #print(f"✅ Archivo generado: {os.path.abspath(salida_html)}")
+# ======================================================
+# HAND-OFF AL RECOMENDADOR
+# ======================================================
+
+def guardar_eventos_recomendador(df, out_dir, ctx=None, exportar_csv=False):
+    """
+    Guarda los eventos clasificados como Arrow IPC (feather sin comprimir):
+    solo las columnas que usa recomendador.py, con tipos fijos (categorías, float32 y
+    los ids de celda de la rejilla [zonas]),
+    para que cargar_eventos haga una lectura memory-mapped sin parsear texto.
+    El CSV completo queda como exportación opcional.
+    """
+    import pyarrow.feather as feather
+
+    if ctx is None:
+        ctx = CONTEXTO_POR_DEFECTO.con_coordenadas(detectar_columnas_coordenadas(df))
+
+    out = pd.DataFrame(index=df.index)
+    for col in COLUMNAS_CATEGORICAS_HANDOFF:
+        if col in df.columns:
+            out[col] = df[col].astype("string").astype("category")
+    for col, tipo in COLUMNAS_ID_HANDOFF.items():
+        if col in df.columns:
+            out[col] = pd.to_numeric(df[col], errors="coerce").astype(tipo)
+    for origen, destino in zip(ctx.columnas_coordenadas, CONTEXTO_POR_DEFECTO.columnas_coordenadas):
+        serie = df[origen] if origen in df.columns else pd.Series(np.nan, index=df.index)
+        out[destino] = pd.to_numeric(serie, errors="coerce").astype("float32")
+
+    # celda_inicio / celda_fin: el recomendador agrega por celda sin volver a mirar coordenadas
+    rejilla = rejilla_zonas_configurada(ancho=ANCHO_PISTA, largo=LARGO_PISTA)
+    out = out.join(asignar_celdas(df, ctx.columnas_coordenadas, rejilla))
+    out.attrs[ATRIBUTO_REJILLA] = rejilla.clave
+
+    eventos_path = os.path.join(out_dir, "eventos_completos.arrow")
+    feather.write_feather(out.reset_index(drop=True), eventos_path, compression="uncompressed")
+    print(f"💾 Archivo para recomendador guardado: {os.path.abspath(eventos_path)}")
+
+    if exportar_csv:
+        csv_path = os.path.join(out_dir, "eventos_completos.csv")
+        df.to_csv(csv_path, index=False)
+        print(f"💾 Exportación CSV: {os.path.abspath(csv_path)}")
 
-    print("✅ Finalizado: pistas interactivas creadas correctamente.")
+    return eventos_path
 
 
 # ======================================================
@@ -445,7 +502,7 @@ def pintar_pista_interactiva(df, output_dir="outputs/html_pistas"):
 def build_output_dir(base_dir, nombre_partido, marcador_texto):
     os.makedirs(base_dir, exist_ok=True)
     marcador_texto = str(marcador_texto).replace(" ", "_")
-    path = os.path.join(base_dir, nombre_partido, marcador_texto)
+    path = os.path.join(base_dir, nombre_carpeta(nombre_partido), nombre_carpeta(marcador_texto))
     os.makedirs(path, exist_ok=True)
     return path
 
@@ -454,27 +511,41 @@ def build_output_dir(base_dir, nombre_partido, marcador_texto):
 # ✂️ CORTAR DF POR SETS SEGÚN MARCADOR CONOCIDO
 # ======================================================
 
-def cortar_df_por_sets(df, marcador_sets: str):
+def rangos_juegos_por_set(marcador_sets: str):
     """
-    Divide el DataFrame del partido en una lista de DFs, uno por set.
-    El marcador_sets debe venir como texto tipo '6-4 1-6 0-6'.
-    Usa el número total de juegos de cada set para determinar los cortes.
+    Convierte un marcador tipo '6-4 1-6 0-6' en rangos de juego acumulados
+    [(1, 10), (11, 17), (18, 23)], uno por set.
     """
-    if "juego" not in df.columns:
-        raise ValueError("El DataFrame necesita una columna 'juego' numerada secuencialmente.")
-
-    # 1️⃣ Parseamos el marcador
-    sets = marcador_sets.strip().split()
     juegos_por_set = []
-    for s in sets:
+    for s in marcador_sets.strip().split():
         try:
             a, b = map(int, s.split("-"))
             juegos_por_set.append(a + b)
         except:
             print(f"⚠️ Formato de set no válido: {s}")
 
-    # 2️⃣ Calculamos límites acumulados
     limites = np.cumsum(juegos_por_set)
+    inicios = np.concatenate([[1], limites[:-1] + 1]) if len(limites) else []
+    return [(int(a), int(b)) for a, b in zip(inicios, limites)]
+
+def set_por_juego(juego: pd.Series, rangos) -> np.ndarray:
+    """Nº de set (1..) de cada fila según los rangos de juegos; 0 antes del primer juego."""
+    juego = juego.to_numpy()
+    limites = np.array([fin for _, fin in rangos], dtype=int)
+    return np.where(juego < 1, 0, np.searchsorted(limites, juego, side="left") + 1)
+
+def cortar_df_por_sets(df, marcador_sets: str):
+    """
+    Divide el DataFrame del partido en una lista de DFs, uno por set.
+    El marcador_sets debe venir como texto tipo '6-4 1-6 0-6'.
+    Usa el número total de juegos de cada set para determinar los cortes.
+    """
+    if "juego" not in df.columns:
+        raise ValueError("El DataFrame necesita una columna 'juego' numerada secuencialmente.")
+
+    # 1️⃣ + 2️⃣ Parseamos el marcador y calculamos límites acumulados
+    rangos = rangos_juegos_por_set(marcador_sets)
+    limites = [fin for _, fin in rangos]
     total_juegos = limites[-1]
 
     # 3️⃣ Verificamos número de juegos reales
@@ -485,12 +556,10 @@ def cortar_df_por_sets(df, marcador_sets: str):
 
     # 4️⃣ Cortamos el DF
     df_sets = []
-    start_game = 1
-    for i, limite in enumerate(limites):
+    for i, (start_game, limite) in enumerate(rangos):
         subset = df[df["juego"].between(start_game, limite)].copy()
         subset["set_manual"] = i + 1
         df_sets.append(subset)
-        start_game = limite + 1
 
     print(f"✂️ Partido dividido en {len(df_sets)} sets según marcador {marcador_sets}.")
     return df_sets
@@ -501,11 +570,21 @@ def cortar_df_por_sets(df, marcador_sets: str):
 # PIPELINE PRINCIPAL
 # ======================================================
 
-def analizar_partido_interactivo():
+def analizar_partido(ruta, juegos, base_dir=os.path.join("outputs", "figures"), exportar_csv=False,
+                     modo_html="compartido", procesos=None, pool=None):
+    """
+    Pipeline de un partido sin entrada interactiva.
+    `juegos` es el nº de juegos a analizar o "todos" para el barrido.
+    Con modo_html="compartido" todas las pistas usan un único plotly.min.js en
+    base_dir y se actualiza base_dir/index.html; "embebido" = HTML autónomos.
+    Las figuras se renderizan en un pool de `procesos` workers (None = config)
+    o en `pool` si se comparte uno entre varios partidos.
+    Todo el estado del partido (incluido el mapeo de columnas) es local a la
+    llamada, así que puede ejecutarse en paralelo para varios partidos.
+    """
     # === 1️⃣ Cargar datos ===
-    ruta = input("📂 Ruta del archivo (Excel o Parquet): ").strip()
     df0 = cargar_datos(ruta)
-    n_juegos = int(input("🎮 ¿Cuántos juegos quieres analizar?: ").strip())
+    respuesta = str(juegos).strip()
 
     # === 2️⃣ Detectar nombre del partido ===
     ultima_col = df0.columns[-1]
@@ -516,12 +595,25 @@ def analizar_partido_interactivo():
         nombre_partido = os.path.splitext(os.path.basename(ruta))[0]
     print(f"🏷️ Nombre del partido detectado: {nombre_partido}")
 
+    # === Detectar columnas de coordenadas de ESTE partido ===
+    ctx = CONTEXTO_POR_DEFECTO.con_coordenadas(detectar_columnas_coordenadas(df0))
+
     # === 3️⃣ Procesar marcador robusto sobre el DataFrame completo ===
-    df_proc, df_resumen = procesar_marcador_robusto(df0)
+    df_proc, df_resumen = procesar_marcador_robusto(df0, ctx)
+    indice = construir_indice_juegos(df_proc, df_resumen)
 
+    # === 3️⃣ BIS: Modo barrido → métricas acumuladas tras cada juego ===
+    if respuesta.lower() == "todos":
+        out_dir = build_output_dir(base_dir, nombre_partido, "barrido")
+        barrido = barrido_metricas_por_juego(df_proc, df_resumen, indice, ctx)
+        barrido.to_excel(os.path.join(out_dir, "barrido_metricas_por_juego.xlsx"), index=False)
+        print(f"📈 Barrido de {indice['total']} juegos guardado en: {os.path.abspath(out_dir)}")
+        return df_proc, barrido, out_dir
+
+    n_juegos = int(respuesta)
 
     # === 4️⃣ Determinar fila de corte y marcador actual ===
-    fila, marcador_completo = recortar_por_limite(df_proc, n_juegos, df_resumen)
+    fila, marcador_completo = recortar_por_limite(df_proc, n_juegos, df_resumen, indice)
     print(f"Este es el marcador completo hasta el corte: {marcador_completo}")
     #print(f"🎯 Marcador parcial — Juegos: {fila['juego_p1']}-{fila['juego_p2']} | Sets: {fila['set_p1']}-{fila['set_p2']}")
 
@@ -534,8 +626,7 @@ def analizar_partido_interactivo():
 
     
     # === 6️⃣ Crear carpeta de salida ===
-    base = os.path.join("outputs", "figures")
-    out_dir = build_output_dir(base, nombre_partido, marcador_completo)
+    out_dir = build_output_dir(base_dir, nombre_partido, marcador_completo)
     print(f"📁 Resultados guardados en: {os.path.abspath(out_dir)}")
 
     # Asegurar columna 'juego' secuencial a partir del contador acumulado
@@ -548,73 +639,91 @@ def analizar_partido_interactivo():
     #print(f"🧩 Añadida columna 'juego' para corte: {df_proc['juego'].nunique()} valores únicos")
 
 
-    df_sets = cortar_df_por_sets(df_proc, marcador_total)
+    # Cubo (partido, set, juego, jugador) en una sola agregación: cada set es un corte.
+    # El corte a N juegos incluye filas con el mismo clip_start que la de corte,
+    # así que ese sí sale de la línea temporal acumulada (una resta de filas).
+    df_cat = clasificar_eventos(df_proc, ctx)
+    rangos = rangos_juegos_por_set(marcador_total)
+    cubo = CuboMetricas.desde_eventos(
+        df_cat.assign(set_cubo=set_por_juego(df_cat["juego"], rangos)),
+        ctx.col_jugador, "categoria", "set_cubo", "juego", partido=nombre_partido,
+    )
+    cubo.guardar(os.path.join(out_dir, "cubo_metricas.parquet"))
+    linea = LineaTemporalMetricas(df_cat, ctx.col_jugador, "categoria")
 
-    for i, df_set in enumerate(df_sets, start=1):
+    resumenes = []
+    for i, _ in enumerate(rangos, start=1):
         print(f"\n🏁 Procesando set {i}")
-        df_set_rec = clasificar_eventos(df_set)
-        resumen = resumen_metricas_por_jugador(df_set_rec)
+        resumen = resumen_desde_conteos(cubo.conteos(set_=i))
         resumen["set"] = i
         resumen.to_excel(os.path.join(out_dir, f"resumen_set_{i}.xlsx"), index=False)
-
-    resumenes = []
-    for i, df_set in enumerate(df_sets, start=1):
-        df_set_rec = clasificar_eventos(df_set)
-        r = resumen_metricas_por_jugador(df_set_rec)
-        r["set"] = i
-        resumenes.append(r)
+        resumenes.append(resumen)
 
     df_resumen_todos = pd.concat(resumenes, ignore_index=True)
     df_resumen_todos.to_excel(os.path.join(out_dir, "resumen_metricas_por_set.xlsx"), index=False)
 
 
     # === 5️⃣ Cortar el DataFrame original hasta esa fila ===
-    if "clip_start" in df0.columns:
-        # Buscar el índice más cercano del clip_start coincidente o menor
-        idx_corte = df0[df0["clip_start"] <= fila["clip_start"]].index.max()
-        df_cortado = df0.loc[:idx_corte].copy()
-    else:
-        df_cortado = df0.copy()  # Fallback
+    # df_proc es df0 ordenado por clip_start: el índice ya da cuántas filas entran
+    n_filas = indice["fin"][n_juegos] if 0 <= n_juegos <= indice["total"] else len(df_proc)
+    df_cortado = df0.sort_values("clip_start").reset_index(drop=True).iloc[:n_filas].copy()
     #print(f"✂️  DataFrame recortado hasta fila {idx_corte} ({len(df_cortado)} filas)."
 
     # === 7️⃣ Clasificación y métricas usando solo el DF recortado ===
-    df_rec = clasificar_eventos(df_cortado)
-    df_tot = clasificar_eventos(df_rec)
+    df_rec = clasificar_eventos(df_cortado, ctx)
+    df_tot = clasificar_eventos(df_rec, ctx)
 
     # Validar que tenga columna 'jugador'
-    if "jugador" not in df_rec.columns:
+    if ctx.col_jugador not in df_rec.columns:
         print("⚠️ Advertencia: No se encontró la columna 'jugador' en los datos. Saltando métricas por jugador.")
     else:
-        resumen = resumen_metricas_por_jugador(df_rec)
+        resumen = resumen_desde_conteos(linea.conteos(0, n_filas))
         resumen.to_excel(os.path.join(out_dir, "resumen_metricas.xlsx"), index=False)
         #print(f"✅ Resumen guardado en {out_dir}")
 
         # === 8️⃣ Visualizaciones ===
-        top_golpes_por_jugador(df_rec, output_dir=out_dir)
-        # === Detectar columnas de coordenadas automáticamente ===
-        col_map = detectar_columnas_coordenadas(df_rec)
-
-        # Actualizar variables globales
-        global COL_INICIO_X, COL_INICIO_Y, COL_FIN_X, COL_FIN_Y
-        if col_map["inicio_x"]: COL_INICIO_X = col_map["inicio_x"]
-        if col_map["inicio_y"]: COL_INICIO_Y = col_map["inicio_y"]
-        if col_map["fin_x"]:    COL_FIN_X    = col_map["fin_x"]
-        if col_map["fin_y"]:    COL_FIN_Y    = col_map["fin_y"]
-
-        #print(f"✅ Usando columnas: {COL_INICIO_X}, {COL_INICIO_Y}, {COL_FIN_X}, {COL_FIN_Y}")
-
-        pintar_pista_interactiva(df_rec, output_dir=out_dir)
+        trabajos = []
+        top_golpes_por_jugador(df_rec, output_dir=out_dir, trabajos=trabajos)
+        pintar_pista_interactiva(df_rec, output_dir=out_dir, ctx=ctx, modo_html=modo_html,
+                                 raiz_html=base_dir, trabajos=trabajos)
+        if modo_html == "compartido":
+            asegurar_plotlyjs(base_dir)
+        ejecutar_trabajos(trabajos, procesos, pool=pool)
+        print("✅ Finalizado: pistas interactivas creadas correctamente.")
+        if modo_html == "compartido":
+            escribir_indice(base_dir)
 
 
     # === Guardar eventos ya clasificados para el recomendador de nivel 2 ===
-    eventos_path = os.path.join(out_dir, "eventos_completos.csv")
-    df_tot.to_csv(eventos_path, index=False)
-    print(f"💾 Archivo para recomendador guardado: {os.path.abspath(eventos_path)}")
+    guardar_eventos_recomendador(df_tot, out_dir, ctx=ctx, exportar_csv=exportar_csv)
 
     print("\n✅ Análisis completo.")
     return df_cortado, marcador_completo, out_dir
 
 
+def analizar_partido_interactivo(exportar_csv=False):
+    ruta = input("📂 Ruta del archivo (Excel o Parquet): ").strip()
+    juegos = input("🎮 ¿Cuántos juegos quieres analizar? (número o 'todos' para barrido): ").strip()
+    return analizar_partido(ruta, juegos, exportar_csv=exportar_csv)
+
+
+def analizar_partidos_concurrentes(trabajos, max_workers=4, base_dir=os.path.join("outputs", "figures"),
+                                   modo_html="compartido", procesos=None):
+    """
+    Procesa varios partidos a la vez en un mismo proceso.
+    `trabajos` es una lista de (ruta, juegos); cada partido usa su propio ContextoPartido.
+    """
+    # Un solo pool de procesos para las figuras de todos los partidos
+    with crear_pool(procesos) as render, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = [pool.submit(analizar_partido, ruta, juegos, base_dir, False, modo_html, pool=render)
+                   for ruta, juegos in trabajos]
+        resultados = [f.result() for f in futuros]
+    if modo_html == "compartido":
+        escribir_indice(base_dir)   # índice final con todos los partidos
+    return resultados
+
+
+
 # ======================================================
 # EJECUCIÓN
 # ======================================================
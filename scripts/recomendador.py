@@ -1,11 +1,34 @@
 # recomendador_nivel2.py
 
+import argparse
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
 import pandas as pd
-
-# Reutilizamos constantes del pipeline
-from pipeline_juegos import ANCHO_PISTA, LARGO_PISTA, COL_INICIO_X, COL_FIN_X, COL_JUGADOR, COL_FIN_Y
+import pyarrow.feather as feather
+
+# Permite importar src/ al ejecutar desde /scripts
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Sin importar pipeline_juegos (matplotlib/plotly): las columnas son las del
+# contexto por defecto, que es el que usa eventos_completos.arrow
+from src.common.artefactos import nombre_carpeta
+from src.data.contexto import ContextoPartido
+from src.data.registro_jugadores import normalizar_nombre, normalizar_nombres
+from src.analysis.almacen_features import LADOS, AlmacenFeatures, marcar_cortes
+from src.analysis.intervalos import intervalos_configurados, intervalos_tasas
+from src.analysis.perfiles_jugadores import IndicePerfiles
+from src.analysis.reglas_tacticas import cargar_reglas, textos_reglas
+from src.analysis.secuencias_golpes import ModeloSecuencias
+from src.analysis.zonas_pista import (ANCHO_PISTA, LARGO_PISTA, SIN_ZONA, RejillaPista,
+                                      asegurar_celdas, rejilla_zonas_configurada)
+from src.viz.render import procesos_configurados
+
+CONTEXTO_POR_DEFECTO = ContextoPartido()
 
 # ======================================================
 # CONFIGURACIÓN
@@ -17,86 +40,169 @@ NUESTROS_JUGADORES = ["Jorge Nieto","Miguel Yanguas"]  # <-- ajusta según datas
 MIN_EVENTOS_ZONA = 10   # mínimo de eventos para considerar una zona “fiable”
 MIN_EVENTOS_GOLPE = 5   # mínimo de eventos para considerar un golpe “fiable”
 
+# Conteos de todos los partidos procesados (se amplía partido a partido)
+RUTA_ALMACEN = os.path.join("data", "processed", "almacen_recomendador.parquet")
+
+# Perfiles de juego por jugador (scripts/perfiles_jugadores.py)
+RUTA_PERFILES = os.path.join("data", "processed", "perfiles_jugadores.parquet")
+N_SIMILARES = 3         # rivales parecidos de los que se toman prestadas las tácticas
+
 # ======================================================
 # CARGA DE DATOS
 # ======================================================
 
 def cargar_eventos(out_dir):
     """
-    Lee el archivo eventos_recortados.* generado por pipeline_juegos.py
+    Lee el archivo eventos_completos.* generado por pipeline_juegos.py
     (idealmente con TODO el partido, no solo el recorte).
+    Prioridad: .arrow (tipado, memory-mapped, sin parseo) → .parquet → .csv.
     """
+    arrow_path   = os.path.join(out_dir, "eventos_completos.arrow")
     parquet_path = os.path.join(out_dir, "eventos_completos.parquet")
     csv_path     = os.path.join(out_dir, "eventos_completos.csv")
 
-    if os.path.exists(parquet_path):
+    if os.path.exists(arrow_path):
+        print(f"📂 Cargando eventos desde {arrow_path}")
+        return feather.read_table(arrow_path, memory_map=True).to_pandas()
+    elif os.path.exists(parquet_path):
         print(f"📂 Cargando eventos desde {parquet_path}")
         return pd.read_parquet(parquet_path)
     elif os.path.exists(csv_path):
         print(f"📂 Cargando eventos desde {csv_path}")
         return pd.read_csv(csv_path)
     else:
-        raise FileNotFoundError("No se encontró eventos_completos.parquet ni .csv en esa carpeta.")
+        raise FileNotFoundError("No se encontró eventos_completos.arrow, .parquet ni .csv en esa carpeta.")
 
 
 # ======================================================
 # SEPARAR NUESTROS GOLPES Y LOS DEL RIVAL
 # ======================================================
 
-def separar_nuestros_y_rivales(df, nuestros=NUESTROS_JUGADORES):
+def es_nuestro(df, nuestros=NUESTROS_JUGADORES, ctx=CONTEXTO_POR_DEFECTO):
+    """
+    Máscara de nuestros golpes. Los nombres se comparan normalizados
+    (mayúsculas/acentos/espacios); si los eventos traen pareja_id del registro,
+    se separa por pareja (entero), así que basta con indicar uno de nuestros jugadores.
+    """
+    nuestro = normalizar_nombres(df[ctx.col_jugador]).isin([normalizar_nombre(n) for n in nuestros])
+
+    if "pareja_id" in df.columns:
+        parejas = df.loc[nuestro.to_numpy(), "pareja_id"].dropna()
+        if len(parejas):
+            nuestro = (df["pareja_id"] == parejas.mode().iloc[0]).fillna(False)
+
+    return nuestro.to_numpy(dtype=bool)
+
+def lado_eventos(df, nuestros=NUESTROS_JUGADORES, ctx=CONTEXTO_POR_DEFECTO):
+    """'nuestro' / 'rival' por fila: la clave de lado de conteos_eventos sobre el partido entero."""
+    return np.where(es_nuestro(df, nuestros, ctx), LADOS[0], LADOS[1])
+
+def separar_nuestros_y_rivales(df, nuestros=NUESTROS_JUGADORES, ctx=CONTEXTO_POR_DEFECTO):
     """
-    Divide el DF en nuestros golpes y golpes de los rivales
-    asumiendo que 'jugador' contiene nombres.
+    Divide el DF en nuestros golpes y golpes de los rivales (copias). Para
+    conteos no hace falta: conteos_eventos(df, lado=lado_eventos(df)) agrega
+    los dos lados de una vez.
     """
-    df_nuestros = df[df[COL_JUGADOR].isin(nuestros)].copy()
-    df_rivales  = df[~df[COL_JUGADOR].isin(nuestros)].copy()
-    return df_nuestros, df_rivales
+    nuestro = es_nuestro(df, nuestros, ctx)
+    return df[nuestro].copy(), df[~nuestro].copy()
 
 
 # ======================================================
 # ZONAS ESPACIALES
 # ======================================================
+#
+# Cada golpe lleva el id de la celda donde termina (celda_fin, rejilla [zonas]
+# del config), calculado una vez en pipeline_juegos. Las zonas con nombre
+# (lateral Izq/Der, profundidad Fondo/Media/Red) son una etiqueta por celda:
+# los conteos se guardan por celda y la zona se resuelve al construir cada tabla.
+
+COLUMNA_ZONA = {"lateral": "zona_rival", "profundidad": "zona_profundidad"}
+
+def rejilla_recomendador():
+    return rejilla_zonas_configurada(ancho=ANCHO_PISTA, largo=LARGO_PISTA)
 
-def agregar_zona_rival(df):
+def celdas_fin(df, ctx=CONTEXTO_POR_DEFECTO, rejilla=None):
+    """celda_fin guardada con los eventos (o calculada si falta / es de otra rejilla)."""
+    rejilla = rejilla or rejilla_recomendador()
+    return asegurar_celdas(df, ctx.columnas_coordenadas, rejilla)["celda_fin"]
+
+def agregar_zona_rival(df, ctx=CONTEXTO_POR_DEFECTO, rejilla=None):
     """
-    Añade columna 'zona_rival' (Izquierda/Derecha) según coordenada X de fin de golpe.
+    Añade columna 'zona_rival' (Izquierda/Derecha) según la celda de fin de golpe.
     """
-    df = df.copy()
-    mitad = ANCHO_PISTA / 2
-    df["zona_rival"] = np.where(df[COL_FIN_X] < mitad, "Izquierda", "Derecha")
-    return df
+    return aplicar_zonas(df, ctx, rejilla, disposiciones=("lateral",))
 
-def agregar_zona_profundidad(df):
+def agregar_zona_profundidad(df, ctx=CONTEXTO_POR_DEFECTO, rejilla=None):
     """
-    Añade columna 'zona_profundidad' (Fondo / Media / Red) según coordenada Y de fin de golpe.
+    Añade columna 'zona_profundidad' (Fondo / Media / Red) según la celda de fin de golpe.
     """
+    return aplicar_zonas(df, ctx, rejilla, disposiciones=("profundidad",))
+
+def aplicar_zonas(df, ctx=CONTEXTO_POR_DEFECTO, rejilla=None, disposiciones=("lateral", "profundidad")):
+    """
+    Aplica zonas horizontales (Izq/Der) y verticales (Fondo/Media/Red).
+    Sin coordenadas de fin la zona es "Desconocida".
+    """
+    rejilla = rejilla or rejilla_recomendador()
+    celdas = celdas_fin(df, ctx, rejilla)
     df = df.copy()
-    tercio = LARGO_PISTA / 3
-    y = df[COL_FIN_Y]
-
-    condiciones = [
-        y <= tercio,
-        (y > tercio) & (y <= 2*tercio),
-        y > 2*tercio
-    ]
-    zonas = ["Fondo", "Media pista", "Cerca de red"]
-    df["zona_profundidad"] = np.select(condiciones, zonas, default="Desconocida")
+    for disposicion in disposiciones:
+        df[COLUMNA_ZONA[disposicion]] = rejilla.zonas(celdas, disposicion)
     return df
 
-def aplicar_zonas(df):
+def zonas_conteos(conteos, disposicion):
     """
-    Aplica zonas horizontales (Izq/Der) y verticales (Fondo/Media/Red).
+    Zona de cada fila de conteos a partir de (rejilla, celda_fin). Las filas del
+    almacén registradas antes de guardar celdas conservan su zona ya calculada.
     """
-    df_z = agregar_zona_rival(df)
-    df_z = agregar_zona_profundidad(df_z)
-    return df_z
+    zona = pd.Series(SIN_ZONA, index=conteos.index, dtype=object, name=COLUMNA_ZONA[disposicion])
+    if "celda_fin" in conteos.columns:
+        for clave, filas in conteos.groupby("rejilla").groups.items():
+            zona[filas] = RejillaPista.desde_clave(clave).zonas(conteos.loc[filas, "celda_fin"], disposicion)
+    legado = COLUMNA_ZONA[disposicion]
+    if legado in conteos.columns:
+        zona = zona.mask(conteos[legado].notna(), conteos[legado])
+    return zona
+
+
+# ======================================================
+# CONTEOS (base de todas las tablas del recomendador)
+# ======================================================
+
+def conteos_eventos(df, ctx=CONTEXTO_POR_DEFECTO, lado=None, rejilla=None):
+    """
+    Nº de eventos por jugador × celda de fin × categoría × golpe (solo las
+    combinaciones que aparecen). Es la única agregación sobre eventos: el resto
+    de tablas son sumas de esto.
+
+    `lado`: None, un valor fijo para todas las filas o uno por fila (p. ej.
+    lado_eventos(df)); por fila, es una clave más del groupby y los dos lados
+    salen de una sola pasada (celdas y agregación) sobre el partido entero.
+    """
+    rejilla = rejilla or rejilla_recomendador()
+    sin_golpe = pd.Series(pd.NA, index=df.index, dtype="string")
+    claves = pd.DataFrame({
+        "jugador": df[ctx.col_jugador].astype("string"),
+        "celda_fin": celdas_fin(df, ctx, rejilla),
+        "categoria": df["categoria"].astype("string"),
+        "golpe_q": df["golpe_q"].astype("string") if "golpe_q" in df.columns else sin_golpe,
+    })
+    por_fila = lado is not None and not isinstance(lado, str)
+    if por_fila:
+        claves.insert(0, "lado", np.asarray(lado))
+    conteos = claves.groupby(list(claves.columns), dropna=False, sort=True).size().reset_index(name="n")
+    conteos.insert(conteos.columns.get_loc("jugador") + 1, "jugador_norm", normalizar_nombres(conteos["jugador"]))
+    conteos.insert(conteos.columns.get_loc("jugador_norm") + 1, "rejilla", rejilla.clave)
+    if lado is not None and not por_fila:
+        conteos.insert(0, "lado", lado)
+    return conteos
 
 
 # ======================================================
 # STATS DEL RIVAL
 # ======================================================
 
-def stats_rival(df_rivales):
+def stats_rival(df_rivales, ctx=CONTEXTO_POR_DEFECTO):
     """
     Estadísticas resumen de los rivales:
     - errores por jugador
@@ -104,24 +210,25 @@ def stats_rival(df_rivales):
     - distribución por categoría
     - errores por zona_profundidad
     """
+    return stats_rival_conteos(conteos_eventos(df_rivales, ctx))
+
+def stats_rival_conteos(conteos):
+    """stats_rival a partir de conteos (de un partido o de todo el historial)."""
     stats = {}
 
     # Errores y winners por jugador
-    errores = df_rivales[df_rivales["categoria"] == "error no forzado"] \
-                    .groupby(COL_JUGADOR).size().sort_values(ascending=False)
-    winners = df_rivales[df_rivales["categoria"] == "winner"] \
-                    .groupby(COL_JUGADOR).size().sort_values(ascending=False)
-    categoria_global = df_rivales["categoria"].value_counts(normalize=True) * 100
-
-    stats["errores_por_jugador"] = errores
-    stats["winners_por_jugador"] = winners
+    errores = conteos[conteos["categoria"] == "error no forzado"]
+    winners = conteos[conteos["categoria"] == "winner"]
+    categoria_global = conteos.groupby("categoria")["n"].sum()
+    categoria_global = (categoria_global / categoria_global.sum() * 100).sort_values(ascending=False)
+
+    stats["errores_por_jugador"] = errores.groupby("jugador")["n"].sum().sort_values(ascending=False)
+    stats["winners_por_jugador"] = winners.groupby("jugador")["n"].sum().sort_values(ascending=False)
     stats["distribucion_categorias_%"] = categoria_global.round(2)
 
     # Errores por zona de profundidad (dónde fallan más)
-    df_z = agregar_zona_profundidad(df_rivales)
-    errores_zona = df_z[df_z["categoria"] == "error no forzado"] \
-                        .groupby("zona_profundidad").size().sort_values(ascending=False)
-    stats["errores_por_zona_profundidad"] = errores_zona
+    stats["errores_por_zona_profundidad"] = \
+        errores.groupby(zonas_conteos(errores, "profundidad"))["n"].sum().sort_values(ascending=False)
 
     return stats
 
@@ -130,22 +237,41 @@ def stats_rival(df_rivales):
 # MATCHUP POR ZONA (IZQ / DER) Y PROFUNDIDAD
 # ======================================================
 
-def matchup_por_zona_lateral(df_nuestros):
+def matchup_por_zona_lateral(df_nuestros, ctx=CONTEXTO_POR_DEFECTO):
+    """
+    Calcula winrate por zona objetivo (Izquierda/Derecha) según la celda de fin.
+    """
+    return matchup_lateral_conteos(conteos_eventos(df_nuestros, ctx))
+
+def matchup_lateral_conteos(conteos, intervalos=None):
     """
-    Calcula winrate por zona objetivo (Izquierda/Derecha) según 'zona_rival'.
+    Conteos por zona lateral, winrate_aprox y su intervalo (winrate_aprox_inf/_sup).
+    `intervalos`: parámetros de intervalos_tasas (None = config).
     """
-    df_z = agregar_zona_rival(df_nuestros)
-    tabla = df_z.groupby(["zona_rival", "categoria"]).size().unstack(fill_value=0)
+    tabla = conteos.groupby([zonas_conteos(conteos, "lateral"), "categoria"])["n"].sum().unstack(fill_value=0)
+    cotas = intervalos_tasas(tabla, {"winrate_aprox": (["winner"], [])},
+                             **(intervalos or intervalos_configurados()))
     tabla["total_eventos"] = tabla.sum(axis=1)
     tabla["winrate_aprox"] = tabla.get("winner", 0) / tabla["total_eventos"].replace(0, np.nan)
-    return tabla
+    return tabla.join(cotas)
 
-def matchup_por_profundidad(df_nuestros):
+def matchup_por_profundidad(df_nuestros, ctx=CONTEXTO_POR_DEFECTO):
     """
     Calcula efectividad por zona de profundidad basándose en porcentaje de winners y ENF.
     """
-    df_z = agregar_zona_profundidad(df_nuestros)
-    tabla = df_z.groupby(["zona_profundidad", "categoria"]).size().unstack(fill_value=0)
+    return matchup_profundidad_conteos(conteos_eventos(df_nuestros, ctx))
+
+def matchup_profundidad_conteos(conteos, intervalos=None):
+    """
+    Conteos por profundidad, pct_winner / pct_enf / impacto_neto y sus intervalos
+    (<tasa>_inf / <tasa>_sup), todos sobre las mismas remuestras.
+    """
+    tabla = conteos.groupby([zonas_conteos(conteos, "profundidad"), "categoria"])["n"].sum().unstack(fill_value=0)
+    cotas = intervalos_tasas(tabla, {
+        "pct_winner": (["winner"], []),
+        "pct_enf": (["error no forzado"], []),
+        "impacto_neto": (["winner"], ["error no forzado"]),
+    }, **(intervalos or intervalos_configurados()))
     tabla["total_eventos"] = tabla.sum(axis=1)
 
     winners = tabla.get("winner", 0)
@@ -153,230 +279,347 @@ def matchup_por_profundidad(df_nuestros):
 
     tabla["pct_winner"] = winners / tabla["total_eventos"].replace(0, np.nan)
     tabla["pct_enf"]    = enf     / tabla["total_eventos"].replace(0, np.nan)
+    tabla["impacto_neto"] = tabla["pct_winner"] - tabla["pct_enf"]
 
-    return tabla
+    return tabla.join(cotas)
 
 
 # ======================================================
 # GOLPES PROPIOS: MEJORES Y PEORES
 # ======================================================
 
-def top_golpes_efectivos(df_nuestros, top_n=3):
-    """
-    Devuelve los golpes propios que más se asocian a winners.
-    Requiere columna 'golpe_q'.
-    """
-    if "golpe_q" not in df_nuestros.columns:
-        return None
-    
-    winners = df_nuestros[df_nuestros["categoria"] == "winner"]
-    if winners.empty:
+def top_golpes_conteos(conteos, categoria, top_n=3):
+    """Golpes con más eventos de `categoria` (mínimo MIN_EVENTOS_GOLPE)."""
+    eventos = conteos[conteos["categoria"] == categoria]
+    if eventos.empty:
         return None
 
-    conteo = winners.groupby("golpe_q").size()
+    conteo = eventos.groupby("golpe_q")["n"].sum()
     conteo = conteo[conteo >= MIN_EVENTOS_GOLPE]  # filtramos golpes con pocos eventos
     if conteo.empty:
         return None
 
     return conteo.sort_values(ascending=False).head(top_n)
 
+def top_golpes_efectivos(df_nuestros, top_n=3):
+    """
+    Devuelve los golpes propios que más se asocian a winners.
+    Requiere columna 'golpe_q'.
+    """
+    if "golpe_q" not in df_nuestros.columns:
+        return None
+    return top_golpes_conteos(conteos_eventos(df_nuestros), "winner", top_n)
+
 def top_golpes_problematicos(df_nuestros, top_n=3):
     """
     Golpes propios que más errores no forzados generan.
     """
     if "golpe_q" not in df_nuestros.columns:
         return None
-    
-    enf = df_nuestros[df_nuestros["categoria"] == "error no forzado"]
-    if enf.empty:
-        return None
+    return top_golpes_conteos(conteos_eventos(df_nuestros), "error no forzado", top_n)
 
-    conteo = enf.groupby("golpe_q").size()
-    conteo = conteo[conteo >= MIN_EVENTOS_GOLPE]
-    if conteo.empty:
-        return None
 
-    return conteo.sort_values(ascending=False).head(top_n)
+# ======================================================
+# SECUENCIAS: QUÉ RESPONDER A CADA GOLPE RIVAL
+# ======================================================
+#
+# El modelo de secuencias (secuencias_*.parquet, artefacto "secuencias" de
+# pipeline_golpes) necesita los puntos completos, que eventos_completos no trae.
+
+def nombres_en_modelo(modelo, jugadores):
+    """Nombres tal cual aparecen en los estados del modelo de los `jugadores` (comparados normalizados)."""
+    claves = {normalizar_nombre(j) for j in jugadores}
+    nombres = modelo.estados["jugador"].dropna().unique()
+    return [n for n in nombres if normalizar_nombre(n) in claves]
+
+def respuestas_tras_golpe(modelo, nuestros, rivales, golpe_rival, por=("golpe", "zona")):
+    """Nuestras respuestas al `golpe_rival`, ordenadas por la cota inferior de p_gana."""
+    tabla = modelo.tras(por=por, responden={"jugador": nombres_en_modelo(modelo, nuestros)},
+                        golpe=golpe_rival, jugador=nombres_en_modelo(modelo, rivales))
+    return tabla[tabla["conocidos"] >= MIN_EVENTOS_GOLPE]
+
+def texto_secuencias(modelo, nuestros, rivales, top_n=3):
+    """
+    Líneas de texto para los `top_n` golpes rivales más frecuentes. Los jugadores
+    se buscan por nombre normalizado (mayúsculas y acentos no importan).
+    """
+    de_rivales = modelo.estados["jugador"].isin(nombres_en_modelo(modelo, rivales))
+    golpes_rival = (modelo.estados[de_rivales]
+                    .groupby("golpe")["n"].sum().sort_values(ascending=False).head(top_n))
+    lineas = []
+    for golpe in golpes_rival.index:
+        resp = respuestas_tras_golpe(modelo, nuestros, rivales, golpe).dropna(subset=["p_gana_inf"])
+        if resp.empty:
+            continue
+        (golpe_nuestro, zona), fila = resp.index[0], resp.iloc[0]
+        lineas.append(f"Tras {golpe} rival: vuestra respuesta más rentable es {golpe_nuestro} hacia {zona} "
+                      f"(ganáis el {fila['p_gana'] * 100:.0f}% de {int(fila['conocidos'])} puntos, "
+                      f"entre {fila['p_gana_inf'] * 100:.0f}% y {fila['p_gana_sup'] * 100:.0f}%).")
+    if lineas:
+        lineas.append("Recomendación: preparar esas respuestas para los golpes que más repite el rival.\n")
+    return lineas
 
 
 # ======================================================
-# GENERADOR DE RECOMENDACIONES (TEXTO)
+# RIVALES NUEVOS: JUGADORES DE PERFIL PARECIDO
+# ======================================================
+#
+# Sin partidos contra un rival, las tácticas se aprenden de los partidos
+# contra los jugadores más parecidos a él (índice de perfiles) a los que sí
+# nos hemos enfrentado.
+
+def rivales_similares(indice, conteos, de_nuestros, rivales, k=N_SIMILARES):
+    """Los k jugadores más parecidos a `rivales` entre los que han jugado contra nosotros."""
+    vector = indice.vector(rivales)
+    if vector is None:
+        return None
+    nuestros_partidos = conteos.loc[de_nuestros, "partido"].unique()
+    en_nuestros = conteos["partido"].isin(nuestros_partidos) & ~de_nuestros
+    candidatos = conteos.loc[en_nuestros, "jugador_norm"].unique()
+    return indice.vecinos_de_vector(vector, k, candidatos=candidatos, excluir=rivales)
+
+
+# ======================================================
+# SIMULACIÓN: QUÉ ESTADÍSTICA MUEVE MÁS EL PARTIDO
 # ======================================================
+#
+# simulacion_sensibilidad.xlsx (artefacto "simulacion" de pipeline_golpes):
+# Δ P(ganar el partido) al mejorar 2 puntos cada P(punto) al saque o al resto.
+
+SITUACIONES_TEXTO = {
+    "normal": "los puntos normales",
+    "break": "las bolas de break",
+    "oro": "los puntos de oro",
+    "tiebreak": "los tie-breaks",
+}
+
+def prioridades_simulacion(out_dir, nuestros):
+    """Filas de la sensibilidad de nuestra pareja (la que contiene a alguno de `nuestros`)."""
+    ruta = os.path.join(out_dir, "simulacion_sensibilidad.xlsx")
+    if not os.path.exists(ruta):
+        print(f"⚠️ No hay {ruta}")
+        return None
+    sens = pd.read_excel(ruta)
+    nuestros = {normalizar_nombre(n) for n in nuestros}
+    es_nuestra = sens["pareja"].astype(str).map(
+        lambda pareja: any(normalizar_nombre(j) in nuestros for j in pareja.split("-")))
+    return sens[es_nuestra].sort_values("delta_p_gana", ascending=False)
+
+def texto_simulacion(prioridades, top_n=2):
+    """Líneas de texto con las `top_n` mejoras que más suben P(ganar)."""
+    if prioridades is None or prioridades.empty:
+        return []
+    base = prioridades["p_gana_base"].iloc[0]
+    lineas = [f"Partido simulado con vuestras estadísticas de saque: ganáis el {base * 100:.0f}% de las veces."]
+    for i, fila in enumerate(prioridades[prioridades["delta_p_gana"] > 0].head(top_n).itertuples(), start=1):
+        que = "vuestro saque" if fila.aspecto == "saque" else "vuestro resto"
+        lineas.append(f"Prioridad {i}: {que} en {SITUACIONES_TEXTO.get(fila.situacion, fila.situacion)} "
+                      f"(+{fila.delta_p_gana * 100:.1f} puntos de probabilidad de ganar el partido).")
+    return lineas
 
-def generar_recomendacion_texto(stats_r,
-                                matchup_lateral,
-                                matchup_profundidad,
-                                top_golpes_eff,
-                                top_golpes_bad):
 
-    lineas = []
+# ======================================================
+# GENERADOR DE RECOMENDACIONES (TEXTO)
+# ======================================================
 
-    # ============================================
-    # 1) Rival más débil (jugador con más ENF)
-    # ============================================
+def _intervalo_texto(tabla, fila, tasa):
+    """' (entre a% y b%)' si la tabla trae el intervalo de `tasa`."""
+    if f"{tasa}_inf" not in tabla.columns:
+        return ""
+    inf, sup = tabla.loc[fila, f"{tasa}_inf"] * 100, tabla.loc[fila, f"{tasa}_sup"] * 100
+    return f" (entre {inf:.1f}% y {sup:.1f}%)"
+
+def features_recomendacion(stats_r,
+                           matchup_lateral,
+                           matchup_profundidad,
+                           top_golpes_eff,
+                           top_golpes_bad):
+    """
+    Una fila de features para las reglas tácticas (config/reglas_tacticas.toml):
+    lo que falte (sin datos o por debajo de los mínimos) queda a None.
+    """
+    f = dict.fromkeys([
+        "jugador_debil", "enf_jugador_debil",
+        "zona_lateral", "wr_lateral", "wr_lateral_intervalo",
+        "zona_prof_mejor", "impacto_mejor", "impacto_mejor_intervalo",
+        "zona_prof_peor", "impacto_peor", "impacto_peor_intervalo",
+        "golpe_top_winner", "golpe_top_enf",
+        "pct_enf", "pct_winner", "pct_bola",
+        "zona_debil_rival", "enf_zona_debil",
+    ])
+
+    # Rival más débil (jugador con más ENF)
     errores = stats_r.get("errores_por_jugador", pd.Series(dtype=int))
     if not errores.empty:
-        jugador_debil = errores.index[0]
-        n_errores = int(errores.iloc[0])
-        lineas.append(f"Objetivo táctico: el jugador rival que más errores no forzados comete es {jugador_debil} ({n_errores} ENF).")
-        lineas.append(f"Recomendación: cargar más el juego sobre {jugador_debil}, especialmente en peloteos largos para forzar fallo.\n")
-
-    # ============================================
-    # 2) Zonas LATERALES (Izquierda / Derecha)
-    # ============================================
-    if matchup_lateral is not None and not matchup_lateral.empty:
-        ml = matchup_lateral.copy()
-        ml = ml[ml["total_eventos"] >= MIN_EVENTOS_ZONA]
+        f["jugador_debil"], f["enf_jugador_debil"] = str(errores.index[0]), int(errores.iloc[0])
 
+    # Zonas LATERALES (Izquierda / Derecha)
+    if matchup_lateral is not None and not matchup_lateral.empty:
+        ml = matchup_lateral[(matchup_lateral["total_eventos"] >= MIN_EVENTOS_ZONA)
+                             & (matchup_lateral.index != SIN_ZONA)]
         if "winrate_aprox" in ml.columns and not ml.empty:
-            mejor_zona = ml["winrate_aprox"].idxmax()
-            mejor_wr = ml["winrate_aprox"].max() * 100
-
-            lineas.append(f"Zona lateral más rentable: al jugar hacia la zona {mejor_zona}, vuestro porcentaje de intercambios favorables ronda el {mejor_wr:.1f}%.")
-            lineas.append(f"Recomendación: priorizar esa orientación del golpe, sobre todo para iniciar ataques.\n")
+            # orden por la cota inferior: una zona con pocos eventos no gana por azar
+            orden = "winrate_aprox_inf" if "winrate_aprox_inf" in ml.columns else "winrate_aprox"
+            zona = ml[orden].idxmax()
+            f["zona_lateral"], f["wr_lateral"] = str(zona), float(ml.loc[zona, "winrate_aprox"] * 100)
+            f["wr_lateral_intervalo"] = _intervalo_texto(ml, zona, "winrate_aprox")
 
-    # ============================================
-    # 3) PROFUNDIDAD (Fondo / Media / Red)
-    # Usamos IMPACTO NETO = pct_winner - pct_enf
-    # ============================================
+    # PROFUNDIDAD (Fondo / Media / Red): IMPACTO NETO = pct_winner - pct_enf
     if matchup_profundidad is not None and not matchup_profundidad.empty:
-
-        mp = matchup_profundidad.copy()
-        mp = mp[mp["total_eventos"] >= MIN_EVENTOS_ZONA]
-        mp = mp[mp.index != "Desconocida"]
-
+        mp = matchup_profundidad[(matchup_profundidad["total_eventos"] >= MIN_EVENTOS_ZONA)
+                                 & (matchup_profundidad.index != SIN_ZONA)].copy()
         if not mp.empty:
-            mp["impacto_neto"] = mp["pct_winner"] - mp["pct_enf"]
-
-            zona_mejor = mp["impacto_neto"].idxmax()
-            impacto_mejor = mp["impacto_neto"].max() * 100
-
-            zona_peor = mp["impacto_neto"].idxmin()
-            impacto_peor = mp["impacto_neto"].min() * 100
-
-            lineas.append(f"Zona de profundidad más productiva: {zona_mejor}, donde vuestro impacto neto en el punto es aproximadamente del {impacto_mejor:.1f}%.")
-            lineas.append(f"Recomendación: buscar más golpes hacia {zona_mejor}, donde conseguís ventaja.\n")
-
-            if zona_peor != zona_mejor and impacto_peor < 0:
-                lineas.append(f"Zona más peligrosa: {zona_peor}, donde acumuláis más pérdidas de iniciativa (impacto negativo de {impacto_peor:.1f}%).")
-                lineas.append(f"Recomendación: evitar arriesgar desde {zona_peor}, salvo que estéis muy cómodos.\n")
-
-    # ============================================
-    # 4) Golpes propios más fuertes (winners)
-    # ============================================
-    if top_golpes_eff is not None and len(top_golpes_eff) > 0:
-        lineas.append("Golpes propios que más puntos directos generan:")
-        for golpe, n in top_golpes_eff.items():
-            lineas.append(f" - {golpe}: {n} puntos ganados directamente.")
-
-        golpe_top = top_golpes_eff.index[0]
-        lineas.append(f"Recomendación: buscar situaciones que favorezcan usar {golpe_top} cuando tenéis iniciativa.\n")
-
-    # ============================================
-    # 5) Golpes propios más problemáticos (errores)
-    # ============================================
-    if top_golpes_bad is not None and len(top_golpes_bad) > 0:
-        lineas.append("Golpes que más errores no forzados generan:")
-        for golpe, n in top_golpes_bad.items():
-            lineas.append(f" - {golpe}: {n} errores no forzados.")
-
-        golpe_malo = top_golpes_bad.index[0]
-        lineas.append(f"Recomendación: reducir el riesgo o entrenar específicamente el golpe {golpe_malo} para mejorar la consistencia.\n")
-
-    # ============================================
-    # 6) Perfil del rival (clasificación automática)
-    # ============================================
+            if "impacto_neto" not in mp.columns:
+                mp["impacto_neto"] = mp["pct_winner"] - mp["pct_enf"]
+            # mejor = mayor cota inferior; peor = menor cota superior
+            con_cotas = "impacto_neto_inf" in mp.columns
+            mejor = mp["impacto_neto_inf" if con_cotas else "impacto_neto"].idxmax()
+            peor = mp["impacto_neto_sup" if con_cotas else "impacto_neto"].idxmin()
+            f.update({
+                "zona_prof_mejor": str(mejor), "impacto_mejor": float(mp.loc[mejor, "impacto_neto"] * 100),
+                "impacto_mejor_intervalo": _intervalo_texto(mp, mejor, "impacto_neto"),
+                "zona_prof_peor": str(peor), "impacto_peor": float(mp.loc[peor, "impacto_neto"] * 100),
+                "impacto_peor_intervalo": _intervalo_texto(mp, peor, "impacto_neto"),
+            })
+
+    # Golpes propios más fuertes (winners) y más problemáticos (ENF)
+    for nombre, top in (("winner", top_golpes_eff), ("enf", top_golpes_bad)):
+        pares = [] if top is None else [(str(g), int(n)) for g, n in top.items()]
+        f[f"top_{nombre}"] = pares
+        if pares:
+            f[f"golpe_top_{nombre}"] = pares[0][0]
+
+    # Perfil del rival (% de cada categoría)
     dist = stats_r.get("distribucion_categorias_%", pd.Series(dtype=float))
-
     if not dist.empty:
-        pct_enf = dist.get("error no forzado", 0)
-        pct_winner = dist.get("winner", 0)
-        pct_bola = dist.get("bola dentro", 0)
-
-        if pct_enf <= 5 and pct_bola >= 70:
-            estilo = "muy sólido y conservador"
-            recomendacion_estilo = "variar alturas, abrir ángulos y cambiar ritmos para obligarles a jugar incómodos."
-        elif pct_enf >= 12:
-            estilo = "fallón"
-            recomendacion_estilo = "mantener la bola en juego sin precipitarse para que acumulen errores."
-        elif pct_winner >= 20 and 5 < pct_enf < 12:
-            estilo = "ofensivo con riesgo"
-            recomendacion_estilo = "jugar bolas bajas y profundas, además de evitar dejar pelotas altas que favorezcan su ataque."
-        else:
-            estilo = "equilibrado"
-            recomendacion_estilo = "alternar fases de control y de agresividad según el momento del partido."
-
-        lineas.append(f"Perfil del rival: {estilo} (bolas dentro {pct_bola:.1f}%, winners {pct_winner:.1f}%, ENF {pct_enf:.1f}%).")
-        lineas.append(f"Recomendación: {recomendacion_estilo}\n")
-
-    # ============================================
-    # 7) Debilidad espacial del rival (zona donde más falla)
-    # ============================================
-    errores_zona = stats_r.get("errores_por_zona_profundidad", pd.Series(dtype=int))
+        f["pct_enf"] = float(dist.get("error no forzado", 0))
+        f["pct_winner"] = float(dist.get("winner", 0))
+        f["pct_bola"] = float(dist.get("bola dentro", 0))
 
+    # Debilidad espacial del rival (zona donde más falla)
+    errores_zona = stats_r.get("errores_por_zona_profundidad", pd.Series(dtype=int))
+    errores_zona = errores_zona[(errores_zona.index != SIN_ZONA) & (errores_zona >= MIN_EVENTOS_ZONA)]
     if not errores_zona.empty:
-        errores_zona = errores_zona[errores_zona.index != "Desconocida"]
-        errores_zona = errores_zona[errores_zona >= MIN_EVENTOS_ZONA]
+        f["zona_debil_rival"], f["enf_zona_debil"] = str(errores_zona.idxmax()), int(errores_zona.max())
 
-        if not errores_zona.empty:
-            zona_debil = errores_zona.idxmax()
-            cant = errores_zona.max()
+    return f
 
-            lineas.append(f"Debilidad espacial del rival: fallan más desde {zona_debil} ({cant} ENF).")
-            lineas.append(f"Recomendación: forzar que jueguen más desde {zona_debil} mediante bolas profundas o variaciones de altura.\n")
 
-    # ============================================
-    # Si no hay recomendaciones útiles
-    # ============================================
-    if not lineas:
-        lineas.append("No se han podido generar recomendaciones tácticas con los datos disponibles.")
+SIN_RECOMENDACIONES = "No se han podido generar recomendaciones tácticas con los datos disponibles."
 
-    return "\n".join(lineas)
+def textos_recomendacion(features, reglas=None):
+    """Texto de cada fila de features con las reglas tácticas (None = config/reglas_tacticas.toml)."""
+    textos = textos_reglas(pd.DataFrame(list(features)), reglas if reglas is not None else cargar_reglas())
+    return [t + "\n" if t else SIN_RECOMENDACIONES for t in textos]
+
+def generar_recomendacion_texto(stats_r,
+                                matchup_lateral,
+                                matchup_profundidad,
+                                top_golpes_eff,
+                                top_golpes_bad,
+                                reglas=None):
+    features = features_recomendacion(stats_r, matchup_lateral, matchup_profundidad, top_golpes_eff, top_golpes_bad)
+    return textos_recomendacion([features], reglas)[0]
 
 
 
 
 # ======================================================
-# PIPELINE PRINCIPAL
+# ALMACÉN DE FEATURES (incremental, partido a partido)
 # ======================================================
 
-def recomendar_estrategia(out_dir):
+def nombre_partido(out_dir):
+    """
+    Clave del almacén para un out_dir de pipeline_juegos (<base>/<partido>/<marcador>):
+    "<partido>/<marcador>", porque cada corte del partido guarda eventos distintos.
+    """
+    marcador_dir = os.path.normpath(out_dir)
+    partido_dir = os.path.dirname(marcador_dir)
+    return f"{os.path.basename(partido_dir)}/{os.path.basename(marcador_dir)}"
+
+def version_eventos(out_dir):
+    """mtime de los eventos de `out_dir` (0.0 si no hay ninguno)."""
+    eventos = [os.path.join(out_dir, f"eventos_completos.{ext}") for ext in ("arrow", "parquet", "csv")]
+    return max((os.path.getmtime(e) for e in eventos if os.path.exists(e)), default=0.0)
+
+def registrar_partido(almacen, out_dir, partido=None, ctx=CONTEXTO_POR_DEFECTO):
+    """Agrega los eventos de un partido a conteos y los guarda en el almacén."""
+    partido = partido or nombre_partido(out_dir)
+    version = version_eventos(out_dir)   # antes de leer: si cambian mientras tanto, se registrará otra vez
     df = cargar_eventos(out_dir)
+    # celdas y conteos de los dos lados en una sola pasada sobre el partido (sin copias por lado)
+    conteos = conteos_eventos(df, ctx, lado=lado_eventos(df, ctx=ctx))
+    almacen.actualizar(partido, conteos, version).guardar()
+    print(f"🗄️ Partido '{partido}' registrado en el almacén ({len(almacen.partidos())} partidos)")
+    return partido
+
+def pendiente_de_registro(out_dir, almacen, partido=None):
+    """True si el corte de `out_dir` no está en el almacén o sus eventos cambiaron desde que se registró."""
+    partido = partido or nombre_partido(out_dir)
+    return partido not in almacen.partidos() or almacen.version(partido) != version_eventos(out_dir)
+
+def recomendaciones_desde_almacen(almacen, nuestros_conteos, rivales_conteos):
+    """Texto de recomendaciones a partir de conteos (sin eventos crudos)."""
+    return generar_recomendacion_texto(
+        stats_r=stats_rival_conteos(rivales_conteos),
+        matchup_lateral=matchup_lateral_conteos(nuestros_conteos),
+        matchup_profundidad=matchup_profundidad_conteos(nuestros_conteos),
+        top_golpes_eff=top_golpes_conteos(nuestros_conteos, "winner", top_n=3),
+        top_golpes_bad=top_golpes_conteos(nuestros_conteos, "error no forzado", top_n=3),
+    )
+
+def recomendar_contra(rivales, ruta_almacen=RUTA_ALMACEN):
+    """
+    Recomendaciones contra `rivales` con TODO su historial: sus golpes en
+    cualquier partido registrado y los nuestros en los partidos contra ellos.
+    """
+    almacen = AlmacenFeatures.cargar(ruta_almacen)
+    rivales_norm = [normalizar_nombre(r) for r in rivales]
+    rivales_conteos = almacen.consultar(lado="rival", jugadores=rivales_norm, completos=True)
+    nuestros_conteos = almacen.consultar(lado="nuestro", partidos=almacen.partidos_contra(rivales_norm))
+    if rivales_conteos.empty or nuestros_conteos.empty:
+        print(f"⚠️ No hay partidos registrados contra {', '.join(rivales)}.")
+        return None
+    return recomendaciones_desde_almacen(almacen, nuestros_conteos, rivales_conteos)
+
+
+# ======================================================
+# PIPELINE PRINCIPAL
+# ======================================================
+
+def recomendar_estrategia(out_dir, ctx=CONTEXTO_POR_DEFECTO, historial=False, ruta_almacen=RUTA_ALMACEN):
+    """
+    Recomendaciones del partido de `out_dir`. El partido se agrega al almacén
+    la primera vez (o si sus eventos han cambiado); después todo sale de los
+    conteos guardados. Con historial=True se usan todos los partidos
+    registrados contra los rivales de este partido.
+    """
+    almacen = AlmacenFeatures.cargar(ruta_almacen)
+    partido = nombre_partido(out_dir)
+    if pendiente_de_registro(out_dir, almacen, partido):
+        registrar_partido(almacen, out_dir, partido, ctx)
 
+    del_partido = almacen.consultar(partidos=[partido])
     print("=== Jugadores detectados en el dataset ===")
-    print(df[COL_JUGADOR].unique())
+    print(del_partido["jugador"].dropna().unique().tolist())
     print("=========================================\n")
 
     # Separar nuestros golpes vs rivales
-    df_nuestros, df_rivales = separar_nuestros_y_rivales(df)
+    nuestros_conteos = del_partido[del_partido["lado"] == "nuestro"]
+    rivales_conteos = del_partido[del_partido["lado"] == "rival"]
 
-    if df_nuestros.empty or df_rivales.empty:
+    if nuestros_conteos.empty or rivales_conteos.empty:
         print("⚠️ No se han podido separar correctamente nuestros jugadores y rivales. Revisa NUESTROS_JUGADORES.")
         return
 
-    # Aplicar zonas
-    df_nuestros_z = aplicar_zonas(df_nuestros)
-    df_rivales_z  = aplicar_zonas(df_rivales)
-
-    # Stats rival
-    stats_r = stats_rival(df_rivales_z)
-
-    # Matchups espaciales
-    matchup_lateral      = matchup_por_zona_lateral(df_nuestros_z)
-    matchup_profundidad  = matchup_por_profundidad(df_nuestros_z)
-
-    # Golpes efectivos y problemáticos
-    top_eff = top_golpes_efectivos(df_nuestros_z, top_n=3)
-    top_bad = top_golpes_problematicos(df_nuestros_z, top_n=3)
+    if historial:
+        rivales_norm = rivales_conteos["jugador_norm"].unique().tolist()
+        rivales_conteos = almacen.consultar(lado="rival", jugadores=rivales_norm, completos=True)
+        nuestros_conteos = almacen.consultar(lado="nuestro", partidos=almacen.partidos_contra(rivales_norm))
+        print(f"📚 Historial: {nuestros_conteos['partido'].nunique()} partidos contra estos rivales")
 
     # Generar texto de recomendaciones
-    texto = generar_recomendacion_texto(
-        stats_r=stats_r,
-        matchup_lateral=matchup_lateral,
-        matchup_profundidad=matchup_profundidad,
-        top_golpes_eff=top_eff,
-        top_golpes_bad=top_bad
-    )
+    texto = recomendaciones_desde_almacen(almacen, nuestros_conteos, rivales_conteos)
 
     # Guardar recomendaciones
     rec_path = os.path.join(out_dir, "recomendaciones_nivel2.txt")
@@ -388,6 +631,210 @@ def recomendar_estrategia(out_dir):
     print(texto)
 
 
-if __name__ == "__main__":
+# ======================================================
+# LOTE: UN INFORME POR EMPAREJAMIENTO (CUADRO DE TORNEO)
+# ======================================================
+#
+# Cada trabajo es un dict:
+#   {"nombre": "cuartos_vs_galan_chingotto",
+#    "nuestros": ["Jorge Nieto", "Miguel Yanguas"],
+#    "rivales": ["Galán", "Chingotto"],
+#    "partidos": ["final_master"],           # opcional: "<partido>" (corte más largo) o "<partido>/<marcador>"
+#    "secuencias": "outputs/golpes/final",   # opcional: modelo de secuencias de pipeline_golpes
+#    "simulacion": "outputs/golpes/final",   # opcional: sensibilidad del simulador de partidos
+#    "perfiles": "data/processed/perfiles_jugadores.parquet"}   # opcional: rivales sin partidos
+#
+# Sin "partidos": los rivales con todo su historial (el corte más largo de cada
+# partido) y nosotros en los partidos contra ellos (si no hay ninguno: contra los rivales de perfil más parecido
+# con "perfiles", o en todos los nuestros). Los jugadores se buscan por nombre
+# normalizado, así que no depende de NUESTROS_JUGADORES.
+
+_CONTEOS_LOTE = None   # conteos del almacén, cargados una vez por proceso
+_INDICES_LOTE = {}     # ruta → IndicePerfiles, cargados una vez por proceso
+
+def _inicializar_lote(conteos, indices=None):
+    global _CONTEOS_LOTE, _INDICES_LOTE
+    _CONTEOS_LOTE = conteos
+    _INDICES_LOTE = indices or {}
+
+def cargar_indices(trabajos):
+    """Índices de perfiles de los trabajos, uno por ruta distinta."""
+    rutas = sorted({t["perfiles"] for t in trabajos if t.get("perfiles")})
+    return {ruta: IndicePerfiles.cargar(ruta) for ruta in rutas}
+
+def _serie_a_dict(serie):
+    return {} if serie is None else {str(k): v.item() if hasattr(v, "item") else v for k, v in serie.items()}
+
+def _tabla_a_dict(tabla):
+    return {str(i): {str(c): (None if pd.isna(v) else float(v)) for c, v in fila.items()}
+            for i, fila in tabla.iterrows()}
+
+def componer_texto(resultado, texto_reglas):
+    """Texto final: aviso de rivales parecidos + reglas tácticas + secuencias y simulación."""
+    texto = texto_reglas
+    if resultado.get("rivales_similares"):
+        texto = (f"Sin partidos contra {', '.join(resultado['rivales'])}: tácticas aprendidas "
+                 f"contra jugadores de perfil parecido ({', '.join(resultado['rivales_similares'])}).\n\n" + texto)
+    for extra in ("secuencias", "simulacion"):
+        if resultado.get(extra):
+            texto += "\n" + "\n".join(resultado[extra])
+    return texto
+
+def recomendar_trabajo(trabajo, conteos=None, reglas=None, con_texto=True, indices=None):
+    """
+    Recomendación de un emparejamiento a partir de los conteos del almacén.
+    con_texto=False deja solo las features (el lote evalúa las reglas de todos a la vez).
+    `indices` (ruta → IndicePerfiles) evita releer el índice de "perfiles" en cada trabajo.
+    """
+    conteos = _CONTEOS_LOTE if conteos is None else conteos
+    indices = _INDICES_LOTE if indices is None else indices
+    if "corte_completo" not in conteos.columns:
+        conteos = marcar_cortes(conteos)
+    nuestros = [normalizar_nombre(n) for n in trabajo["nuestros"]]
+    rivales = [normalizar_nombre(n) for n in trabajo["rivales"]]
+    partidos = trabajo.get("partidos")
+    similares = None
+
+    de_nuestros = conteos["jugador_norm"].isin(nuestros)
+    de_rivales = conteos["jugador_norm"].isin(rivales)
+    if partidos:
+        # "<partido>/<marcador>" = ese corte; "<partido>" = su corte más largo
+        en_partidos = conteos["partido"].isin(partidos) | (conteos["partido_base"].isin(partidos)
+                                                           & conteos["corte_completo"])
+        de_nuestros, de_rivales = de_nuestros & en_partidos, de_rivales & en_partidos
+    else:
+        completos = conteos["corte_completo"]
+        de_nuestros, de_rivales = de_nuestros & completos, de_rivales & completos
+        cara_a_cara = set(conteos.loc[de_nuestros, "partido"]) & set(conteos.loc[de_rivales, "partido"])
+        if cara_a_cara:
+            de_nuestros &= conteos["partido"].isin(cara_a_cara)
+        elif trabajo.get("perfiles"):
+            # con "perfiles": sin partidos contra ellos, los de rivales de perfil parecido
+            indice = indices.get(trabajo["perfiles"])
+            if indice is None:
+                indice = IndicePerfiles.cargar(trabajo["perfiles"])
+            similares = rivales_similares(indice, conteos, de_nuestros, rivales)
+            if similares is not None and not similares.empty:
+                de_similares = conteos["jugador_norm"].isin(similares["jugador_norm"]) & completos
+                de_nuestros &= conteos["partido"].isin(set(conteos.loc[de_similares, "partido"]))
+                if not de_rivales.any():
+                    de_rivales = de_similares
+                similares = similares["jugador"].tolist()
+
+    nuestros_conteos, rivales_conteos = conteos[de_nuestros], conteos[de_rivales]
+    resultado = {
+        "nombre": trabajo["nombre"],
+        "nuestros": trabajo["nuestros"],
+        "rivales": trabajo["rivales"],
+        "partidos_nuestros": sorted(nuestros_conteos["partido"].unique().tolist()),
+        "partidos_rivales": sorted(rivales_conteos["partido"].unique().tolist()),
+        "eventos_nuestros": int(nuestros_conteos["n"].sum()),
+        "eventos_rivales": int(rivales_conteos["n"].sum()),
+        "rivales_similares": similares or [],
+    }
+    if nuestros_conteos.empty or rivales_conteos.empty:
+        resultado["texto"] = SIN_RECOMENDACIONES
+        return resultado
+
+    stats_r = stats_rival_conteos(rivales_conteos)
+    lateral = matchup_lateral_conteos(nuestros_conteos)
+    profundidad = matchup_profundidad_conteos(nuestros_conteos)
+    top_eff = top_golpes_conteos(nuestros_conteos, "winner", top_n=3)
+    top_bad = top_golpes_conteos(nuestros_conteos, "error no forzado", top_n=3)
+
+    resultado.update({
+        "rival": {k: _serie_a_dict(v) for k, v in stats_r.items()},
+        "matchup_lateral": _tabla_a_dict(lateral),
+        "matchup_profundidad": _tabla_a_dict(profundidad),
+        "top_golpes_efectivos": _serie_a_dict(top_eff),
+        "top_golpes_problematicos": _serie_a_dict(top_bad),
+        "features": features_recomendacion(stats_r, lateral, profundidad, top_eff, top_bad),
+    })
+
+    # con "secuencias": carpeta de pipeline_golpes con el modelo de secuencias de golpes
+    if trabajo.get("secuencias"):
+        modelo = ModeloSecuencias.cargar(trabajo["secuencias"])
+        resultado["secuencias"] = texto_secuencias(modelo, nuestros_conteos["jugador_norm"].unique(),
+                                                   rivales_conteos["jugador_norm"].unique())
+
+    # con "simulacion": carpeta de pipeline_golpes con simulacion_sensibilidad.xlsx
+    if trabajo.get("simulacion"):
+        prioridades = prioridades_simulacion(trabajo["simulacion"], trabajo["nuestros"])
+        resultado["simulacion"] = texto_simulacion(prioridades)
+        resultado["sensibilidad"] = [] if prioridades is None else prioridades.to_dict(orient="records")
+
+    if con_texto:
+        resultado["texto"] = componer_texto(resultado, textos_recomendacion([resultado["features"]], reglas)[0])
+    return resultado
+
+def recomendar_lote(trabajos, salida="outputs/recomendaciones", out_dirs=(), procesos=None,
+                    ruta_almacen=RUTA_ALMACEN, ctx=CONTEXTO_POR_DEFECTO, reglas=None):
+    """
+    Ejecuta todos los trabajos y escribe <salida>/<nombre>/recomendaciones_nivel2.txt
+    + recomendaciones.json. Los partidos de `out_dirs` se registran antes en el
+    almacén (una vez); después el almacén se carga una sola vez y se comparte
+    con el pool (1 proceso = secuencial). Las reglas tácticas se evalúan al
+    final sobre la tabla de features de todos los trabajos, en una pasada.
+    """
+    almacen = AlmacenFeatures.cargar(ruta_almacen)
+    for out_dir in out_dirs:
+        if pendiente_de_registro(out_dir, almacen):
+            registrar_partido(almacen, out_dir, ctx=ctx)
+
+    conteos = marcar_cortes(almacen.conteos)
+    indices = cargar_indices(trabajos)
+    procesos = min(procesos or procesos_configurados(), len(trabajos)) or 1
+    print(f"🧮 {len(trabajos)} emparejamientos · {len(almacen.partidos())} partidos en el almacén · {procesos} procesos")
+    if procesos <= 1:
+        resultados = [recomendar_trabajo(t, conteos, con_texto=False, indices=indices) for t in trabajos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_lote,
+                                 initargs=(conteos, indices)) as pool:
+            resultados = list(pool.map(partial(recomendar_trabajo, con_texto=False), trabajos))
+
+    con_features = [r for r in resultados if "features" in r]
+    textos = textos_recomendacion([r["features"] for r in con_features], reglas)
+    for r, texto in zip(con_features, textos):
+        r["texto"] = componer_texto(r, texto)
+
+    rutas = []
+    for r in resultados:
+        carpeta = os.path.join(salida, nombre_carpeta(r["nombre"]))
+        os.makedirs(carpeta, exist_ok=True)
+        with open(os.path.join(carpeta, "recomendaciones_nivel2.txt"), "w", encoding="utf-8") as f:
+            f.write(r["texto"])
+        with open(os.path.join(carpeta, "recomendaciones.json"), "w", encoding="utf-8") as f:
+            json.dump(r, f, indent=2, ensure_ascii=False)
+        rutas.append(carpeta)
+        print(f"   📁 {r['nombre']}: {r['eventos_rivales']} eventos rivales, {len(r['partidos_rivales'])} partidos")
+
+    print(f"✅ Recomendaciones del lote en: {os.path.abspath(salida)}")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recomendaciones tácticas (nivel 2)")
+    parser.add_argument("--lote", help="JSON con la lista de trabajos {nombre, nuestros, rivales, partidos?}")
+    parser.add_argument("--salida", default="outputs/recomendaciones")
+    parser.add_argument("--partido", action="append", default=[],
+                        help="out_dir de pipeline_juegos a registrar antes (repetible)")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--almacen", default=RUTA_ALMACEN)
+    parser.add_argument("--perfiles", default=None,
+                        help=f"índice de perfiles para rivales sin partidos (p. ej. {RUTA_PERFILES})")
+    args = parser.parse_args()
+
+    if args.lote:
+        with open(args.lote, encoding="utf-8") as f:
+            trabajos = json.load(f)
+        if args.perfiles:
+            trabajos = [{"perfiles": args.perfiles, **t} for t in trabajos]
+        recomendar_lote(trabajos, args.salida, args.partido, args.procesos, args.almacen)
+        return
+
     ruta_out = input("📁 Carpeta de salida del partido (out_dir de pipeline_juegos): ").strip()
-    recomendar_estrategia(ruta_out)
+    recomendar_estrategia(ruta_out, ruta_almacen=args.almacen)
+
+
+if __name__ == "__main__":
+    main()
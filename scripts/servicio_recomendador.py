@@ -0,0 +1,236 @@
+"""
+Servicio local de recomendaciones (HTTP, JSON).
+-----------------------------------------------
+Un proceso de larga vida que carga el almacén de conteos una vez y responde
+consultas jugador/rival desde memoria, sin el arranque en frío de Python ni
+recalcular nada. Las respuestas se guardan en caché por consulta; la caché se
+invalida cuando el almacén o el índice de perfiles cambian en disco, o cuando
+aparece un partido nuevo (eventos_completos.arrow) bajo la carpeta de
+partidos, que se registra solo.
+
+Uso:
+    python scripts/servicio_recomendador.py
+    python scripts/servicio_recomendador.py --puerto 8765 --partidos outputs/figures
+
+Consultas:
+    GET /recomendacion?nuestros=Coello,Tapia&rivales=Galán,Chingotto[&partidos=final][&formato=texto]
+    GET /partidos
+    GET /salud
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Permite importar src/ al ejecutar desde /scripts
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.analysis.almacen_features import AlmacenFeatures, marcar_cortes
+from src.analysis.perfiles_jugadores import IndicePerfiles
+from src.data.load_data import load_config
+from recomendador import (RUTA_ALMACEN, RUTA_PERFILES, pendiente_de_registro, recomendar_trabajo,
+                          registrar_partido)
+
+
+class ServicioRecomendador:
+    """Almacén en memoria + caché de respuestas con invalidación por cambios en disco."""
+
+    def __init__(self, ruta_almacen=RUTA_ALMACEN, base_partidos=None, intervalo=5.0, max_cache=256,
+                 ruta_perfiles=RUTA_PERFILES):
+        self.ruta_almacen = ruta_almacen
+        self.ruta_perfiles = ruta_perfiles
+        self.base_partidos = base_partidos
+        self.intervalo = intervalo
+        self.max_cache = max_cache
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._ultima_revision = 0.0
+        self._fallidos = {}        # eventos_completos.arrow que no se pudieron registrar → su mtime
+        self._cargar()
+        self._cargar_perfiles()
+
+    def _cargar(self):
+        self.almacen = AlmacenFeatures.cargar(self.ruta_almacen)
+        self.conteos = marcar_cortes(self.almacen.conteos)   # una vez por carga, no por consulta
+        self._mtime = self._mtime_almacen()
+        self._cache.clear()
+        print(f"🗄️ Almacén cargado: {len(self.almacen.partidos())} partidos, {len(self.almacen.conteos):,} filas")
+
+    def _cargar_perfiles(self):
+        """Índice de perfiles (None si no hay fichero); invalida la caché de respuestas."""
+        self._mtime_perfiles = self._mtime_indice()
+        self.indice = None
+        if self._mtime_perfiles is not None:
+            self.indice = IndicePerfiles.cargar(self.ruta_perfiles)
+            print(f"🧭 Índice de perfiles cargado: {len(self.indice)} jugadores")
+        self._cache.clear()
+
+    def _mtime_indice(self):
+        if self.ruta_perfiles and os.path.exists(self.ruta_perfiles):
+            return os.path.getmtime(self.ruta_perfiles)
+        return None
+
+    def _mtime_almacen(self):
+        return os.path.getmtime(self.ruta_almacen) if os.path.exists(self.ruta_almacen) else 0.0
+
+    # ------------------------------------------------------
+    # Invalidación
+    # ------------------------------------------------------
+    def partidos_pendientes(self):
+        """
+        out_dirs (<partido>/<marcador>, cada corte con su clave en el almacén) que
+        no están registrados o cuyos eventos cambiaron desde que se registraron.
+        Los que fallaron al registrarse no se reintentan hasta que el fichero cambie.
+        """
+        if not self.base_partidos:
+            return []
+        patron = os.path.join(self.base_partidos, "*", "*", "eventos_completos.arrow")
+        pendientes = []
+        for e in sorted(glob.glob(patron)):
+            out_dir = os.path.dirname(e)
+            if self._fallidos.get(e) != os.path.getmtime(e) and pendiente_de_registro(out_dir, self.almacen):
+                pendientes.append(out_dir)
+        return pendientes
+
+    def refrescar(self, forzar=False):
+        """Como mucho cada `intervalo` s: registra partidos nuevos y recarga si el almacén cambió."""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultima_revision < self.intervalo:
+            return
+        with self._lock:
+            self._ultima_revision = ahora
+            registrados = 0
+            for out_dir in self.partidos_pendientes():
+                eventos = os.path.join(out_dir, "eventos_completos.arrow")
+                try:
+                    registrar_partido(self.almacen, out_dir)
+                    registrados += 1
+                    self._fallidos.pop(eventos, None)
+                except Exception as e:
+                    # fichero a medio escribir o corrupto: se omite y se sigue con el almacén en memoria
+                    self._fallidos[eventos] = os.path.getmtime(eventos)
+                    print(f"⚠️ No se pudo registrar {out_dir}: {e}")
+            if registrados or self._mtime_almacen() != self._mtime:
+                self._cargar()
+            if self._mtime_indice() != self._mtime_perfiles:
+                self._cargar_perfiles()
+
+    # ------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------
+    def recomendacion(self, nuestros, rivales, partidos=None):
+        self.refrescar()
+        clave = (tuple(nuestros), tuple(rivales), tuple(partidos or ()))
+        with self._lock:
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                return self._cache[clave]
+            conteos, indice = self.conteos, self.indice
+        trabajo = {"nombre": f"{'-'.join(nuestros)}_vs_{'-'.join(rivales)}",
+                   "nuestros": list(nuestros), "rivales": list(rivales), "partidos": list(partidos or [])}
+        indices = {}
+        if indice is not None:
+            trabajo["perfiles"] = self.ruta_perfiles   # rivales sin partidos: los de perfil parecido
+            indices[self.ruta_perfiles] = indice
+        resultado = recomendar_trabajo(trabajo, conteos, indices=indices)
+        with self._lock:
+            self._cache[clave] = resultado
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+        return resultado
+
+    def partidos(self):
+        self.refrescar()
+        return self.almacen.partidos()
+
+
+# ======================================================
+# HTTP
+# ======================================================
+
+def _lista(params, nombre):
+    return [v.strip() for valor in params.get(nombre, []) for v in valor.split(",") if v.strip()]
+
+
+def crear_manejador(servicio):
+    class Manejador(BaseHTTPRequestHandler):
+        def _responder(self, estado, cuerpo, tipo="application/json; charset=utf-8", t0=None):
+            datos = cuerpo.encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(datos)))
+            if t0 is not None:
+                self.send_header("X-Tiempo-ms", f"{(time.perf_counter() - t0) * 1000:.1f}")
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def _json(self, estado, obj, t0=None):
+            self._responder(estado, json.dumps(obj, ensure_ascii=False), t0=t0)
+
+        def do_GET(self):
+            t0 = time.perf_counter()
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            try:
+                if url.path == "/salud":
+                    self._json(200, {"ok": True, "partidos": len(servicio.almacen.partidos())}, t0)
+                elif url.path == "/partidos":
+                    self._json(200, servicio.partidos(), t0)
+                elif url.path == "/recomendacion":
+                    nuestros, rivales = _lista(params, "nuestros"), _lista(params, "rivales")
+                    if not nuestros or not rivales:
+                        self._json(400, {"error": "Faltan los parámetros 'nuestros' y 'rivales'."}, t0)
+                        return
+                    r = servicio.recomendacion(nuestros, rivales, _lista(params, "partidos"))
+                    if params.get("formato", ["json"])[0] == "texto":
+                        self._responder(200, r["texto"], "text/plain; charset=utf-8", t0)
+                    else:
+                        self._json(200, r, t0)
+                else:
+                    self._json(404, {"error": f"Ruta desconocida: {url.path}"}, t0)
+            except Exception as e:
+                self._json(500, {"error": str(e)}, t0)
+
+        def log_message(self, formato, *args):
+            pass
+
+    return Manejador
+
+
+def main():
+    cfg = {}
+    if os.path.exists("config/config.toml"):
+        cfg = load_config("config/config.toml").get("servicio", {})
+
+    parser = argparse.ArgumentParser(description="Servicio local de recomendaciones")
+    parser.add_argument("--host", default=cfg.get("host", "127.0.0.1"))
+    parser.add_argument("--puerto", type=int, default=int(cfg.get("puerto", 8765)))
+    parser.add_argument("--almacen", default=RUTA_ALMACEN)
+    parser.add_argument("--partidos", default=cfg.get("base_partidos", os.path.join("outputs", "figures")),
+                        help="carpeta base de pipeline_juegos donde aparecen los partidos nuevos")
+    parser.add_argument("--intervalo", type=float, default=float(cfg.get("intervalo_refresco", 5.0)),
+                        help="segundos entre comprobaciones de partidos nuevos")
+    args = parser.parse_args()
+
+    servicio = ServicioRecomendador(args.almacen, args.partidos, args.intervalo)
+    servicio.refrescar(forzar=True)
+    servidor = ThreadingHTTPServer((args.host, args.puerto), crear_manejador(servicio))
+    print(f"🌐 Recomendador escuchando en http://{args.host}:{args.puerto} (Ctrl+C para salir)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print("👋 Servicio detenido")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,4 +30,69 @@ try:
 except ImportError as e:
     print("❌ ERROR: no se puede importar 'src.data.load_data' ->", e)
 
+print("=== Verificación del marcador ===")
+
+try:
+    import pandas as pd
+    from src.data.score_utils import PUNTOS_MAP, crear_marcador
+    from src.analysis.simulador_partido import _marcador
+
+    # todos los valores de punto que escribe crear_marcador, incluida la ventaja
+    puntos = list(PUNTOS_MAP)
+    df = crear_marcador(pd.DataFrame({
+        "clip_start": range(len(puntos)),
+        "set_p1": 0, "set_p2": 0, "juego_p1": 0, "juego_p2": 0,
+        "punto_p1": puntos, "punto_p2": puntos[::-1],
+    }))
+    valores = _marcador(df["marcador_puntos"])
+    if valores.isna().any().any():
+        print("❌ ERROR: marcadores sin valor numérico ->",
+              df.loc[valores.isna().any(axis=1), "marcador_puntos"].tolist())
+    else:
+        print(f"OK: {len(df)} marcadores de crear_marcador se leen en el simulador.")
+
+    # en el tie-break (juegos 6-6) los puntos se guardan y se leen como números
+    tb = crear_marcador(pd.DataFrame({
+        "clip_start": [0, 1], "set_p1": 0, "set_p2": 0, "juego_p1": 6, "juego_p2": 6,
+        "punto_p1": ["7", "15"], "punto_p2": ["5", "14"],
+    }))
+    valores = _marcador(tb["marcador_puntos"], tiebreak=[True, True])
+    if valores.to_numpy().tolist() != [[7.0, 5.0], [15.0, 14.0]]:
+        print("❌ ERROR: puntos de tie-break mal leídos ->", tb["marcador_puntos"].tolist(), valores.to_numpy().tolist())
+    else:
+        print("OK: los puntos de tie-break se leen tal cual.")
+except Exception as e:
+    print("❌ ERROR: no se puede verificar el marcador ->", e)
+
+print("=== Verificación del almacén por corte ===")
+
+try:
+    import tempfile
+    sys.path.append(str(ROOT / "scripts"))
+    from servicio_recomendador import ServicioRecomendador
+
+    # dos cortes del mismo partido (<base>/<partido>/<marcador>) con eventos distintos
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "partidos"
+        for marcador, n in (("2-3", 4), ("4-5", 6)):
+            (base / "final" / marcador).mkdir(parents=True)
+            pd.DataFrame({
+                "jugador": ["Coello", "Galán"] * (n // 2),
+                "categoria": ["winner", "error no forzado"] * (n // 2),
+                "golpe_q": "Bandeja",
+                "inicio_golpe:_x": 5.0, "inicio_golpe:_y": 5.0, "fin_golpe:_x": 5.0, "fin_golpe:_y": 15.0,
+            }).to_feather(base / "final" / marcador / "eventos_completos.arrow")
+        servicio = ServicioRecomendador(Path(tmp) / "almacen.parquet", base_partidos=str(base),
+                                        intervalo=0, ruta_perfiles=None)
+        servicio.refrescar(forzar=True)
+        eventos = servicio.almacen.conteos.groupby("partido")["n"].sum().to_dict()
+        if eventos != {"final/2-3": 4, "final/4-5": 6}:
+            print("❌ ERROR: los cortes de un partido se pisan en el almacén ->", eventos)
+        elif servicio.partidos_pendientes():
+            print("❌ ERROR: cortes ya registrados siguen pendientes ->", servicio.partidos_pendientes())
+        else:
+            print(f"OK: {len(eventos)} cortes del mismo partido, cada uno con su entrada en el almacén.")
+except Exception as e:
+    print("❌ ERROR: no se puede verificar el almacén por corte ->", e)
+
 print("=== Fin de la verificación ===")
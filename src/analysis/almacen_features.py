@@ -0,0 +1,126 @@
+"""
+Almacén de features del recomendador (conteos por partido, lado y jugador).
+--------------------------------------------------------------------------
+Las tablas del recomendador (errores/winners por jugador, distribución de
+categorías, matchups por zona, top golpes) son todas sumas de conteos de
+eventos por (jugador, celda de fin, categoría, golpe). En vez de recalcularlas desde
+los eventos crudos en cada llamada, cada partido se agrega UNA vez a conteos y
+se guarda aquí:
+
+    partido | lado (nuestro/rival) | jugador | <dimensiones...> | n
+
+La clave `partido` es la de la carpeta de pipeline_juegos, "<partido>/<marcador>":
+cada corte de un partido (sus eventos hasta N juegos) tiene sus propias filas.
+Junto a los conteos se guarda la versión (mtime de los eventos) de cada clave,
+para saber qué cortes hay que volver a registrar.
+
+Procesar un partido nuevo solo sustituye sus filas (idempotente). Cualquier
+consulta (un rival en todo su historial, nuestros partidos contra él...) es
+un filtro + suma sobre unos cientos de filas, sin tocar eventos. Las que
+cruzan partidos usan solo el corte más largo de cada uno (marcar_cortes):
+los cortes son prefijos del mismo partido y sumarlos contaría golpes dos veces.
+"""
+
+from __future__ import annotations
+import os
+from pathlib import Path
+
+import pandas as pd
+
+LADOS = ("nuestro", "rival")
+ATRIBUTO_VERSIONES = "versiones"   # df.attrs del parquet: clave → mtime de sus eventos
+
+
+def partido_base(claves: pd.Series) -> pd.Series:
+    """"<partido>/<marcador>" → "<partido>" (claves sin corte: tal cual)."""
+    return claves.astype("string").str.split("/", n=1).str[0]
+
+
+def marcar_cortes(conteos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Añade partido_base y corte_completo (True en las filas del corte con más
+    eventos de cada partido, que contiene a los demás).
+    """
+    clave = conteos["partido"].astype("string")
+    eventos = conteos.groupby(clave, sort=True)["n"].sum()
+    completos = eventos.groupby(partido_base(eventos.index.to_series()).to_numpy()).idxmax()
+    return conteos.assign(partido_base=partido_base(clave), corte_completo=clave.isin(completos).to_numpy())
+
+
+class AlmacenFeatures:
+    """Tabla larga de conteos persistida en parquet."""
+
+    def __init__(self, ruta: str | Path, conteos: pd.DataFrame | None = None, versiones: dict | None = None):
+        self.ruta = Path(ruta)
+        self.conteos = conteos if conteos is not None else pd.DataFrame(columns=["partido", "lado", "n"])
+        self.versiones = dict(versiones or {})
+
+    @classmethod
+    def cargar(cls, ruta: str | Path) -> "AlmacenFeatures":
+        """Lee el almacén; si aún no existe, empieza vacío."""
+        ruta = Path(ruta)
+        if ruta.exists():
+            conteos = pd.read_parquet(ruta)
+            return cls(ruta, conteos, conteos.attrs.get(ATRIBUTO_VERSIONES))
+        return cls(ruta)
+
+    def guardar(self) -> Path:
+        """Escritura atómica: un lector concurrente nunca ve el fichero a medias."""
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.ruta.with_name(f".{self.ruta.name}.{os.getpid()}.tmp")
+        tabla = self.conteos.copy()
+        tabla.attrs = {ATRIBUTO_VERSIONES: self.versiones}
+        tabla.to_parquet(tmp, index=False)
+        os.replace(tmp, self.ruta)
+        return self.ruta
+
+    # ------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------
+    def partidos(self) -> list[str]:
+        return sorted(self.conteos["partido"].dropna().unique().tolist())
+
+    def version(self, partido: str) -> float | None:
+        """Versión con la que se registró `partido` (None si no está o es de un almacén antiguo)."""
+        return self.versiones.get(str(partido))
+
+    def actualizar(self, partido: str, conteos_partido: pd.DataFrame, version: float | None = None) -> "AlmacenFeatures":
+        """
+        Sustituye las filas de `partido` por `conteos_partido` (columnas lado,
+        jugador, dimensiones y n). Reprocesar un partido no duplica conteos.
+        `version` (p. ej. el mtime de sus eventos) queda guardada con la clave.
+        """
+        self.versiones[str(partido)] = version
+        nuevos = conteos_partido.assign(partido=str(partido))
+        previos = self.conteos[self.conteos["partido"] != str(partido)]
+        partes = [p for p in (previos, nuevos) if not p.empty]
+        tabla = pd.concat(partes, ignore_index=True) if partes else nuevos
+        columnas = ["partido"] + [c for c in tabla.columns if c not in ("partido", "n")] + ["n"]
+        self.conteos = tabla[columnas].reset_index(drop=True)
+        return self
+
+    # ------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------
+    def consultar(self, lado: str | None = None, jugadores=None, partidos=None,
+                  completos: bool = False) -> pd.DataFrame:
+        """
+        Filas que cumplen el filtro (None = todas). `jugadores` en forma normalizada.
+        completos=True deja solo el corte más largo de cada partido.
+        """
+        c = self.conteos
+        m = pd.Series(True, index=c.index)
+        if completos:
+            m &= marcar_cortes(c)["corte_completo"]
+        if lado is not None:
+            m &= c["lado"] == lado
+        if jugadores is not None:
+            m &= c["jugador_norm"].isin(list(jugadores))
+        if partidos is not None:
+            m &= c["partido"].isin(list(partidos))
+        return c[m]
+
+    def partidos_contra(self, rivales) -> list[str]:
+        """Partidos (su corte más largo) en los que alguno de `rivales` (normalizados) jugó en el lado rival."""
+        filas = self.consultar(lado="rival", jugadores=rivales, completos=True)
+        return sorted(filas["partido"].unique().tolist())
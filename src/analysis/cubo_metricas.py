@@ -0,0 +1,128 @@
+"""
+Cubo de métricas: conteos por (partido, set, juego, jugador) × categoría.
+------------------------------------------------------------------------
+Una sola agregación de los eventos da una tabla tidy con una fila por
+(partido, set, juego, jugador) y una columna por categoría. Los resúmenes de
+partido, set, juego o rango de juegos son cortes y sumas de ese cubo: nunca se
+vuelve a agrupar el DataFrame de eventos.
+
+El cubo se guarda en parquet (cubo_metricas.parquet) para que otros análisis
+(temporada, recomendador...) lo lean sin rehacer el pipeline.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NIVELES = ["partido", "set", "juego", "jugador"]
+
+
+class CuboMetricas:
+    """Conteos por nivel (NIVELES) y categoría. Solo filas con algún evento."""
+
+    def __init__(self, datos: pd.DataFrame, col_jugador: str = "jugador", col_categ: str = "categoria_punto"):
+        self.datos = datos.reset_index(drop=True)
+        self.categorias = [c for c in self.datos.columns if c not in NIVELES]
+        self.col_jugador = col_jugador
+        self.col_categ = col_categ
+
+    def __len__(self) -> int:
+        return len(self.datos)
+
+    # ------------------------------------------------------
+    # Construcción (la única agregación sobre eventos)
+    # ------------------------------------------------------
+    @classmethod
+    def desde_eventos(
+        cls,
+        df: pd.DataFrame,
+        col_jugador: str = "jugador",
+        col_categ: str = "categoria_punto",
+        col_set: str = "set_real",
+        col_juego: str = "juego_real",
+        partido: str | pd.Series = "partido",
+    ) -> "CuboMetricas":
+        """
+        `partido` es un nombre fijo o una Serie por fila (varios partidos).
+        Las filas sin jugador o sin categoría no cuentan; las que no tienen set
+        o juego sí (con NaN en ese nivel): entran en los totales del partido
+        aunque ningún corte por set o juego las seleccione.
+        """
+        claves = pd.DataFrame({
+            "partido": partido if isinstance(partido, pd.Series) else pd.Series(partido, index=df.index),
+            "set": df[col_set],
+            "juego": df[col_juego],
+            "jugador": df[col_jugador],
+            "categoria": df[col_categ],
+        })
+        claves = claves[claves["jugador"].notna() & claves["categoria"].notna()]
+        datos = (
+            claves.groupby(NIVELES + ["categoria"], sort=True, observed=True, dropna=False)
+            .size()
+            .unstack("categoria", fill_value=0)
+        )
+        datos.columns = datos.columns.astype(str)
+        datos.columns.name = None
+        return cls(datos.reset_index(), col_jugador, col_categ)
+
+    # ------------------------------------------------------
+    # Cortes y agregados
+    # ------------------------------------------------------
+    def filtrar(self, partido=None, set_=None, juego=None, jugador=None) -> pd.DataFrame:
+        """Filas del cubo que cumplen el filtro (escalar o lista; None = todos)."""
+        m = np.ones(len(self.datos), dtype=bool)
+        for col, valor in (("partido", partido), ("set", set_), ("juego", juego), ("jugador", jugador)):
+            if valor is not None:
+                valores = [valor] if np.isscalar(valor) else list(valor)
+                m &= self.datos[col].isin(valores).to_numpy()
+        return self.datos[m]
+
+    def conteos(self, por: str | list[str] = "jugador", **filtro) -> pd.DataFrame:
+        """
+        Suma del corte agrupada por `por`. Con por="jugador" devuelve la misma
+        tabla jugador × categoría que groupby([jugador, categoría]).size().unstack().
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        tabla = self.filtrar(**filtro).groupby(por, sort=True)[self.categorias].sum()
+        tabla.columns.name = self.col_categ
+        if por == ["jugador"]:
+            tabla.index.name = self.col_jugador
+        return tabla
+
+    def por_juego(self, **filtro) -> pd.DataFrame:
+        """Formato largo (juego, jugador, categorías...): el cubo tal cual, sin agrupar."""
+        sub = self.filtrar(**filtro)
+        return sub[["juego", "jugador"] + self.categorias].rename(columns={"jugador": self.col_jugador})
+
+    def evolucion_porcentajes(self, **filtro) -> pd.DataFrame:
+        """% de cada categoría por jugador en cada juego, más el total del juego."""
+        out = self.por_juego(**filtro).reset_index(drop=True)
+        total = out[self.categorias].sum(axis=1)
+        out[self.categorias] = out[self.categorias].div(total, axis=0).mul(100).round(2)
+        out["total"] = total
+        return out
+
+    # ------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------
+    def guardar(self, ruta: str | Path) -> Path:
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.datos.to_parquet(ruta, index=False)
+        return ruta
+
+    @classmethod
+    def cargar(cls, ruta: str | Path, col_jugador: str = "jugador",
+               col_categ: str = "categoria_punto") -> "CuboMetricas":
+        return cls(pd.read_parquet(ruta), col_jugador, col_categ)
+
+    @classmethod
+    def combinar(cls, cubos: list["CuboMetricas"]) -> "CuboMetricas":
+        """Une cubos de varios partidos (categorías ausentes = 0)."""
+        datos = pd.concat([c.datos for c in cubos], ignore_index=True)
+        cats = sorted(set().union(*(c.categorias for c in cubos)))
+        datos[cats] = datos[cats].fillna(0).astype("int64")
+        c0 = cubos[0]
+        return cls(datos[NIVELES + cats], c0.col_jugador, c0.col_categ)
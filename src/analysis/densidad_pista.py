@@ -0,0 +1,173 @@
+"""
+Densidad de golpes sobre la pista (histogramas 2D binned y cacheados).
+----------------------------------------------------------------------
+La vista de una línea por golpe no se lee con cientos de golpes. Aquí las
+coordenadas de inicio y fin se agrupan en una rejilla nx × ny sobre la pista
+(ANCHO × LARGO) para cada (jugador, categoría, set) con UN solo np.bincount:
+
+    conteos[k, e, fila, col]   k = grupo (jugador, categoría, set)
+                               e = 0 inicio / 1 fin
+
+El resultado se guarda en .npz junto a los datos; cualquier vista posterior
+(un jugador, una categoría, una temporada entera sumando partidos) es una
+suma sobre ese array, sin volver a leer golpes. El .npz lleva la huella de la
+clasificación de eventos (categorias.HUELLA_CATEGORIAS) con la que se contó:
+si la clasificación cambia, la caché deja de valer aunque los golpes no cambien.
+"""
+
+from __future__ import annotations
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.categorias import HUELLA_CATEGORIAS
+
+EXTREMOS = ("inicio", "fin")
+
+
+class DensidadPista:
+    """Conteos binned por grupo (jugador, categoría, set) y extremo (inicio/fin)."""
+
+    def __init__(self, claves: pd.DataFrame, conteos: np.ndarray, ancho: float, largo: float,
+                 categorias: str | None = None):
+        self.claves = claves.reset_index(drop=True)
+        self.conteos = conteos
+        self.ancho = ancho
+        self.largo = largo
+        self.categorias = categorias   # huella de la clasificación de eventos (None = desconocida)
+
+    @property
+    def rejilla(self) -> tuple[int, int]:
+        """(nx, ny): columnas a lo ancho y filas a lo largo."""
+        return self.conteos.shape[3], self.conteos.shape[2]
+
+    # ------------------------------------------------------
+    # Cálculo
+    # ------------------------------------------------------
+    @classmethod
+    def desde_golpes(
+        cls,
+        df: pd.DataFrame,
+        columnas: list[str],
+        ancho: float,
+        largo: float,
+        nx: int = 10,
+        ny: int = 20,
+        col_jugador: str = "jugador",
+        col_categ: str = "categoria_punto",
+        col_set: str = "set_real",
+    ) -> "DensidadPista":
+        """
+        columnas = [inicio_x, inicio_y, fin_x, fin_y]. Las coordenadas fuera de
+        la pista se llevan a la celda del borde; las que faltan no cuentan.
+        """
+        claves_cols = [col_jugador, col_categ, col_set]
+        grupos = df[claves_cols].astype("string").fillna("")
+        codigo = grupos.groupby(claves_cols, sort=True).ngroup().to_numpy()
+        claves = grupos.drop_duplicates().sort_values(claves_cols).reset_index(drop=True)
+        claves.columns = ["jugador", "categoria", "set"]
+        n_grupos, n_celdas = len(claves), nx * ny
+
+        xy = df[columnas].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        indices = []
+        for e in range(2):
+            x, y = xy[:, 2 * e], xy[:, 2 * e + 1]
+            validos = ~(np.isnan(x) | np.isnan(y))
+            col = np.clip((x[validos] / ancho * nx).astype(int), 0, nx - 1)
+            fila = np.clip((y[validos] / largo * ny).astype(int), 0, ny - 1)
+            indices.append(((codigo[validos] * 2 + e) * n_celdas) + fila * nx + col)
+
+        planos = np.bincount(np.concatenate(indices), minlength=n_grupos * 2 * n_celdas)
+        conteos = planos.astype(np.int32).reshape(n_grupos, 2, ny, nx)
+        return cls(claves, conteos, ancho, largo, HUELLA_CATEGORIAS)
+
+    # ------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------
+    def matriz(self, extremo: str = "fin", jugador=None, categoria=None, set_=None) -> np.ndarray:
+        """Suma (ny × nx) de los grupos que cumplen el filtro (None = todos)."""
+        m = np.ones(len(self.claves), dtype=bool)
+        for col, valor in (("jugador", jugador), ("categoria", categoria), ("set", set_)):
+            if valor is not None:
+                valores = [valor] if np.isscalar(valor) else list(valor)
+                m &= self.claves[col].isin([str(v) for v in valores]).to_numpy()
+        return self.conteos[m, EXTREMOS.index(extremo)].sum(axis=0)
+
+    @classmethod
+    def combinar(cls, densidades: list["DensidadPista"]) -> "DensidadPista":
+        """Une varios partidos (misma rejilla): base de las vistas de temporada."""
+        if len({d.rejilla for d in densidades}) > 1:
+            raise ValueError("No se pueden combinar densidades con rejillas distintas.")
+        if len({d.categorias for d in densidades}) > 1:
+            raise ValueError("No se pueden combinar densidades con clasificaciones de eventos distintas "
+                             "(regenera las cachés con pipeline_golpes).")
+        claves = pd.concat([d.claves for d in densidades], ignore_index=True)
+        conteos = np.concatenate([d.conteos for d in densidades])
+        codigo = claves.groupby(list(claves.columns), sort=True).ngroup().to_numpy()
+        unicas = claves.drop_duplicates().sort_values(list(claves.columns)).reset_index(drop=True)
+        suma = np.zeros((len(unicas),) + conteos.shape[1:], dtype=np.int32)
+        np.add.at(suma, codigo, conteos)
+        d0 = densidades[0]
+        return cls(unicas, suma, d0.ancho, d0.largo, d0.categorias)
+
+    # ------------------------------------------------------
+    # Caché en disco
+    # ------------------------------------------------------
+    def guardar(self, ruta: str | Path):
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps({"ancho": self.ancho, "largo": self.largo, "categorias": self.categorias})
+        np.savez_compressed(
+            ruta,
+            conteos=self.conteos,
+            jugador=self.claves["jugador"].to_numpy(dtype=str),
+            categoria=self.claves["categoria"].to_numpy(dtype=str),
+            set=self.claves["set"].to_numpy(dtype=str),
+            meta=np.array(meta),
+        )
+
+    @classmethod
+    def cargar(cls, ruta: str | Path) -> "DensidadPista":
+        with np.load(ruta, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            claves = pd.DataFrame({c: z[c].astype(str) for c in ("jugador", "categoria", "set")})
+            return cls(claves, z["conteos"], meta["ancho"], meta["largo"], meta.get("categorias"))
+
+
+def ruta_cache(ruta_golpes: str | Path, nx: int, ny: int) -> Path:
+    """Caché junto al dataset: golpes.parquet → golpes.densidad_10x20.npz."""
+    ruta_golpes = Path(ruta_golpes)
+    return ruta_golpes.with_name(f"{ruta_golpes.stem}.densidad_{nx}x{ny}.npz")
+
+
+def cargar_cache(cache: str | Path, *fuentes: str | Path) -> "DensidadPista | None":
+    """
+    La densidad cacheada si es más reciente que sus fuentes y se contó con la
+    clasificación de eventos actual; si no, None (hay que recalcularla).
+    """
+    if not cache_vigente(cache, *fuentes):
+        return None
+    dens = DensidadPista.cargar(cache)
+    return dens if dens.categorias == HUELLA_CATEGORIAS else None
+
+
+def cache_vigente(cache: str | Path, *fuentes: str | Path) -> bool:
+    """True si la caché existe y es más reciente que todas sus fuentes."""
+    cache = Path(cache)
+    if not cache.exists():
+        return False
+    t = cache.stat().st_mtime
+    return all(Path(f).stat().st_mtime <= t for f in fuentes if Path(f).exists())
+
+
+def rejilla_configurada(config_path: str | Path = "config/config.toml") -> tuple[int, int]:
+    """[densidad] nx / ny del config (por defecto 10 × 20: celdas de 10 × 10)."""
+    nx, ny = 10, 20
+    config_path = Path(config_path)
+    if config_path.exists():
+        from src.data.load_data import load_config
+        cfg = load_config(config_path).get("densidad", {})
+        nx, ny = int(cfg.get("nx", nx)), int(cfg.get("ny", ny))
+    return nx, ny
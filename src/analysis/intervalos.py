@@ -0,0 +1,112 @@
+"""
+Intervalos de confianza de tasas a partir de tablas de conteos.
+---------------------------------------------------------------
+Las tasas del recomendador (winrate por zona, % winners, % ENF, impacto neto)
+son cocientes de conteos por categoría: fila = zona/golpe, columna = categoría.
+Con pocos eventos una tasa alta puede ser solo ruido, así que en vez de
+ordenar por la tasa se ordena por su cota inferior.
+
+Todas las remuestras se generan de golpe, sin bucles por fila ni por remuestra:
+
+    bootstrap  → multinomial(n_fila, proporciones_fila)   (B × filas × categorías)
+    beta       → posterior Dirichlet(conteos + 1) vía Gamma normalizadas
+                 (cada proporción marginal es una Beta(k + 1, n - k + 1))
+
+y cualquier tasa (suma de categorías menos otra suma) se evalúa sobre las
+mismas remuestras, así que los intervalos de una tabla son coherentes entre sí.
+La semilla sale de [repro] seed del config para que los resultados se repitan.
+
+Por defecto se usa beta: con una proporción de 0 o 1 (p. ej. 3 de 3 winners)
+el bootstrap repite siempre la misma tabla y da un intervalo de anchura cero.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+METODOS = ("beta", "bootstrap")
+
+
+def semilla_configurada(config_path: str | Path = "config/config.toml") -> int:
+    """[repro] seed del config (por defecto 42)."""
+    config_path = Path(config_path)
+    if config_path.exists():
+        from src.data.load_data import load_config
+        return int(load_config(config_path).get("repro", {}).get("seed", 42))
+    return 42
+
+
+def intervalos_configurados(config_path: str | Path = "config/config.toml") -> dict:
+    """Parámetros de intervalos_tasas desde [intervalos] (nivel, remuestras, metodo) y [repro] seed."""
+    cfg = {}
+    config_path = Path(config_path)
+    if config_path.exists():
+        from src.data.load_data import load_config
+        cfg = load_config(config_path).get("intervalos", {})
+    return {
+        "nivel": float(cfg.get("nivel", 0.90)),
+        "n_remuestras": int(cfg.get("remuestras", 2000)),
+        "metodo": str(cfg.get("metodo", "beta")),
+        "semilla": semilla_configurada(config_path),
+    }
+
+
+def muestras_proporciones(
+    conteos: np.ndarray,
+    n_remuestras: int = 2000,
+    metodo: str = "beta",
+    semilla: int | None = None,
+) -> np.ndarray:
+    """
+    Remuestras de las proporciones por fila: array (n_remuestras, filas, categorías).
+    Las filas sin eventos quedan a NaN.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconocido: {metodo!r} (disponibles: {', '.join(METODOS)})")
+    conteos = np.asarray(conteos, dtype=np.int64)
+    rng = np.random.default_rng(semilla_configurada() if semilla is None else semilla)
+    n = conteos.sum(axis=1)
+    forma = (n_remuestras,) + conteos.shape
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if metodo == "bootstrap":
+            p = np.where(n[:, None] > 0, conteos / np.maximum(n, 1)[:, None], 1.0 / conteos.shape[1])
+            muestras = rng.multinomial(n, p, size=forma[:2]) / n[None, :, None]
+        else:
+            g = rng.gamma(conteos + 1.0, size=forma)
+            muestras = g / g.sum(axis=2, keepdims=True)
+    muestras[:, n == 0, :] = np.nan
+    return muestras
+
+
+def intervalos_tasas(
+    tabla: pd.DataFrame,
+    tasas: dict[str, tuple[list[str], list[str]]],
+    nivel: float = 0.90,
+    n_remuestras: int = 2000,
+    metodo: str = "beta",
+    semilla: int | None = None,
+) -> pd.DataFrame:
+    """
+    `tabla`: filas × categorías (conteos). `tasas`: nombre → (categorías que
+    suman, categorías que restan), p. ej. {"impacto_neto": (["winner"],
+    ["error no forzado"])}. Devuelve, por fila, <tasa>_inf y <tasa>_sup
+    (intervalo central al `nivel`); las categorías que faltan cuentan 0.
+    """
+    categorias = list(tabla.columns)
+    conteos = tabla.to_numpy()
+    con_eventos = conteos.sum(axis=1) > 0
+    muestras = muestras_proporciones(conteos[con_eventos], n_remuestras, metodo, semilla)
+    colas = [(1 - nivel) / 2, 1 - (1 - nivel) / 2]
+
+    out = pd.DataFrame(index=tabla.index)
+    for nombre, (suma, resta) in tasas.items():
+        isuma = [categorias.index(c) for c in suma if c in categorias]
+        iresta = [categorias.index(c) for c in resta if c in categorias]
+        tasa = muestras[:, :, isuma].sum(axis=2) - muestras[:, :, iresta].sum(axis=2)
+        cotas = np.full((2, len(tabla)), np.nan)
+        cotas[:, con_eventos] = np.quantile(tasa, colas, axis=0)
+        out[f"{nombre}_inf"], out[f"{nombre}_sup"] = cotas
+    return out
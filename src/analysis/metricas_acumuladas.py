@@ -0,0 +1,115 @@
+"""
+Línea temporal de métricas acumuladas por jugador.
+--------------------------------------------------
+En lugar de repetir un groupby/unstack por cada set, juego o corte, se calculan
+UNA vez los conteos (jugador × categoría) acumulados a lo largo del partido.
+Cualquier tramo del partido [inicio, fin) se resuelve restando dos filas:
+
+    conteos(tramo) = acumulados[fin] - acumulados[inicio]
+
+Las posiciones de corte se obtienen con searchsorted sobre columnas monótonas
+(juego_real, set_real, clip_start...), por lo que cada consulta es O(jugadores × categorías).
+"""
+
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+
+class LineaTemporalMetricas:
+    """
+    Conteos acumulados por jugador y categoría sobre un DataFrame ORDENADO
+    cronológicamente (p. ej. tras reconstruir_marcadores o procesar_marcador_robusto).
+    """
+
+    def __init__(self, df: pd.DataFrame, col_jugador: str = "jugador", col_categ: str = "categoria_punto"):
+        self.df = df
+        self.col_jugador = col_jugador
+        self.col_categ = col_categ
+
+        cod_j, self.jugadores = pd.factorize(df[col_jugador], sort=True)
+        cod_c, self.categorias = pd.factorize(df[col_categ], sort=True)
+        # categóricas (categoria_punto del dataset procesado): etiquetas planas
+        self.jugadores = pd.Index(np.asarray(self.jugadores))
+        self.categorias = pd.Index(np.asarray(self.categorias))
+
+        n_j, n_c = len(self.jugadores), len(self.categorias)
+        validos = (cod_j >= 0) & (cod_c >= 0)
+
+        # acumulados[k] = conteos de las k primeras filas (acumulados[0] = 0)
+        planos = np.zeros((len(df) + 1, n_j * n_c), dtype=np.int64)
+        planos[np.nonzero(validos)[0] + 1, cod_j[validos] * n_c + cod_c[validos]] = 1
+        self.acumulados = planos.cumsum(axis=0).reshape(len(df) + 1, n_j, n_c)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    # ------------------------------------------------------
+    # Posiciones de corte
+    # ------------------------------------------------------
+    def posicion(self, col: str, valor, lado: str = "right") -> int:
+        """
+        Nº de filas con df[col] <= valor (lado="right") o < valor (lado="left").
+        La columna debe ser no decreciente (contadores de juego/set, clip_start...).
+        """
+        return int(np.searchsorted(self.df[col].to_numpy(), valor, side=lado))
+
+    def tramos(self, col: str) -> pd.DataFrame:
+        """
+        Tramos contiguos con el mismo valor de `col`: devuelve valor, inicio y fin
+        (posiciones [inicio, fin)) de cada tramo, en orden de aparición.
+        """
+        valores = self.df[col].to_numpy()
+        if len(valores) == 0:
+            return pd.DataFrame(columns=[col, "inicio", "fin"])
+        cambios = np.nonzero(valores[1:] != valores[:-1])[0] + 1
+        inicios = np.concatenate([[0], cambios])
+        fines = np.concatenate([cambios, [len(valores)]])
+        return pd.DataFrame({col: valores[inicios], "inicio": inicios, "fin": fines})
+
+    # ------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------
+    def conteos(self, inicio: int = 0, fin: int | None = None) -> pd.DataFrame:
+        """
+        Tabla jugador × categoría del tramo [inicio, fin), con el mismo formato que
+        groupby([jugador, categoría]).size().unstack(fill_value=0): solo jugadores
+        con al menos un evento en el tramo.
+        """
+        fin = len(self.df) if fin is None else fin
+        tabla = pd.DataFrame(
+            self.acumulados[fin] - self.acumulados[inicio],
+            index=pd.Index(self.jugadores, name=self.col_jugador),
+            columns=pd.Index(self.categorias, name=self.col_categ),
+        )
+        return tabla[tabla.sum(axis=1) > 0]
+
+    def conteos_por_tramo(self, col: str) -> pd.DataFrame:
+        """
+        Conteos de cada tramo de `col` (p. ej. cada juego) en formato largo:
+        una fila por (valor de col, jugador) con una columna por categoría.
+        Todo el cálculo es una resta vectorizada de acumulados.
+        """
+        t = self.tramos(col)
+        bloques = self.acumulados[t["fin"].to_numpy()] - self.acumulados[t["inicio"].to_numpy()]
+        n_t, n_j, n_c = bloques.shape
+
+        out = pd.DataFrame(
+            bloques.reshape(n_t * n_j, n_c),
+            columns=pd.Index(self.categorias, name=self.col_categ),
+        )
+        out.insert(0, self.col_jugador, np.tile(np.asarray(self.jugadores), n_t))
+        out.insert(0, col, np.repeat(t[col].to_numpy(), n_j))
+        return out[out[list(self.categorias)].sum(axis=1) > 0].reset_index(drop=True)
+
+    def evolucion_porcentajes(self, col: str) -> pd.DataFrame:
+        """
+        % de cada categoría por jugador en cada tramo de `col`.
+        Es la base del heat map de evolución a lo largo del partido.
+        """
+        out = self.conteos_por_tramo(col)
+        cats = list(self.categorias)
+        total = out[cats].sum(axis=1)
+        out[cats] = out[cats].div(total, axis=0).mul(100).round(2)
+        out["total"] = total
+        return out
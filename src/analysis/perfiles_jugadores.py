@@ -0,0 +1,185 @@
+"""
+Perfiles de juego por jugador y búsqueda de jugadores parecidos.
+----------------------------------------------------------------
+Cada jugador se resume en un vector con cuatro bloques de proporciones,
+calculadas sobre TODOS sus golpes de todos los partidos:
+
+    golpe      reparto de golpes (Bandeja, Volea, Globo...)
+    categoria  reparto de categorías (winner, error no forzado, bola dentro...)
+    zona       reparto de celdas de destino (rejilla [zonas], celda_fin)
+    pared      uso de pared (Fondo, Lateral, Sin pared...)
+
+Las columnas se estandarizan (media 0, desviación 1, como StandardScaler) y
+cada bloque se divide por la raíz de su nº de columnas, para que ningún bloque
+pese más solo por tener más categorías. El índice guarda la matriz ya
+estandarizada (float32) y sus normas, así que buscar los k vecinos de un
+jugador es un producto matriz × vector y un argpartition: sin bucles, y sigue
+siendo inmediato con miles de jugadores.
+"""
+
+from __future__ import annotations
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.categorias import asegurar_categoria
+from src.data.registro_jugadores import normalizar_nombre, normalizar_nombres
+from src.analysis.secuencias_golpes import SIN_PARED
+from src.analysis.zonas_pista import RejillaPista, asegurar_celdas
+
+BLOQUES = ("golpe", "categoria", "zona", "pared")
+MIN_GOLPES = 30      # jugadores con menos golpes no entran en el índice
+
+
+# ======================================================
+# CONTEOS POR JUGADOR (una agregación de los golpes)
+# ======================================================
+
+def conteos_perfil(
+    df: pd.DataFrame,
+    rejilla: RejillaPista,
+    col_jugador: str = "jugador",
+    col_golpe: str = "golpe_q",
+    col_pared: str = "pared",
+    columnas_xy: list[str] = ("inicio_x", "inicio_y", "fin_x", "fin_y"),
+) -> pd.DataFrame:
+    """Tabla larga jugador_norm | jugador | bloque | valor | n (golpes sin valor no cuentan en su bloque)."""
+    pared = df[col_pared] if col_pared in df.columns else pd.Series(pd.NA, index=df.index)
+    valores = pd.DataFrame({
+        "golpe": df[col_golpe].astype("string") if col_golpe in df.columns else pd.NA,
+        "categoria": asegurar_categoria(df).astype("string"),
+        "zona": asegurar_celdas(df, list(columnas_xy), rejilla)["celda_fin"].astype("string"),
+        "pared": pared.astype("string").str.strip().replace("", pd.NA).fillna(SIN_PARED),
+    }, index=df.index)
+    valores.insert(0, "jugador", df[col_jugador].astype("string"))
+    valores.insert(0, "jugador_norm", normalizar_nombres(df[col_jugador]))
+
+    largo = valores[valores["jugador_norm"] != ""].melt(
+        id_vars=["jugador_norm", "jugador"], value_vars=list(BLOQUES), var_name="bloque", value_name="valor")
+    return (largo.dropna(subset=["valor"])
+            .groupby(["jugador_norm", "jugador", "bloque", "valor"], sort=True, observed=True)
+            .size().rename("n").reset_index())
+
+
+# ======================================================
+# ÍNDICE
+# ======================================================
+
+class IndicePerfiles:
+    """Perfiles (proporciones por bloque) y matriz estandarizada para buscar vecinos."""
+
+    def __init__(self, perfiles: pd.DataFrame, golpes: pd.Series, nombres: pd.Series):
+        self.perfiles = perfiles                 # jugador_norm × "bloque:valor" (proporciones)
+        self.golpes = golpes                     # nº de golpes por jugador
+        self.nombres = nombres                   # nombre tal cual aparece en los datos
+        self._indexar()
+
+    def _indexar(self):
+        x = self.perfiles.to_numpy(dtype=np.float64)
+        self.media = x.mean(axis=0)
+        desv = x.std(axis=0)
+        self.desv = np.where(desv > 0, desv, 1.0)
+        bloques = self.perfiles.columns.str.split(":", n=1).str[0]
+        self.pesos = 1.0 / np.sqrt(bloques.map(bloques.value_counts()).to_numpy(dtype=np.float64))
+        self.matriz = self._estandarizar(x).astype(np.float32)
+        self.normas = (self.matriz.astype(np.float64) ** 2).sum(axis=1)
+        self._posicion = pd.Series(np.arange(len(self.perfiles)), index=self.perfiles.index)
+
+    def _estandarizar(self, x: np.ndarray) -> np.ndarray:
+        return (x - self.media) / self.desv * self.pesos
+
+    def __len__(self) -> int:
+        return len(self.perfiles)
+
+    # ------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------
+    @classmethod
+    def desde_conteos(cls, conteos: pd.DataFrame, min_golpes: int = MIN_GOLPES) -> "IndicePerfiles":
+        """Conteos de conteos_perfil (de uno o varios partidos: se suman)."""
+        # nombre a mostrar: la grafía más frecuente de cada jugador
+        grafias = conteos.groupby(["jugador_norm", "jugador"], sort=False)["n"].sum().sort_values()
+        nombres = grafias.reset_index().drop_duplicates("jugador_norm", keep="last").set_index("jugador_norm")["jugador"]
+
+        suma = conteos.groupby(["jugador_norm", "bloque", "valor"], sort=True)["n"].sum()
+        tabla = suma.unstack(["bloque", "valor"], fill_value=0).sort_index(axis=1)
+        totales = tabla.T.groupby(level="bloque").sum().T              # golpes con valor, por bloque
+        perfiles = tabla / totales.reindex(columns=tabla.columns.get_level_values("bloque")).to_numpy()
+        perfiles = perfiles.fillna(0.0)
+        perfiles.columns = [f"{b}:{v}" for b, v in perfiles.columns]
+
+        golpes = totales.max(axis=1).astype(int)
+        perfiles = perfiles[golpes >= min_golpes]
+        if perfiles.empty:
+            raise ValueError(f"Ningún jugador tiene al menos {min_golpes} golpes")
+        return cls(perfiles, golpes[perfiles.index], nombres[perfiles.index])
+
+    @classmethod
+    def desde_golpes(cls, df: pd.DataFrame, rejilla: RejillaPista, min_golpes: int = MIN_GOLPES,
+                     **columnas) -> "IndicePerfiles":
+        return cls.desde_conteos(conteos_perfil(df, rejilla, **columnas), min_golpes)
+
+    # ------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------
+    def _posiciones(self, jugadores) -> np.ndarray:
+        """Filas de la matriz de los `jugadores` que están en el índice."""
+        claves = [normalizar_nombre(j) for j in jugadores]
+        return self._posicion.reindex(claves).dropna().to_numpy(dtype=np.int64)
+
+    def vector(self, jugadores) -> np.ndarray | None:
+        """Vector estandarizado medio de `jugadores` (una pareja = media de los dos); None si no hay ninguno."""
+        pos = self._posiciones(jugadores)
+        return self.matriz[pos].mean(axis=0) if len(pos) else None
+
+    def vecinos_de_vector(self, vector: np.ndarray, k: int = 5, candidatos=None, excluir=()) -> pd.DataFrame:
+        """Los k jugadores más cercanos (distancia euclídea) al `vector` estandarizado."""
+        d2 = np.maximum(self.normas - 2.0 * (self.matriz @ vector) + float(vector @ vector), 0.0)
+        if candidatos is not None:
+            validos = np.zeros(len(self), dtype=bool)
+            validos[self._posiciones(candidatos)] = True
+        else:
+            validos = np.ones(len(self), dtype=bool)
+        validos[self._posiciones(excluir)] = False
+        d2[~validos] = np.inf
+
+        k = min(k, int(validos.sum()))
+        if k == 0:
+            return pd.DataFrame(columns=["jugador_norm", "jugador", "golpes", "distancia"])
+        top = np.argpartition(d2, k - 1)[:k]
+        top = top[np.argsort(d2[top])]
+        claves = self.perfiles.index[top]
+        return pd.DataFrame({
+            "jugador_norm": claves,
+            "jugador": self.nombres.reindex(claves).to_numpy(),
+            "golpes": self.golpes.reindex(claves).to_numpy(),
+            "distancia": np.sqrt(d2[top]),
+        })
+
+    def vecinos(self, jugadores, k: int = 5, candidatos=None) -> pd.DataFrame:
+        """Jugadores más parecidos a `jugadores` (uno o una pareja), sin contarlos a ellos."""
+        jugadores = [jugadores] if isinstance(jugadores, str) else list(jugadores)
+        vector = self.vector(jugadores)
+        if vector is None:
+            raise KeyError(f"Sin perfil para: {', '.join(jugadores)}")
+        return self.vecinos_de_vector(vector, k, candidatos, excluir=jugadores)
+
+    # ------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------
+    def guardar(self, ruta: str | Path) -> Path:
+        """Parquet con las proporciones, golpes y nombre (escritura atómica)."""
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        tabla = self.perfiles.assign(_golpes=self.golpes, _jugador=self.nombres).reset_index()
+        tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")
+        tabla.to_parquet(tmp, index=False)
+        os.replace(tmp, ruta)
+        return ruta
+
+    @classmethod
+    def cargar(cls, ruta: str | Path) -> "IndicePerfiles":
+        tabla = pd.read_parquet(ruta).set_index("jugador_norm")
+        return cls(tabla.drop(columns=["_golpes", "_jugador"]), tabla["_golpes"], tabla["_jugador"])
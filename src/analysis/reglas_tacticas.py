@@ -0,0 +1,150 @@
+"""
+Motor de reglas tácticas: recomendaciones declaradas como datos.
+----------------------------------------------------------------
+Cada regla es una entrada de config/reglas_tacticas.toml:
+
+    [[regla]]
+    nombre = "rival_fallon"
+    grupo = "perfil_rival"         # opcional: del grupo solo sale la de más prioridad
+    prioridad = 23                 # orden en el informe (mayor = antes)
+    si = ["pct_enf >= 12"]         # todas deben cumplirse ("col", "col op valor", "col op otra_col")
+    mensaje = ["Perfil del rival: fallón ({pct_bola:.1f}% dentro).", "Recomendación: ..."]
+    lista = "top_winner"           # opcional: columna con pares (clave, valor)...
+    detalle = " - {clave}: {valor}."   # ...que se añaden tras la 1ª línea del mensaje
+
+Las condiciones se evalúan sobre una tabla de features (una fila por informe:
+pareja, rival, emparejamiento...) con operaciones de columna, así que miles
+de informes se resuelven en una pasada por regla. Un valor ausente (NaN) no
+cumple ninguna comparación. Solo el texto de las filas que disparan una regla
+se formatea.
+"""
+
+from __future__ import annotations
+import operator
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RUTA_REGLAS = Path(__file__).resolve().parents[2] / "config" / "reglas_tacticas.toml"
+
+OPERADORES = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+}
+_CONDICION = re.compile(r"^\s*(\w+)\s*(?:(<=|>=|==|!=|<|>)\s*(.+?))?\s*$")
+
+
+@dataclass(frozen=True)
+class Regla:
+    nombre: str
+    mensaje: tuple[str, ...]
+    si: tuple[str, ...] = ()
+    prioridad: int = 0
+    grupo: str | None = None
+    lista: str | None = None
+    detalle: str | None = None
+
+    @classmethod
+    def desde_dict(cls, d: dict) -> "Regla":
+        mensaje = d["mensaje"]
+        return cls(
+            nombre=d["nombre"],
+            mensaje=(mensaje,) if isinstance(mensaje, str) else tuple(mensaje),
+            si=tuple(d.get("si", ())),
+            prioridad=int(d.get("prioridad", 0)),
+            grupo=d.get("grupo"),
+            lista=d.get("lista"),
+            detalle=d.get("detalle"),
+        )
+
+
+def cargar_reglas(ruta: str | Path = RUTA_REGLAS) -> list[Regla]:
+    """Reglas de [[regla]] en el TOML, en el orden del fichero."""
+    from src.data.load_data import load_config
+    return [Regla.desde_dict(d) for d in load_config(ruta).get("regla", [])]
+
+
+# ======================================================
+# EVALUACIÓN (vectorizada por regla)
+# ======================================================
+
+def _operando(tabla: pd.DataFrame, texto: str):
+    """Columna de la tabla, número o cadena (entre comillas)."""
+    texto = texto.strip()
+    if texto in tabla.columns:
+        return tabla[texto]
+    if texto[:1] in "'\"" and texto[-1:] == texto[:1]:
+        return texto[1:-1]
+    return float(texto)
+
+
+def cumple(tabla: pd.DataFrame, condicion: str) -> np.ndarray:
+    """Máscara de las filas que cumplen `condicion` (columnas ausentes = no cumple)."""
+    m = _CONDICION.match(condicion)
+    if not m:
+        raise ValueError(f"Condición no válida: {condicion!r}")
+    columna, op, valor = m.groups()
+    if columna not in tabla.columns:
+        return np.zeros(len(tabla), dtype=bool)
+    serie = tabla[columna]
+    presente = serie.notna() & (serie.astype("string") != "")
+    if op is None:
+        return presente.to_numpy(dtype=bool)
+    valor = _operando(tabla, valor)
+    if isinstance(valor, float):
+        serie = pd.to_numeric(serie, errors="coerce")
+    resultado = OPERADORES[op](serie, valor)
+    return (presente & resultado.fillna(False).astype(bool)).to_numpy(dtype=bool)
+
+
+def _formatear(regla: Regla, fila: dict) -> str:
+    lineas = [regla.mensaje[0].format(**fila)]
+    if regla.lista and regla.detalle:
+        lineas += [regla.detalle.format(clave=k, valor=v, **fila) for k, v in fila[regla.lista]]
+    lineas += [m.format(**fila) for m in regla.mensaje[1:]]
+    return "\n".join(lineas)
+
+
+def evaluar_reglas(tabla: pd.DataFrame, reglas: list[Regla]) -> pd.DataFrame:
+    """
+    Reglas disparadas: una fila por (fila de `tabla`, regla) con su texto,
+    ordenadas por fila y prioridad. En cada grupo solo queda la de más prioridad.
+    """
+    tabla = tabla.reset_index(drop=True)
+    disparos = []
+    for orden, regla in enumerate(reglas):
+        mascara = np.ones(len(tabla), dtype=bool)
+        for condicion in regla.si:
+            mascara &= cumple(tabla, condicion)
+        filas = np.flatnonzero(mascara)
+        if len(filas):
+            disparos.append(pd.DataFrame({
+                "fila": filas, "orden": orden, "regla": regla.nombre,
+                "grupo": regla.grupo or f"_{regla.nombre}", "prioridad": regla.prioridad,
+            }))
+    if not disparos:
+        return pd.DataFrame(columns=["fila", "regla", "prioridad", "texto"])
+
+    disparos = (pd.concat(disparos, ignore_index=True)
+                .sort_values(["fila", "prioridad", "orden"], ascending=[True, False, True])
+                .drop_duplicates(["fila", "grupo"]))
+    por_nombre = {r.nombre: r for r in reglas}
+    registros = tabla.to_dict(orient="records")
+    disparos["texto"] = [_formatear(por_nombre[r], registros[f])
+                         for f, r in zip(disparos["fila"], disparos["regla"])]
+    return disparos[["fila", "regla", "prioridad", "texto"]].reset_index(drop=True)
+
+
+def textos_reglas(tabla: pd.DataFrame, reglas: list[Regla], separador: str = "\n\n",
+                  sin_reglas: str = "") -> list[str]:
+    """Texto de cada fila de `tabla`: los mensajes de sus reglas, en orden de prioridad."""
+    disparos = evaluar_reglas(tabla, reglas)
+    textos = disparos.groupby("fila", sort=True)["texto"].agg(separador.join)
+    return [textos.get(i, sin_reglas) for i in range(len(tabla))]
@@ -0,0 +1,256 @@
+"""
+Modelo de Markov de secuencias de golpes.
+-----------------------------------------
+Cada golpe es un estado (jugador, pareja, golpe, pared, zona de destino) y
+cada punto una cadena de estados que termina en un estado absorbente según el
+último golpe: el que golpea gana (winner / fuerza error) o pierde (error no
+forzado / missed). Los conteos se guardan dispersos, solo las transiciones
+observadas:
+
+    transiciones: origen | destino | n | gana | conocidos
+      destino >= 0  → id del siguiente golpe del punto
+      FIN_GANA / FIN_PIERDE / FIN_SIN_RESULTADO → el punto acaba ahí
+      gana          → veces que la pareja del golpe DESTINO ganó el punto
+      conocidos     → veces con resultado conocido
+
+De ahí salen, sin volver a los golpes:
+    - p_gana de cada estado (empírica) y la de la cadena (probabilidad de
+      absorción, iterando sobre las transiciones dispersas);
+    - consultas del tipo "¿qué nos da el punto después de la bandeja rival?"
+      (tras(...)), ordenadas por la cota inferior de p_gana.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.intervalos import intervalos_tasas
+from src.analysis.zonas_pista import RejillaPista, asegurar_celdas
+
+ATRIBUTOS = ["jugador", "pareja", "golpe", "pared", "zona"]
+SIN_PARED = "Sin pared"
+
+FIN_GANA, FIN_PIERDE, FIN_SIN_RESULTADO = -1, -2, -3
+
+# categoría del último golpe → ¿gana el punto la pareja que lo da?
+GANA_TIRADOR = {"winner": 1.0, "fuerza_error": 1.0, "error no forzado": 0.0, "missed": 0.0}
+
+
+def _mascara(tabla: pd.DataFrame, filtro: dict) -> np.ndarray:
+    """Filas de `tabla` que cumplen el filtro (escalar o lista; None = todos)."""
+    m = np.ones(len(tabla), dtype=bool)
+    for col, valor in filtro.items():
+        if valor is not None:
+            valores = [valor] if np.isscalar(valor) else list(valor)
+            m &= tabla[col].isin([str(v) for v in valores]).to_numpy()
+    return m
+
+
+class ModeloSecuencias:
+    """Estados (ATRIBUTOS + n, gana, conocidos) y transiciones dispersas entre ellos."""
+
+    def __init__(self, estados: pd.DataFrame, transiciones: pd.DataFrame):
+        self.estados = estados.reset_index(drop=True)
+        self.transiciones = transiciones.reset_index(drop=True)
+        self._p_markov = None
+
+    def __len__(self) -> int:
+        return len(self.estados)
+
+    # ------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------
+    @classmethod
+    def vacio(cls) -> "ModeloSecuencias":
+        """Modelo sin estados ni transiciones (p. ej. un partido sin golpes)."""
+        estados = pd.DataFrame({**{a: pd.Series(dtype="string") for a in ATRIBUTOS},
+                                **{c: pd.Series(dtype=np.int64) for c in ("n", "gana", "conocidos")}})
+        transiciones = pd.DataFrame({c: pd.Series(dtype=np.int64)
+                                     for c in ("origen", "destino", "n", "gana", "conocidos")})
+        return cls(estados, transiciones)
+
+    @classmethod
+    def desde_golpes(
+        cls,
+        df: pd.DataFrame,
+        claves_punto: list[str] = ("partido", "set_real", "juego_real", "punto_real"),
+        columnas_xy: list[str] = ("inicio_x", "inicio_y", "fin_x", "fin_y"),
+        col_jugador: str = "jugador",
+        col_pareja: str = "pareja_id",
+        col_golpe: str = "golpe_q",
+        col_pared: str = "pared",
+        col_categ: str = "categoria_punto",
+        rejilla: RejillaPista | None = None,
+        disposicion: str = "profundidad",
+    ) -> "ModeloSecuencias":
+        """
+        `df` en orden temporal. Un punto = valores iguales de `claves_punto`
+        (las que existan); solo cuentan las filas con jugador y golpe.
+        """
+        golpes = df[df[col_jugador].notna() & df[col_golpe].notna()]
+        if golpes.empty:
+            return cls.vacio()
+        claves = [c for c in claves_punto if c in golpes.columns]
+        punto = golpes.groupby(claves, sort=False, dropna=False).ngroup().to_numpy() if claves \
+            else np.zeros(len(golpes), dtype=np.int64)
+        orden = np.argsort(punto, kind="stable")   # golpes de cada punto contiguos, en su orden
+        golpes, punto = golpes.iloc[orden], punto[orden]
+
+        rejilla = rejilla or RejillaPista()
+        celdas = asegurar_celdas(golpes, list(columnas_xy), rejilla)["celda_fin"]
+        pared = golpes[col_pared] if col_pared in golpes.columns else pd.Series(pd.NA, index=golpes.index)
+
+        attrs = pd.DataFrame({
+            "jugador": golpes[col_jugador].astype("string"),
+            "pareja": golpes[col_pareja].astype("string").fillna("") if col_pareja in golpes.columns else "",
+            "golpe": golpes[col_golpe].astype("string").str.strip(),
+            "pared": pared.astype("string").str.strip().replace("", pd.NA).fillna(SIN_PARED),
+            "zona": rejilla.zonas(celdas, disposicion),
+        }, index=golpes.index)
+        codigos, unicos = pd.MultiIndex.from_frame(attrs).factorize()
+        estados = unicos.to_frame(index=False, name=ATRIBUTOS)
+        n_estados = len(estados)
+
+        # resultado del punto según su último golpe
+        ultimo = np.r_[punto[1:] != punto[:-1], True]
+        cat = golpes[col_categ].astype("string").str.strip().str.lower() if col_categ in golpes.columns \
+            else pd.Series(pd.NA, index=golpes.index, dtype="string")
+        gana_ultimo = cat.map(GANA_TIRADOR).to_numpy(dtype=float)
+
+        id_ultimo = np.flatnonzero(ultimo)[np.cumsum(np.r_[0, ultimo[:-1]])]   # fila del último golpe de su punto
+        pareja = attrs["pareja"].to_numpy(dtype=object)
+        gana_ult = gana_ultimo[id_ultimo]
+        gana = np.where(np.isnan(gana_ult), np.nan,
+                        (pareja == pareja[id_ultimo]) == (gana_ult == 1.0)).astype(float)
+        conocido = ~np.isnan(gana)
+
+        # transiciones: golpe → siguiente del mismo punto, y último golpe → fin
+        sigue = ~ultimo[:-1]
+        fin = np.where(np.isnan(gana_ultimo[ultimo]), FIN_SIN_RESULTADO,
+                       np.where(gana_ultimo[ultimo] == 1.0, FIN_GANA, FIN_PIERDE))
+        origen = np.r_[codigos[:-1][sigue], codigos[ultimo]]
+        destino = np.r_[codigos[1:][sigue], fin]
+        gana_dest = np.r_[gana[1:][sigue], gana[ultimo]]
+
+        clave = origen * (n_estados + 3) + (destino + 3)
+        unicas, inversa = np.unique(clave, return_inverse=True)
+        transiciones = pd.DataFrame({
+            "origen": unicas // (n_estados + 3),
+            "destino": unicas % (n_estados + 3) - 3,
+            "n": np.bincount(inversa),
+            "gana": np.bincount(inversa, weights=np.nan_to_num(gana_dest)).astype(np.int64),
+            "conocidos": np.bincount(inversa, weights=~np.isnan(gana_dest)).astype(np.int64),
+        })
+
+        estados["n"] = np.bincount(codigos, minlength=n_estados)
+        estados["gana"] = np.bincount(codigos, weights=np.nan_to_num(gana), minlength=n_estados).astype(np.int64)
+        estados["conocidos"] = np.bincount(codigos, weights=conocido, minlength=n_estados).astype(np.int64)
+        return cls(estados, transiciones)
+
+    # ------------------------------------------------------
+    # Probabilidades
+    # ------------------------------------------------------
+    def probabilidad_markov(self, max_iter: int = 500, tol: float = 1e-10) -> np.ndarray:
+        """
+        P(la pareja del estado gana el punto) por absorción de la cadena:
+            h(s) = P(s→FIN_GANA) + Σ P(s→t)·[h(t) si misma pareja, si no 1 − h(t)]
+        con P normalizada sobre las salidas de resultado conocido.
+        """
+        if self._p_markov is not None:
+            return self._p_markov
+        t = self.transiciones[self.transiciones["destino"] != FIN_SIN_RESULTADO]
+        origen, destino, n = (t[c].to_numpy() for c in ("origen", "destino", "n"))
+        salida = np.bincount(origen, weights=n, minlength=len(self))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            p = n / salida[origen]
+        b = np.bincount(origen, weights=p * (destino == FIN_GANA), minlength=len(self)).astype(float)
+
+        internas = destino >= 0
+        o, d, pi = origen[internas], destino[internas], p[internas]
+        pareja = self.estados["pareja"].to_numpy(dtype=object)
+        misma = pareja[o] == pareja[d]
+
+        h = np.full(len(self), 0.5)
+        for _ in range(max_iter):
+            hd = np.where(misma, h[d], 1.0 - h[d])
+            nuevo = b + np.bincount(o, weights=pi * hd, minlength=len(self))
+            nuevo[salida == 0] = 0.5
+            if np.max(np.abs(nuevo - h), initial=0.0) < tol:
+                h = nuevo
+                break
+            h = nuevo
+        h[salida == 0] = np.nan
+        self._p_markov = h
+        return h
+
+    def tabla_estados(self, **filtro) -> pd.DataFrame:
+        """Estados con p_gana (empírica), p_gana_markov y su intervalo."""
+        e = self.estados.assign(p_gana_markov=self.probabilidad_markov())
+        e = e[_mascara(e, filtro)]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            e["p_gana"] = e["gana"] / e["conocidos"].replace(0, np.nan)
+        cotas = intervalos_tasas(pd.DataFrame({"gana": e["gana"], "pierde": e["conocidos"] - e["gana"]}),
+                                 {"p_gana": (["gana"], [])}, metodo="beta")
+        return e.join(cotas)
+
+    # ------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------
+    def tras(self, por=("golpe", "zona"), responden: dict | None = None, min_n: int = 1,
+             intervalos: dict | None = None, **filtro_origen) -> pd.DataFrame:
+        """
+        Golpes que siguen a los estados de `filtro_origen` (p. ej. golpe="Bandeja",
+        jugador=[rivales]), agrupados por `por` del golpe siguiente y, si se da,
+        solo los que cumplen `responden` (p. ej. jugador=[nuestros]).
+        Columnas: n, pct (sobre todo lo que sigue al origen, incluido el fin del
+        punto), gana, conocidos, p_gana, p_gana_markov y p_gana_inf/_sup; orden
+        por p_gana_inf.
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        origenes = np.flatnonzero(_mascara(self.estados, filtro_origen))
+        t = self.transiciones[self.transiciones["origen"].isin(origenes)]
+        total = t["n"].sum()
+
+        t = t[t["destino"] >= 0]
+        destinos = self.estados.loc[t["destino"].to_numpy()].reset_index(drop=True)
+        t = t.reset_index(drop=True)
+        m = _mascara(destinos, responden or {})
+        t, destinos = t[m], destinos[m]
+        if t.empty:
+            return pd.DataFrame(columns=por + ["n", "pct", "gana", "conocidos", "p_gana", "p_gana_markov"])
+
+        h = self.probabilidad_markov()[t["destino"].to_numpy()]
+        tabla = pd.DataFrame({
+            **{c: destinos[c].to_numpy() for c in por},
+            "n": t["n"].to_numpy(),
+            "gana": t["gana"].to_numpy(),
+            "conocidos": t["conocidos"].to_numpy(),
+            "_h": np.nan_to_num(h) * t["n"].to_numpy(),
+        }).groupby(por, sort=False).sum()
+        tabla = tabla[tabla["n"] >= min_n]
+
+        tabla["pct"] = tabla["n"] / total
+        tabla["p_gana"] = tabla["gana"] / tabla["conocidos"].replace(0, np.nan)
+        tabla["p_gana_markov"] = tabla.pop("_h") / tabla["n"]
+        cotas = intervalos_tasas(pd.DataFrame({"gana": tabla["gana"], "pierde": tabla["conocidos"] - tabla["gana"]}),
+                                 {"p_gana": (["gana"], [])}, **(intervalos or {"metodo": "beta"}))
+        tabla = tabla.join(cotas)
+        return tabla.sort_values(["p_gana_inf", "n"], ascending=False)
+
+    # ------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------
+    def guardar(self, carpeta: str | Path, prefijo: str = "secuencias") -> Path:
+        carpeta = Path(carpeta)
+        carpeta.mkdir(parents=True, exist_ok=True)
+        self.estados.to_parquet(carpeta / f"{prefijo}_estados.parquet", index=False)
+        self.transiciones.to_parquet(carpeta / f"{prefijo}_transiciones.parquet", index=False)
+        return carpeta
+
+    @classmethod
+    def cargar(cls, carpeta: str | Path, prefijo: str = "secuencias") -> "ModeloSecuencias":
+        carpeta = Path(carpeta)
+        return cls(pd.read_parquet(carpeta / f"{prefijo}_estados.parquet"),
+                   pd.read_parquet(carpeta / f"{prefijo}_transiciones.parquet"))
@@ -0,0 +1,321 @@
+"""
+Simulador Monte Carlo de partidos a partir de probabilidades de punto al saque.
+------------------------------------------------------------------------------
+Con la probabilidad de que cada pareja gane un punto con su saque (global o
+por situación: normal, bola de break, punto de oro, tie-break) se simulan a
+la vez cientos de miles de partidos con arrays de numpy: cada iteración juega
+un juego (o un tie-break) en todos los partidos aún abiertos. P(ganar el juego
+al saque) y P(ganar el tie-break) se calculan exactas sobre el marcador de
+puntos, así que un partido son ~25 sorteos en vez de ~150.
+
+    p_saque = [0.62, {"normal": 0.60, "break": 0.55}]   # pareja 0 y pareja 1
+
+Devuelve P(ganar el partido), reparto de resultados por sets y % de juegos
+ganados al saque; `sensibilidad` mide cuánto cambia P(ganar) al mejorar cada
+estadística (saque propio +delta o resto = saque rival −delta). Todas las
+variantes usan los mismos números aleatorios, así que las diferencias no se
+pierden en el ruido de la simulación.
+
+Desde los datos (puntos_desde_golpes), el ganador de cada punto sale de cómo
+cambia marcador_puntos. En el tie-break (juegos 6-6) crear_marcador guarda los
+puntos como números; en datos limpiados antes de eso el tie-break queda a
+"0-0", sus puntos no tienen ganador y la situación "tiebreak" usa la
+probabilidad global de la pareja al saque (probabilidades_saque, min_puntos).
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.score_utils import JUEGOS_TIEBREAK
+
+SITUACIONES = ("normal", "break", "oro", "tiebreak")
+# claves en mayúsculas: crear_marcador (score_utils.PUNTOS_MAP) escribe la ventaja como "adv"
+VALOR_PUNTOS = {"0": 0, "15": 1, "30": 2, "40": 3, "ADV": 4, "AD": 4, "A": 4, "V": 4}
+
+
+@dataclass(frozen=True)
+class FormatoPartido:
+    sets_para_ganar: int = 2
+    juegos_set: int = 6
+    tiebreak: bool = True        # a juegos_set iguales
+    punto_oro: bool = True       # 40-40 se decide en un punto
+    puntos_tiebreak: int = 7
+
+
+def simulacion_configurada(config_path: str | Path = "config/config.toml") -> dict:
+    """[simulacion] partidos, delta y min_puntos del config; semilla de [repro] seed."""
+    from src.analysis.intervalos import semilla_configurada
+    cfg = {}
+    config_path = Path(config_path)
+    if config_path.exists():
+        from src.data.load_data import load_config
+        cfg = load_config(config_path).get("simulacion", {})
+    return {
+        "n": int(cfg.get("partidos", 200_000)),
+        "delta": float(cfg.get("delta", 0.02)),
+        "min_puntos": int(cfg.get("min_puntos", 10)),
+        "semilla": semilla_configurada(config_path),
+    }
+
+
+def tabla_probabilidades(p_saque) -> np.ndarray:
+    """
+    (2, len(SITUACIONES)) a partir de, por pareja, un número, un dict por
+    situación o una fila ya completa. Situaciones que faltan = la "normal".
+    """
+    tabla = np.empty((2, len(SITUACIONES)))
+    for i, p in enumerate(p_saque):
+        if np.ndim(p) == 1:
+            p = dict(zip(SITUACIONES, p))
+        elif not isinstance(p, dict):
+            p = {"normal": float(p)}
+        base = float(p.get("normal", np.mean(list(p.values()))))
+        tabla[i] = [float(p.get(s, base)) for s in SITUACIONES]
+    return tabla
+
+
+# ======================================================
+# JUEGO Y TIE-BREAK (exactos)
+# ======================================================
+# Dentro de un juego los puntos solo dependen de quién saca y de la situación,
+# así que P(ganar el juego al saque) y P(ganar el tie-break) salen exactas de
+# una recursión sobre el marcador; la simulación solo tiene que sortear juegos.
+
+def prob_juego(p: np.ndarray, punto_oro: bool = True) -> float:
+    """P(el que saca gana el juego) con p = fila de tabla_probabilidades."""
+    p_normal, p_break, p_oro = p[0], p[1], p[2]
+    if punto_oro:
+        iguales = p_oro
+    else:
+        # 40-40: ventaja al saque (normal) o al resto (break)
+        iguales = p_normal ** 2 / (1 - p_normal * (1 - p_normal) - (1 - p_normal) * p_break)
+
+    memo = {}
+    def desde(ps, pr):
+        if ps == 4:
+            return 1.0
+        if pr == 4:
+            return 0.0
+        if ps == 3 and pr == 3:
+            return iguales
+        if (ps, pr) not in memo:
+            q = p_break if pr == 3 and pr > ps else p_normal
+            memo[ps, pr] = q * desde(ps + 1, pr) + (1 - q) * desde(ps, pr + 1)
+        return memo[ps, pr]
+    return float(desde(0, 0))
+
+
+def prob_tiebreak(q_primero: float, q_segundo: float, puntos: int = 7) -> float:
+    """
+    P(gana el tie-break la pareja que saca el primer punto), con q = P(ganar
+    el punto al saque) de cada una. Saque: 1 punto y luego de 2 en 2.
+    """
+    # empatados a partir de puntos-1: cada par de puntos tiene un saque de cada uno
+    gana_dos, pierde_dos = q_primero * (1 - q_segundo), (1 - q_primero) * q_segundo
+    iguales = gana_dos / (gana_dos + pierde_dos) if gana_dos + pierde_dos > 0 else 0.5
+
+    memo = {}
+    def desde(a, b):
+        if a >= puntos and a - b >= 2:
+            return 1.0
+        if b >= puntos and b - a >= 2:
+            return 0.0
+        if a == b and a >= puntos - 1:
+            return iguales
+        if (a, b) not in memo:
+            q = q_primero if ((a + b + 1) // 2) % 2 == 0 else 1 - q_segundo
+            memo[a, b] = q * desde(a + 1, b) + (1 - q) * desde(a, b + 1)
+        return memo[a, b]
+    return float(desde(0, 0))
+
+
+# ======================================================
+# SIMULACIÓN
+# ======================================================
+
+def _simular(tabla: np.ndarray, n: int, formato: FormatoPartido, saca_primero, semilla: int) -> dict:
+    """Todos los partidos a la vez, un juego por iteración (pareja a = 0, b = 1)."""
+    i_tb = SITUACIONES.index("tiebreak")
+    mantiene = np.array([prob_juego(tabla[k], formato.punto_oro) for k in (0, 1)])
+    # P(gana b) en el tie-break según quién saca primero (a, b)
+    tb_gana_b = np.array([
+        1 - prob_tiebreak(tabla[0, i_tb], tabla[1, i_tb], formato.puntos_tiebreak),
+        prob_tiebreak(tabla[1, i_tb], tabla[0, i_tb], formato.puntos_tiebreak),
+    ])
+    p_gana_b_juego = np.array([1 - mantiene[0], mantiene[1]])
+
+    rng = np.random.default_rng(semilla)
+    saca = (rng.random(n) < 0.5) if saca_primero is None else np.full(n, bool(saca_primero))  # True = saca b
+    ga, gb, sa, sb = (np.zeros(n, dtype=np.int64) for _ in range(4))
+    jugados = np.zeros((n, 2), dtype=np.int64)     # juegos al saque (sin tie-breaks) por pareja
+    ganados = np.zeros((n, 2), dtype=np.int64)
+    activo = np.ones(n, dtype=bool)
+
+    while activo.any():
+        # el sorteo se hace para todos los partidos: mismas series aleatorias en todas las variantes
+        u = rng.random(n)
+        en_tb = formato.tiebreak & (ga == formato.juegos_set) & (gb == formato.juegos_set)
+        i_saca = saca.astype(np.intp)
+        gana_b = u < np.where(en_tb, tb_gana_b[i_saca], p_gana_b_juego[i_saca])
+
+        juego = activo & ~en_tb
+        mantiene_saque = juego & (gana_b == saca)
+        jugados[:, 0] += juego & ~saca
+        jugados[:, 1] += juego & saca
+        ganados[:, 0] += mantiene_saque & ~saca
+        ganados[:, 1] += mantiene_saque & saca
+        ga += activo & ~gana_b
+        gb += activo & gana_b
+        saca = np.where(activo, ~saca, saca)   # tras el tie-break empieza el set el que restó primero
+
+        gw, gl = np.where(gana_b, gb, ga), np.where(gana_b, ga, gb)
+        fin_set = activo & (en_tb | ((gw >= formato.juegos_set) & (gw - gl >= 2)))
+        sa += fin_set & ~gana_b
+        sb += fin_set & gana_b
+        ga[fin_set] = 0
+        gb[fin_set] = 0
+        activo &= ~(fin_set & (np.maximum(sa, sb) >= formato.sets_para_ganar))
+
+    return {"sets": np.column_stack([sa, sb]), "jugados": jugados, "ganados": ganados,
+            "p_juego_exacta": mantiene, "p_tiebreak_exacta": tb_gana_b}
+
+
+def simular_partidos(p_saque, n: int = 200_000, formato: FormatoPartido = FormatoPartido(),
+                     saca_primero: int | None = None, semilla: int | None = None) -> dict:
+    """
+    P(gana la pareja 0), reparto de resultados por sets y % de juegos ganados
+    al saque de cada pareja. saca_primero None = sorteo 50/50.
+    """
+    if semilla is None:
+        from src.analysis.intervalos import semilla_configurada
+        semilla = semilla_configurada()
+    r = _simular(tabla_probabilidades(p_saque), n, formato, saca_primero, semilla)
+    sets = r["sets"]
+    resultado = pd.DataFrame(sets).value_counts(normalize=True).sort_index()
+    resultado.index = [f"{a}-{b}" for a, b in resultado.index]
+    return {
+        "n": n,
+        "p_gana": float((sets[:, 0] > sets[:, 1]).mean()),
+        "resultados": resultado.to_dict(),
+        "p_juego_saque": (r["ganados"].sum(axis=0) / np.maximum(r["jugados"].sum(axis=0), 1)).tolist(),
+        "p_juego_saque_exacta": r["p_juego_exacta"].tolist(),
+    }
+
+
+def sensibilidad(p_saque, delta: float = 0.02, n: int = 200_000,
+                 formato: FormatoPartido = FormatoPartido(), semilla: int | None = None,
+                 nombres=("pareja 0", "pareja 1")) -> pd.DataFrame:
+    """
+    Para cada pareja y situación: Δ P(ganar el partido) al mejorar su saque
+    (+delta) o su resto (saque rival −delta). `saca` / `p_punto`: la pareja
+    cuyo saque se modifica y su P(punto) de partida. Ordenado de mayor a menor impacto.
+    """
+    base = tabla_probabilidades(p_saque)
+    p_base = simular_partidos(base, n, formato, semilla=semilla)["p_gana"]
+
+    filas = []
+    for pareja in (0, 1):
+        for aspecto, sobre, signo in (("saque", pareja, 1), ("resto", 1 - pareja, -1)):
+            for j, situacion in enumerate(SITUACIONES):
+                t = base.copy()
+                t[sobre, j] = np.clip(t[sobre, j] + signo * delta, 0.0, 1.0)
+                p0 = simular_partidos(t, n, formato, semilla=semilla)["p_gana"]
+                p_pareja_base = p_base if pareja == 0 else 1 - p_base
+                p_pareja = p0 if pareja == 0 else 1 - p0
+                filas.append({
+                    "pareja": nombres[pareja], "aspecto": aspecto, "saca": nombres[sobre], "situacion": situacion,
+                    "p_punto": base[sobre, j], "p_gana_base": p_pareja_base,
+                    "p_gana": p_pareja, "delta_p_gana": p_pareja - p_pareja_base,
+                })
+    return pd.DataFrame(filas).sort_values(["pareja", "delta_p_gana"], ascending=[True, False], ignore_index=True)
+
+
+# ======================================================
+# PROBABILIDADES DESDE LOS DATOS
+# ======================================================
+
+def _marcador(serie: pd.Series, tiebreak=None) -> pd.DataFrame:
+    """
+    '15-30' → columnas (a, b) numéricas; 'ADV' = 4. En las filas de `tiebreak`
+    (máscara) los puntos son números y se leen tal cual: '15' es 15, no 1.
+    """
+    partes = serie.astype("string").str.upper().str.replace(" ", "", regex=False).str.split("-", n=1, expand=True)
+    partes = partes.reindex(columns=[0, 1])
+    numeros = partes.apply(lambda c: pd.to_numeric(c, errors="coerce")).astype("float64")
+    valores = partes.apply(lambda c: c.map(VALOR_PUNTOS).fillna(pd.to_numeric(c, errors="coerce"))).astype("float64")
+    if tiebreak is not None:
+        valores = valores.mask(pd.Series(np.asarray(tiebreak, dtype=bool), index=valores.index), numeros, axis=0)
+    return valores
+
+
+def puntos_desde_golpes(df: pd.DataFrame, cols_saca=("saca_pareja_id", "saca_pareja")) -> pd.DataFrame:
+    """
+    Un registro por punto (partido, set_real, juego_real, punto_real): pareja
+    que saca (1/2), pareja que gana (por cómo cambia el marcador) y situación.
+    La pareja que saca es la primera de `cols_saca` con valor en el juego.
+    """
+    claves = [c for c in ("partido", "set_real", "juego_real", "punto_real") if c in df.columns]
+    juego = [c for c in claves if c != "punto_real"]
+    saca = pd.Series(np.nan, index=df.index)
+    for c in reversed([c for c in cols_saca if c in df.columns]):
+        saca = pd.to_numeric(df[c], errors="coerce").fillna(saca)
+    df = df.assign(_saca=saca)
+
+    puntos = df.groupby(claves, sort=False)[["marcador_sets", "marcador_juegos", "marcador_puntos"]].first()
+    saca_juego = df.groupby(juego, sort=False)["_saca"].first()   # primer valor no nulo del juego
+    puntos["saca"] = saca_juego.reindex(puntos.index.droplevel("punto_real")).to_numpy()
+    puntos = puntos.reset_index()
+
+    # tie-break: el siguiente punto del mismo juego también lo es (si cambia de juego, post no se usa)
+    tb = puntos["marcador_juegos"].astype("string").str.replace(" ", "", regex=False).eq(
+        f"{JUEGOS_TIEBREAK}-{JUEGOS_TIEBREAK}").to_numpy()
+    pre, post = _marcador(puntos["marcador_puntos"], tb), _marcador(puntos["marcador_puntos"].shift(-1), tb)
+    jpre, jpost = _marcador(puntos["marcador_juegos"]), _marcador(puntos["marcador_juegos"].shift(-1))
+    spre, spost = _marcador(puntos["marcador_sets"]), _marcador(puntos["marcador_sets"].shift(-1))
+    mismo_juego = (puntos[juego].shift(-1) == puntos[juego]).all(axis=1).to_numpy()
+
+    d_p = (post - pre).to_numpy()
+    d_j = np.where(((spost - spre) == 0).all(axis=1).to_numpy()[:, None], (jpost - jpre).to_numpy(),
+                   (spost - spre).to_numpy())
+    gana_punto = np.select(
+        [(d_p[:, 0] > 0) & (d_p[:, 1] <= 0), (d_p[:, 1] > 0) & (d_p[:, 0] <= 0), d_p[:, 0] < 0, d_p[:, 1] < 0],
+        [1, 2, 2, 1], default=0)
+    gana_juego = np.select([(d_j[:, 0] == 1) & (d_j[:, 1] == 0), (d_j[:, 1] == 1) & (d_j[:, 0] == 0)], [1, 2], default=0)
+    puntos["gana"] = pd.array(np.where(mismo_juego, gana_punto, gana_juego), dtype="Int8")
+    puntos.loc[puntos["gana"] == 0, "gana"] = pd.NA
+
+    saca = pd.to_numeric(puntos["saca"], errors="coerce")
+    a, b = pre[0].to_numpy(), pre[1].to_numpy()
+    ps = np.where(saca == 1, a, b)
+    pr = np.where(saca == 1, b, a)
+    puntos["situacion"] = np.select(
+        [tb, (ps == 3) & (pr == 3), (pr >= 3) & (pr > ps)], ["tiebreak", "oro", "break"], default="normal")
+    puntos["saca"] = saca.astype("Int8")
+    return puntos
+
+
+def probabilidades_saque(puntos: pd.DataFrame, min_puntos: int = 10) -> tuple[list, pd.DataFrame]:
+    """
+    p_saque por pareja (1, 2) y situación. Las situaciones con menos de
+    `min_puntos` puntos usan la probabilidad global de esa pareja al saque.
+    Devuelve (p_saque para simular_partidos, tabla con n y p).
+    """
+    validos = puntos.dropna(subset=["saca", "gana"])
+    validos = validos.assign(gana_saque=(validos["saca"] == validos["gana"]).astype(int))
+    global_ = validos.groupby("saca")["gana_saque"].agg(["size", "mean"])
+    por_sit = validos.groupby(["saca", "situacion"])["gana_saque"].agg(["size", "mean"])
+
+    p_saque, filas = [], []
+    for pareja in (1, 2):
+        n_g, p_g = global_.loc[pareja] if pareja in global_.index else (0, 0.5)
+        p = {}
+        for s in SITUACIONES:
+            n_s, p_s = por_sit.loc[(pareja, s)] if (pareja, s) in por_sit.index else (0, np.nan)
+            p[s] = float(p_s) if n_s >= min_puntos else float(p_g)
+            filas.append({"pareja": pareja, "situacion": s, "puntos": int(n_s), "p_punto": p[s]})
+        p_saque.append(p)
+    return p_saque, pd.DataFrame(filas)
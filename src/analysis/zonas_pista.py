@@ -0,0 +1,138 @@
+"""
+Zonas de pista: celdas de una rejilla N × M y disposiciones de zonas con nombre.
+-------------------------------------------------------------------------------
+Cada golpe se asigna UNA vez a una celda (entero) de la rejilla, para el inicio
+y para el fin del golpe, y esos ids se guardan con los datos procesados
+(celda_inicio / celda_fin). Una disposición ("lateral", "profundidad"...) es
+solo una etiqueta por celda, así que pasar de conteos por celda a conteos por
+zona es indexar un array: no se vuelven a comparar coordenadas.
+
+    id de celda = fila * nx + columna   (fila a lo largo, columna a lo ancho)
+    -1 / NA     = golpe sin coordenadas
+
+Las etiquetas de una celda salen de su centro; con una rejilla alineada con los
+cortes de la disposición (nx par, ny múltiplo de 3 para las de abajo) el
+resultado es el mismo que comparar las coordenadas directamente.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ANCHO_PISTA = 100.0   # coordenadas de M3
+LARGO_PISTA = 200.0
+
+SIN_ZONA = "Desconocida"
+COLUMNAS_CELDA = ("celda_inicio", "celda_fin")
+ATRIBUTO_REJILLA = "rejilla_zonas"   # df.attrs: rejilla con la que se calcularon las celdas
+
+
+# ======================================================
+# DISPOSICIONES (etiqueta de zona a partir del centro de la celda)
+# ======================================================
+
+def _lateral(cx, cy, ancho, largo):
+    return np.where(cx < ancho / 2, "Izquierda", "Derecha")
+
+def _profundidad(cx, cy, ancho, largo):
+    tercio = largo / 3
+    return np.select([cy <= tercio, cy <= 2 * tercio], ["Fondo", "Media pista"], "Cerca de red")
+
+DISPOSICIONES = {
+    "lateral": _lateral,
+    "profundidad": _profundidad,
+}
+
+
+@dataclass(frozen=True)
+class RejillaPista:
+    """Rejilla nx (ancho) × ny (largo) sobre una pista de ancho × largo."""
+    nx: int = 4
+    ny: int = 6
+    ancho: float = ANCHO_PISTA
+    largo: float = LARGO_PISTA
+
+    @property
+    def n_celdas(self) -> int:
+        return self.nx * self.ny
+
+    @property
+    def clave(self) -> str:
+        return f"{self.nx}x{self.ny}@{self.ancho:g}x{self.largo:g}"
+
+    @classmethod
+    def desde_clave(cls, clave: str) -> "RejillaPista":
+        celdas, pista = clave.split("@")
+        nx, ny = (int(v) for v in celdas.split("x"))
+        ancho, largo = (float(v) for v in pista.split("x"))
+        return cls(nx, ny, ancho, largo)
+
+    def celdas(self, x, y) -> np.ndarray:
+        """Id de celda de cada (x, y); fuera de la pista = celda del borde, sin coordenada = -1."""
+        x = pd.to_numeric(pd.Series(x), errors="coerce").to_numpy(dtype=float)
+        y = pd.to_numeric(pd.Series(y), errors="coerce").to_numpy(dtype=float)
+        validos = ~(np.isnan(x) | np.isnan(y))
+        col = np.clip(np.floor(np.where(validos, x, 0) / self.ancho * self.nx), 0, self.nx - 1).astype(np.int32)
+        fila = np.clip(np.floor(np.where(validos, y, 0) / self.largo * self.ny), 0, self.ny - 1).astype(np.int32)
+        return np.where(validos, fila * self.nx + col, -1).astype(np.int32)
+
+    def centros(self) -> tuple[np.ndarray, np.ndarray]:
+        ids = np.arange(self.n_celdas)
+        cx = (ids % self.nx + 0.5) * self.ancho / self.nx
+        cy = (ids // self.nx + 0.5) * self.largo / self.ny
+        return cx, cy
+
+    def etiquetas(self, disposicion: str) -> np.ndarray:
+        """Zona de cada celda (array de n_celdas) según la disposición con nombre."""
+        if disposicion not in DISPOSICIONES:
+            raise ValueError(f"Disposición de zonas desconocida: {disposicion!r} "
+                             f"(disponibles: {', '.join(DISPOSICIONES)})")
+        cx, cy = self.centros()
+        return np.asarray(DISPOSICIONES[disposicion](cx, cy, self.ancho, self.largo), dtype=object)
+
+    def zonas(self, celdas, disposicion: str) -> np.ndarray:
+        """Etiqueta de zona de cada id de celda (-1 / NA = SIN_ZONA)."""
+        ids = pd.to_numeric(pd.Series(celdas), errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+        tabla = np.append(self.etiquetas(disposicion), SIN_ZONA)
+        return tabla[np.where(ids >= 0, ids, self.n_celdas)]
+
+
+# ======================================================
+# CELDAS EN LOS DATOS PROCESADOS
+# ======================================================
+
+def asignar_celdas(df: pd.DataFrame, columnas: list[str], rejilla: RejillaPista) -> pd.DataFrame:
+    """
+    celda_inicio / celda_fin (Int16, NA sin coordenadas) para columnas =
+    [inicio_x, inicio_y, fin_x, fin_y]. Las coordenadas ausentes cuentan como NA.
+    """
+    out = pd.DataFrame(index=df.index)
+    for nombre, (cx, cy) in zip(COLUMNAS_CELDA, (columnas[:2], columnas[2:])):
+        if cx in df.columns and cy in df.columns:
+            ids = rejilla.celdas(df[cx], df[cy])
+        else:
+            ids = np.full(len(df), -1, dtype=np.int32)
+        out[nombre] = pd.Series(ids, index=df.index).where(ids >= 0).astype("Int16")
+    out.attrs[ATRIBUTO_REJILLA] = rejilla.clave
+    return out
+
+def asegurar_celdas(df: pd.DataFrame, columnas: list[str], rejilla: RejillaPista) -> pd.DataFrame:
+    """Las celdas guardadas si se calcularon con esta rejilla; si no, calculadas ahora."""
+    if df.attrs.get(ATRIBUTO_REJILLA) == rejilla.clave and all(c in df.columns for c in COLUMNAS_CELDA):
+        return df[list(COLUMNAS_CELDA)]
+    return asignar_celdas(df, columnas, rejilla)
+
+
+def rejilla_zonas_configurada(config_path: str | Path = "config/config.toml",
+                              ancho: float = ANCHO_PISTA, largo: float = LARGO_PISTA) -> RejillaPista:
+    """[zonas] nx / ny del config (por defecto 4 × 6: alineada con lateral y profundidad)."""
+    nx, ny = RejillaPista.nx, RejillaPista.ny
+    config_path = Path(config_path)
+    if config_path.exists():
+        from src.data.load_data import load_config
+        cfg = load_config(config_path).get("zonas", {})
+        nx, ny = int(cfg.get("nx", nx)), int(cfg.get("ny", ny))
+    return RejillaPista(nx, ny, float(ancho), float(largo))
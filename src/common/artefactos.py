@@ -0,0 +1,108 @@
+"""
+Generación selectiva de informes.
+---------------------------------
+Cada salida de un pipeline (un Excel, una familia de PNG/HTML...) se declara
+como un Artefacto con:
+
+- las etapas de datos que necesita (cargar golpes, inferir saque, ...),
+- los patrones de fichero que produce (relativos a la carpeta de salida).
+
+Con eso se calcula solo lo pedido: un artefacto se omite si todas sus salidas
+existen y son más recientes que las fuentes (p. ej. golpes.parquet), y de las
+etapas solo se ejecutan las que necesitan los artefactos que quedan, en orden
+de dependencias.
+"""
+
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Etapa:
+    """Paso de preparación de datos: calcular(estado) rellena claves de `estado`."""
+    nombre: str
+    calcular: Callable[[dict], None]
+    requiere: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Artefacto:
+    """Salida del informe: generar(estado, out_dir, trabajos) escribe `salidas`."""
+    nombre: str
+    generar: Callable[[dict, str, list], None]
+    requiere: tuple[str, ...] = ()
+    salidas: tuple[str, ...] = ()
+
+
+def nombre_carpeta(nombre: str) -> str:
+    """Nombre usable como una sola carpeta de salida: sin separadores de ruta ni '.'/'..'."""
+    nombre = re.sub(r"[\\/]", "_", str(nombre)).strip()
+    return nombre if nombre.strip(".") else "_"
+
+
+def ficheros(artefacto: Artefacto, out_dir: str | Path) -> list[Path]:
+    out_dir = Path(out_dir)
+    return [p for patron in artefacto.salidas for p in out_dir.glob(patron)]
+
+
+def al_dia(artefacto: Artefacto, out_dir: str | Path, fuentes: list[str | Path]) -> bool:
+    """True si cada patrón de salida tiene ficheros y todos son posteriores a las fuentes."""
+    out_dir = Path(out_dir)
+    if not artefacto.salidas:
+        return False
+    t_fuentes = max((Path(f).stat().st_mtime for f in fuentes if Path(f).exists()), default=0.0)
+    for patron in artefacto.salidas:
+        encontrados = list(out_dir.glob(patron))
+        if not encontrados or min(p.stat().st_mtime for p in encontrados) < t_fuentes:
+            return False
+    return True
+
+
+def seleccionar(
+    artefactos: list[Artefacto],
+    pedidos: list[str] | None,
+    out_dir: str | Path,
+    fuentes: list[str | Path],
+    forzar: bool = False,
+) -> tuple[list[Artefacto], list[Artefacto]]:
+    """
+    Devuelve (a_generar, al_dia) entre los artefactos pedidos (None = todos),
+    conservando el orden de declaración.
+    """
+    disponibles = {a.nombre for a in artefactos}
+    desconocidos = sorted(set(pedidos or []) - disponibles)
+    if desconocidos:
+        raise ValueError(f"Artefactos desconocidos: {desconocidos} (opciones: {sorted(disponibles)})")
+
+    elegidos = [a for a in artefactos if pedidos is None or a.nombre in pedidos]
+    if forzar:
+        return elegidos, []
+    vigentes = [a for a in elegidos if al_dia(a, out_dir, fuentes)]
+    return [a for a in elegidos if a not in vigentes], vigentes
+
+
+def orden_etapas(artefactos: list[Artefacto], etapas: dict[str, Etapa]) -> list[Etapa]:
+    """Etapas necesarias (con sus prerequisitos) en orden topológico."""
+    orden: list[Etapa] = []
+    visitando: set[str] = set()
+
+    def visitar(nombre: str):
+        if any(e.nombre == nombre for e in orden):
+            return
+        if nombre in visitando:
+            raise ValueError(f"Dependencia circular en la etapa {nombre!r}")
+        if nombre not in etapas:
+            raise ValueError(f"Etapa desconocida: {nombre!r}")
+        visitando.add(nombre)
+        for previa in etapas[nombre].requiere:
+            visitar(previa)
+        visitando.discard(nombre)
+        orden.append(etapas[nombre])
+
+    for a in artefactos:
+        for nombre in a.requiere:
+            visitar(nombre)
+    return orden
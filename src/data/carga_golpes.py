@@ -0,0 +1,92 @@
+"""
+Lectura de golpes.parquet: solo las columnas necesarias y con su tipo.
+---------------------------------------------------------------------
+En vez de leer el parquet entero y después renombrar todas las columnas y
+duplicar las de coordenadas, se mira primero el esquema guardado (sin leer
+datos): de ahí salen los nombres normalizados y los alias ("inicio_golpe:_x",
+"inicio_gople_x"...) de cada columna canónica. Luego se leen únicamente las
+columnas pedidas, se renombran en el sitio y se ajustan los tipos.
+"""
+
+from __future__ import annotations
+import re
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Tipos de las columnas conocidas (solo se convierten si no coinciden)
+TIPOS_GOLPES = {
+    "inicio_x": "float64",
+    "inicio_y": "float64",
+    "fin_x": "float64",
+    "fin_y": "float64",
+    "jugador_id": "Int32",
+    "pareja_id": "Int8",
+    "saca_jugador_id": "Int32",
+    "saca_pareja_id": "Int8",
+}
+
+# Alias de las coordenadas en los golpes.parquet (soluciona typos tipo "gople")
+ALIAS_COORDENADAS = {
+    "inicio_x": ["inicio_golpe:_x", "inicio_gople:_x", "inicio_golpe_x"],
+    "inicio_y": ["inicio_golpe:_y", "inicio_gople:_y", "inicio_golpe_y"],
+    "fin_x":    ["fin_golpe:_x", "fin_gople:_x", "fin_golpe_x"],
+    "fin_y":    ["fin_golpe:_y", "fin_gople:_y", "fin_golpe_y"],
+}
+
+
+def normalizar_nombre_columna(c: str) -> str:
+    c = str(c).strip().lower()
+    c = c.replace(" ", "_")
+    c = c.replace(":", "")
+    c = c.replace("-", "_")
+    c = re.sub(r"__+", "_", c)
+    return c
+
+
+def mapa_columnas(ruta: str | Path, alias: dict[str, list[str]] | None = None) -> dict[str, str]:
+    """
+    Nombre normalizado → nombre guardado, leído del esquema del parquet.
+    Las columnas canónicas de `alias` que no existen se resuelven a su primer alias presente.
+    """
+    mapa: dict[str, str] = {}
+    for guardado in pq.read_schema(ruta).names:
+        mapa.setdefault(normalizar_nombre_columna(guardado), guardado)
+
+    for canonica, candidatos in (alias or {}).items():
+        if canonica in mapa:
+            continue
+        for c in candidatos:
+            c_norm = normalizar_nombre_columna(c)
+            if c_norm in mapa:
+                mapa[canonica] = mapa.pop(c_norm)
+                break
+    return mapa
+
+
+def leer_golpes(
+    ruta: str | Path,
+    columnas: list[str] | None = None,
+    alias: dict[str, list[str]] | None = None,
+    tipos: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Lee `columnas` (nombres normalizados/canónicos; None = todas) de golpes.parquet.
+    Las pedidas que no están en el fichero se ignoran: cada análisis comprueba
+    después lo que necesita, como hasta ahora.
+    """
+    mapa = mapa_columnas(ruta, alias)
+    nombres = list(mapa) if columnas is None else [c for c in dict.fromkeys(columnas) if c in mapa]
+
+    df = pd.read_parquet(ruta, columns=[mapa[c] for c in nombres])
+    df.columns = nombres
+
+    tipos = TIPOS_GOLPES if tipos is None else tipos
+    for col, tipo in tipos.items():
+        if col in df.columns and str(df[col].dtype) != tipo:
+            if tipo.startswith("float"):
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype(tipo)
+            else:
+                df[col] = df[col].astype(tipo)
+    return df
@@ -0,0 +1,62 @@
+"""
+Categoría de cada evento (categoria_punto), igual en todos los scripts.
+----------------------------------------------------------------------
+La categoría es el primer valor no vacío de error / winner / fuerza_error
+(en ese orden), en minúsculas; si no hay ninguno, "bola dentro". Se calcula
+con operaciones de columna (sin apply por fila) y se guarda como categórica
+en el dataset procesado, así que los análisis la leen en vez de recalcularla.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+
+import pandas as pd
+
+COL_CATEGORIA = "categoria_punto"
+COLUMNAS_CATEGORIA = ["error", "winner", "fuerza_error"]
+SIN_EVENTO = "bola dentro"
+
+# variantes de etiquetado → nombre canónico
+EQUIVALENCIAS = {"fuerza error": "fuerza_error"}
+
+# subir al cambiar cómo se clasifica (clasificar_punto / normalizar_categorias):
+# invalida las cachés derivadas de las categorías (p. ej. la densidad en pista)
+VERSION_CATEGORIAS = 1
+HUELLA_CATEGORIAS = hashlib.sha1(json.dumps(
+    [VERSION_CATEGORIAS, COLUMNAS_CATEGORIA, EQUIVALENCIAS, SIN_EVENTO], sort_keys=True
+).encode()).hexdigest()[:12]
+
+# color de cada categoría canónica en las figuras (pistas, densidades)
+COLORES_CATEGORIA = {
+    "winner": "#00BFFF",
+    "error no forzado": "#FF9800",
+    "fuerza_error": "#FF3B3B",
+    SIN_EVENTO: "#4CAF50",
+}
+
+
+def normalizar_categorias(serie: pd.Series) -> pd.Series:
+    """Minúsculas, sin espacios extremos y con nombres canónicos; categórica."""
+    s = serie.astype("string").str.strip().str.lower().replace(EQUIVALENCIAS)
+    return s.astype("category")
+
+
+def clasificar_punto(df: pd.DataFrame, columnas: list[str] = COLUMNAS_CATEGORIA) -> pd.Series:
+    """categoria_punto de cada fila de `df` (las columnas ausentes se ignoran)."""
+    cat = pd.Series(pd.NA, index=df.index, dtype="string")
+    for col in columnas:
+        if col in df.columns:
+            val = df[col].astype("string").str.strip()
+            cat = cat.fillna(val.mask(val == ""))
+    return normalizar_categorias(cat.fillna(SIN_EVENTO))
+
+
+def asegurar_categoria(df: pd.DataFrame, col: str = COL_CATEGORIA,
+                       columnas: list[str] = COLUMNAS_CATEGORIA) -> pd.Series:
+    """La columna ya guardada (normalizada) o, si falta, clasificada ahora."""
+    if col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            return df[col]
+        return normalizar_categorias(df[col])
+    return clasificar_punto(df, columnas)
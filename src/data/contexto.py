@@ -0,0 +1,34 @@
+"""
+Contexto por partido: nombres de columnas que cambian entre exportaciones de M3.
+--------------------------------------------------------------------------------
+Antes, pipeline_juegos sobrescribía las variables globales COL_INICIO_X/... tras
+detectar las coordenadas, y pintar_pista_interactiva y recomendador.py leían
+esas globales. Con este objeto inmutable cada partido lleva su propio mapeo y
+varios partidos pueden procesarse a la vez (hilos o un proceso de larga vida).
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass, replace
+
+
+@dataclass(frozen=True)
+class ContextoPartido:
+    col_jugador: str = "jugador"
+    col_winner: str = "winner"
+    col_error: str = "error"
+    col_inicio_x: str = "inicio_golpe:_x"
+    col_inicio_y: str = "inicio_golpe:_y"
+    col_fin_x: str = "fin_golpe:_x"
+    col_fin_y: str = "fin_golpe:_y"
+
+    @property
+    def columnas_coordenadas(self) -> list[str]:
+        return [self.col_inicio_x, self.col_inicio_y, self.col_fin_x, self.col_fin_y]
+
+    def con_coordenadas(self, col_map: dict) -> "ContextoPartido":
+        """
+        Devuelve un contexto nuevo con las coordenadas detectadas
+        (claves inicio_x/inicio_y/fin_x/fin_y; las que valen None se mantienen).
+        """
+        cambios = {f"col_{k}": v for k, v in col_map.items() if v}
+        return replace(self, **cambios)
@@ -0,0 +1,240 @@
+"""
+Modo en vivo: seguimiento incremental de un CSV de M3 mientras se etiqueta.
+--------------------------------------------------------------------------
+En vez de relanzar toda la cadena (load_raw_data → collapse_events →
+normalizar_columnas → clean_dataset → crear_marcador → métricas) al terminar
+el etiquetado, este módulo lee SOLO las filas añadidas al final del CSV y
+actualiza:
+
+- los eventos colapsados (se retiene el último evento abierto hasta que llega
+  uno nuevo, porque M3 escribe varias filas por evento),
+- el marcador (se arrastra el último valor conocido de sets/juegos/puntos),
+- los conteos por jugador y categoría (suma incremental).
+
+Si llegan filas fuera de orden (clip_start anterior al último procesado o un
+evento ya cerrado), se reconstruye el estado completo desde las filas leídas.
+"""
+
+from __future__ import annotations
+import io
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.data.categorias import clasificar_punto
+from src.data.clean_data import clean_dataset
+from src.data.event_collapse import collapse_events, resolve_keys
+from src.data.normalize_columns import normalizar_columnas
+from src.data.score_utils import crear_marcador
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_MARCADOR = ["set_p1", "set_p2", "juego_p1", "juego_p2", "punto_p1", "punto_p2"]
+
+CLAVES_EVENTO = [
+    ["Row Name", "Clip Start", "Clip End"],
+    ["row_name", "clip_start", "clip_end"],
+]
+
+
+class PartidoEnVivo:
+    """
+    Estado incremental de un partido que se está etiquetando.
+
+    Uso:
+        vivo = PartidoEnVivo("data/raw/partido.csv", cfg)
+        while True:
+            if vivo.actualizar():
+                vivo.escribir_estado("outputs/live/estado_partido.json")
+            time.sleep(0.5)
+    """
+
+    def __init__(self, ruta_csv: str | Path, cfg: dict):
+        self.ruta = Path(ruta_csv)
+        self.sep = cfg["data"]["separator"]
+        self.encoding = cfg["data"]["encoding"]
+        self.infer_dtypes = cfg["data"].get("infer_dtypes", True)
+        self.opts = dict(cfg.get("read_csv", {}))
+        self.opts.pop("low_memory", None)
+        self._reiniciar()
+
+    # ------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------
+    def _reiniciar(self):
+        self._offset = 0
+        self._cabecera = b""
+        self._resto = b""
+        self._filas_leidas: list[pd.DataFrame] = []
+        self._pendientes = pd.DataFrame()
+        self._claves = None
+        self._claves_cerradas: set = set()
+        self._ultimo_raw: dict = {}
+        self._ultimo_clip = float("-inf")
+
+        self.eventos = pd.DataFrame()
+        self.conteos = pd.DataFrame(dtype="int64")
+        self.marcador = ""
+
+    def _reconstruir(self):
+        """Rehace el estado desde todas las filas leídas (filas fuera de orden)."""
+        logger.warning("Filas fuera de orden: reconstruyendo el estado completo del partido")
+        filas = pd.concat(self._filas_leidas, ignore_index=True)
+        offset, cabecera, resto = self._offset, self._cabecera, self._resto
+        leidas = self._filas_leidas
+
+        self._reiniciar()
+        self._offset, self._cabecera, self._resto = offset, cabecera, resto
+        self._filas_leidas = leidas
+        self._claves = resolve_keys(filas, CLAVES_EVENTO)
+
+        ult = tuple(filas[self._claves].iloc[-1]) if len(filas) else None
+        abiertas = filas[self._claves].apply(tuple, axis=1) == ult
+        self._pendientes = filas[abiertas]
+        self._procesar_cerradas(filas[~abiertas], permitir_reconstruir=False)
+
+    # ------------------------------------------------------
+    # Lectura incremental
+    # ------------------------------------------------------
+    def _leer_nuevas_filas(self) -> pd.DataFrame:
+        if not self.ruta.exists():
+            return pd.DataFrame()
+
+        with self.ruta.open("rb") as f:
+            f.seek(self._offset)
+            bloque = f.read()
+        if not bloque:
+            return pd.DataFrame()
+        self._offset += len(bloque)
+
+        datos = self._resto + bloque
+        corte = datos.rfind(b"\n")
+        if corte < 0:
+            self._resto = datos
+            return pd.DataFrame()
+        completas, self._resto = datos[:corte + 1], datos[corte + 1:]
+
+        if not self._cabecera:
+            fin_cab = completas.find(b"\n") + 1
+            self._cabecera, completas = completas[:fin_cab], completas[fin_cab:]
+        if not completas.strip():
+            return pd.DataFrame()
+
+        df = pd.read_csv(io.BytesIO(self._cabecera + completas),
+                         sep=self.sep, encoding=self.encoding, **self.opts)
+        df["__source_file"] = self.ruta.name
+        return df
+
+    def actualizar(self) -> int:
+        """Lee lo añadido al CSV y actualiza el estado. Devuelve nº de eventos nuevos cerrados."""
+        nuevas = self._leer_nuevas_filas()
+        if nuevas.empty:
+            return 0
+        self._filas_leidas.append(nuevas)
+
+        filas = pd.concat([self._pendientes, nuevas], ignore_index=True)
+        if self._claves is None:
+            self._claves = resolve_keys(filas, CLAVES_EVENTO)
+
+        # El último evento sigue abierto: M3 puede seguir añadiendo filas suyas
+        ult = tuple(filas[self._claves].iloc[-1])
+        abiertas = filas[self._claves].apply(tuple, axis=1) == ult
+        self._pendientes = filas[abiertas]
+        return self._procesar_cerradas(filas[~abiertas])
+
+    def cerrar(self) -> int:
+        """Procesa el último evento retenido (fin del etiquetado)."""
+        pendientes, self._pendientes = self._pendientes, pd.DataFrame()
+        if pendientes.empty:
+            return 0
+        return self._procesar_cerradas(pendientes)
+
+    # ------------------------------------------------------
+    # Procesamiento de eventos cerrados
+    # ------------------------------------------------------
+    def _procesar_cerradas(self, filas: pd.DataFrame, permitir_reconstruir: bool = True) -> int:
+        if filas.empty:
+            return 0
+        if self.infer_dtypes:
+            filas = filas.convert_dtypes()
+
+        claves_nuevas = set(filas[self._claves].apply(tuple, axis=1))
+        df = collapse_events(filas, keys=self._claves)
+        df = clean_dataset(normalizar_columnas(df))
+        df = df.sort_values("clip_start", kind="stable").reset_index(drop=True)
+
+        fuera_de_orden = (
+            bool(claves_nuevas & self._claves_cerradas)
+            or float(df["clip_start"].min()) < self._ultimo_clip
+        )
+        if fuera_de_orden and permitir_reconstruir:
+            self._reconstruir()
+            return len(df)
+        self._claves_cerradas |= claves_nuevas
+
+        df = self._marcador_incremental(df)
+        self.eventos = pd.concat([self.eventos, df], ignore_index=True)
+        self._ultimo_clip = float(df["clip_start"].max())
+        self.marcador = str(df["marcador"].iloc[-1])
+
+        # Métricas: solo golpes (mismo criterio que golpes.parquet)
+        if "golpe_q" in df.columns and "jugador" in df.columns:
+            golpes = df[df["golpe_q"].notna() & (df["golpe_q"].astype("string") != "")]
+            if not golpes.empty:
+                nuevos = golpes.groupby([golpes["jugador"], clasificar_punto(golpes)], observed=True).size().unstack(fill_value=0)
+                self.conteos = self.conteos.add(nuevos, fill_value=0).fillna(0).astype("int64")
+
+        return len(df)
+
+    def _marcador_incremental(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        crear_marcador sobre el bloque nuevo con una fila semilla delante que lleva
+        el último valor crudo conocido de cada columna de marcador (equivale al ffill global).
+        """
+        for c in COLUMNAS_MARCADOR:
+            if c not in df.columns:
+                df[c] = pd.NA
+
+        semilla = {c: self._ultimo_raw.get(c, pd.NA) for c in COLUMNAS_MARCADOR}
+        semilla["clip_start"] = float("-inf")
+        bloque = pd.concat([pd.DataFrame([semilla]), df], ignore_index=True)
+
+        for c in COLUMNAS_MARCADOR:
+            ultimos = df[c].dropna()
+            if len(ultimos):
+                self._ultimo_raw[c] = ultimos.iloc[-1]
+
+        return crear_marcador(bloque).iloc[1:].reset_index(drop=True)
+
+    # ------------------------------------------------------
+    # Salida ligera
+    # ------------------------------------------------------
+    def estado(self) -> dict:
+        metricas = {}
+        for jugador, fila in self.conteos.iterrows():
+            total = int(fila.sum())
+            d = {cat: int(n) for cat, n in fila.items()}
+            d["total"] = total
+            d.update({f"{cat}_%": round(100 * n / total, 2) if total else 0.0 for cat, n in fila.items()})
+            metricas[str(jugador)] = d
+
+        return {
+            "archivo": self.ruta.name,
+            "actualizado": time.strftime("%H:%M:%S"),
+            "eventos": len(self.eventos),
+            "marcador": self.marcador,
+            "metricas": metricas,
+        }
+
+    def escribir_estado(self, ruta_salida: str | Path):
+        """Escritura atómica del JSON (el lector nunca ve un fichero a medias)."""
+        ruta_salida = Path(ruta_salida)
+        ruta_salida.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ruta_salida.with_suffix(ruta_salida.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.estado(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp, ruta_salida)
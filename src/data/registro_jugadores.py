@@ -0,0 +1,194 @@
+"""
+Registro de jugadores y parejas
+-------------------------------
+Se construye en la ingesta a partir de los propios datos y se guarda junto a
+los datasets procesados:
+
+- data/processed/jugadores.parquet → jugador_id (entero estable), nombre, nombre_norm
+- data/processed/parejas.parquet   → partido, pareja_id (1/2 dentro del partido), pareja, jugador_id
+
+Los ids de jugador no cambian entre ejecuciones: los nombres nuevos reciben el
+siguiente id libre. Los scripts cruzan por jugador_id / pareja_id (enteros)
+en lugar de comparar subcadenas de nombres, así que sirven para cualquier
+partido y no solo para la final con la que se desarrolló el proyecto.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Columna que identifica el partido (la primera que exista)
+COLUMNAS_PARTIDO = ["partido", "__source_file", "_source_file"]
+PARTIDO_UNICO = "partido"
+
+_ACENTOS = str.maketrans("áéíóúüñ", "aeiouun")
+
+
+def normalizar_nombre(x) -> str:
+    """Normaliza para comparar nombres robustamente (case/espacios/acentos simples)."""
+    if x is None or pd.isna(x):
+        return ""
+    return " ".join(str(x).lower().split()).translate(_ACENTOS)
+
+
+def normalizar_nombres(s: pd.Series) -> pd.Series:
+    """Versión vectorizada de normalizar_nombre."""
+    return (
+        s.astype("string")
+        .str.lower()
+        .str.split()
+        .str.join(" ")
+        .str.translate(_ACENTOS)
+        .fillna("")
+    )
+
+
+def columna_partido(df: pd.DataFrame) -> pd.Series:
+    """Clave de partido por fila (si no hay columna, todo el DF es un partido)."""
+    for col in COLUMNAS_PARTIDO:
+        if col in df.columns:
+            return df[col].astype("string").fillna(PARTIDO_UNICO)
+    return pd.Series(PARTIDO_UNICO, index=df.index, dtype="string")
+
+
+def _nombre_sacador(servicio: pd.Series) -> pd.Series:
+    """'1º Servicio Nombre Apellido' → 'nombre apellido' (normalizado)."""
+    partes = servicio.astype("string").str.strip().str.split(n=2)
+    return normalizar_nombres(partes.str[2])
+
+
+class RegistroJugadores:
+    """
+    Jugadores con id entero estable y parejas (1/2) de cada partido.
+
+    Uso:
+        registro = RegistroJugadores.cargar("data/processed")
+        registro.actualizar(df)
+        df = registro.anotar(df)        # añade jugador_id, pareja_id, saca_*_id
+        registro.guardar("data/processed")
+    """
+
+    def __init__(self, jugadores: pd.DataFrame | None = None, parejas: pd.DataFrame | None = None):
+        self.jugadores = jugadores if jugadores is not None else pd.DataFrame(
+            {"jugador_id": pd.Series(dtype="int32"),
+             "nombre": pd.Series(dtype="string"),
+             "nombre_norm": pd.Series(dtype="string")}
+        )
+        self.parejas = parejas if parejas is not None else pd.DataFrame(
+            {"partido": pd.Series(dtype="string"),
+             "pareja_id": pd.Series(dtype="int8"),
+             "pareja": pd.Series(dtype="string"),
+             "jugador_id": pd.Series(dtype="int32")}
+        )
+
+    # ------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------
+    @classmethod
+    def cargar(cls, directorio: str | Path = "data/processed") -> "RegistroJugadores":
+        """Lee el registro guardado (o devuelve uno vacío si aún no existe)."""
+        directorio = Path(directorio)
+        rj, rp = directorio / "jugadores.parquet", directorio / "parejas.parquet"
+        jugadores = pd.read_parquet(rj) if rj.exists() else None
+        parejas = pd.read_parquet(rp) if rp.exists() else None
+        return cls(jugadores, parejas)
+
+    def guardar(self, directorio: str | Path = "data/processed"):
+        directorio = Path(directorio)
+        directorio.mkdir(parents=True, exist_ok=True)
+        self.jugadores.to_parquet(directorio / "jugadores.parquet", index=False)
+        self.parejas.to_parquet(directorio / "parejas.parquet", index=False)
+
+    # ------------------------------------------------------
+    # Construcción desde los datos
+    # ------------------------------------------------------
+    def actualizar(self, df: pd.DataFrame, col_jugador: str = "jugador", col_pareja: str = "pareja"):
+        """
+        Da de alta los jugadores nuevos (siguiente id libre) y recalcula las
+        parejas de los partidos presentes en df. Pareja 1 = la que aparece primero.
+        """
+        nombres = df[col_jugador].dropna().astype("string").str.strip()
+        nuevos = pd.DataFrame({"nombre": nombres, "nombre_norm": normalizar_nombres(nombres)})
+        nuevos = nuevos[nuevos["nombre_norm"] != ""].drop_duplicates("nombre_norm")
+        nuevos = nuevos[~nuevos["nombre_norm"].isin(self.jugadores["nombre_norm"])]
+
+        if len(nuevos):
+            siguiente = int(self.jugadores["jugador_id"].max()) + 1 if len(self.jugadores) else 1
+            nuevos.insert(0, "jugador_id", np.arange(siguiente, siguiente + len(nuevos), dtype="int32"))
+            self.jugadores = pd.concat([self.jugadores, nuevos], ignore_index=True)
+
+        if col_pareja not in df.columns:
+            return self
+
+        filas = pd.DataFrame({
+            "partido": columna_partido(df),
+            "pareja": df[col_pareja].astype("string").str.strip(),
+            "jugador_id": self._ids_de_nombres(df[col_jugador]),
+        }).dropna(subset=["pareja", "jugador_id"])
+
+        orden = filas.drop_duplicates(["partido", "pareja"])
+        orden = orden.assign(pareja_id=orden.groupby("partido").cumcount() + 1)
+        orden = orden[orden["pareja_id"] <= 2][["partido", "pareja", "pareja_id"]]
+
+        parejas = (
+            filas.drop_duplicates(["partido", "jugador_id"])
+            .merge(orden, on=["partido", "pareja"], how="inner")
+        )
+        parejas = parejas.astype({"pareja_id": "int8", "jugador_id": "int32"})
+
+        previas = self.parejas[~self.parejas["partido"].isin(parejas["partido"])]
+        self.parejas = pd.concat(
+            [previas, parejas[["partido", "pareja_id", "pareja", "jugador_id"]]],
+            ignore_index=True,
+        )
+        return self
+
+    # ------------------------------------------------------
+    # Consultas / anotación
+    # ------------------------------------------------------
+    def _ids_de_nombres(self, nombres: pd.Series) -> pd.Series:
+        mapa = pd.Series(self.jugadores["jugador_id"].to_numpy(), index=self.jugadores["nombre_norm"].to_numpy())
+        return normalizar_nombres(nombres).map(mapa).astype("Int32")
+
+    def ids(self, nombres) -> list[int]:
+        """jugador_id de una lista de nombres (se ignoran los desconocidos)."""
+        return [int(i) for i in self._ids_de_nombres(pd.Series(list(nombres))).dropna()]
+
+    def anotar(self, df: pd.DataFrame, col_jugador: str = "jugador") -> pd.DataFrame:
+        """
+        Añade jugador_id, pareja_id (1/2 dentro del partido) y, si hay columna
+        'servicio', saca_jugador_id / saca_pareja_id. El sacador se resuelve por nombre completo
+        y, si no, por apellido (último término) cuando es único en el partido.
+        """
+        df = df.copy()
+        partido = columna_partido(df)
+        df["jugador_id"] = self._ids_de_nombres(df[col_jugador])
+        df["pareja_id"] = self._pareja_en_partido(partido, df["jugador_id"])
+
+        if "servicio" in df.columns:
+            df["saca_jugador_id"] = self._resolver_sacador(partido, df["servicio"]).set_axis(df.index)
+            df["saca_pareja_id"] = self._pareja_en_partido(partido, df["saca_jugador_id"])
+        return df
+
+    def _pareja_en_partido(self, partido: pd.Series, jugador_id: pd.Series) -> pd.Series:
+        claves = pd.DataFrame({"partido": partido.to_numpy(), "jugador_id": jugador_id.to_numpy()})
+        parejas = self.parejas[["partido", "jugador_id", "pareja_id"]].astype({"jugador_id": "Int32"})
+        return (
+            claves.merge(parejas, on=["partido", "jugador_id"], how="left")["pareja_id"]
+            .astype("Int8")
+            .set_axis(jugador_id.index)
+        )
+
+    def _resolver_sacador(self, partido: pd.Series, servicio: pd.Series) -> pd.Series:
+        jug = self.parejas[["partido", "jugador_id"]].merge(self.jugadores, on="jugador_id")
+        por_apellido = jug.assign(clave=jug["nombre_norm"].str.split().str[-1])
+        por_apellido = por_apellido[~por_apellido.duplicated(["partido", "clave"], keep=False)]
+        tabla = pd.concat(
+            [jug.assign(clave=jug["nombre_norm"]), por_apellido],
+            ignore_index=True,
+        ).drop_duplicates(["partido", "clave"])[["partido", "clave", "jugador_id"]]
+
+        buscado = pd.DataFrame({"partido": partido.to_numpy(), "clave": _nombre_sacador(servicio).to_numpy()})
+        return buscado.merge(tabla, on=["partido", "clave"], how="left")["jugador_id"].astype("Int32")
@@ -6,6 +6,13 @@ import numpy as np
 # ============================================================
 def inferir_parejas(df):
     df = df.copy()
+
+    # pareja_id ya viene del registro de jugadores: solo recuperamos los nombres
+    if "pareja_id" in df.columns and df["pareja_id"].notna().any():
+        nombres = df.dropna(subset=["pareja_id"]).drop_duplicates("pareja_id").set_index("pareja_id")["pareja"]
+        if {1, 2}.issubset(nombres.index):
+            return df, nombres[1], nombres[2]
+
     parejas = df["pareja"].dropna().unique()
 
     if len(parejas) < 2:
@@ -34,7 +41,12 @@ def extraer_sacador(df):
 
     df["saca_jugador"] = df["servicio"].apply(get_sacador)
 
-    # Identificar pareja que saca
+    # Identificar pareja que saca (con ids del registro es una comparación de enteros)
+    if {"jugador_id", "saca_jugador_id"}.issubset(df.columns):
+        mismo = (df["jugador_id"] == df["saca_jugador_id"]).fillna(False).astype(bool)
+        df["saca_pareja"] = df["pareja_id"].where(mismo)
+        return df
+
     df["saca_pareja"] = df.apply(
         lambda r: r["pareja_id"] if r["jugador"] == r["saca_jugador"] else None,
         axis=1
@@ -7,6 +7,16 @@ PUNTOS_MAP = {
     "40": "40",
     "Adv": "adv"
 }
+JUEGOS_TIEBREAK = 6   # a 6-6 en juegos se juega el tie-break: sus puntos son números (1, 2, 3...)
+
+
+def _punto(valor, tiebreak):
+    """Punto en formato 0/15/30/40/adv; en el tie-break, el número tal cual."""
+    valor = str(valor)
+    if tiebreak and valor.isdigit():
+        return str(int(valor))
+    return PUNTOS_MAP.get(valor, "0")
+
 
 def crear_marcador(df):
     df = df.copy()
@@ -39,10 +49,14 @@ def crear_marcador(df):
             df[c] = df[c].fillna("0")
 
     # ----------------------------
-    # 3️⃣ Convertir puntuaciones a formato correcto (0/15/30/40/AD)
+    # 3️⃣ Convertir puntuaciones a formato correcto (0/15/30/40/AD; tie-break: números)
     # ----------------------------
-    df["punto_p1"] = df["punto_p1"].apply(lambda x: PUNTOS_MAP.get(str(x), "0"))
-    df["punto_p2"] = df["punto_p2"].apply(lambda x: PUNTOS_MAP.get(str(x), "0"))
+    if {"juego_p1", "juego_p2"}.issubset(df.columns):
+        tiebreak = ((df["juego_p1"] == JUEGOS_TIEBREAK) & (df["juego_p2"] == JUEGOS_TIEBREAK)).to_numpy()
+    else:
+        tiebreak = [False] * len(df)
+    df["punto_p1"] = [_punto(x, tb) for x, tb in zip(df["punto_p1"], tiebreak)]
+    df["punto_p2"] = [_punto(x, tb) for x, tb in zip(df["punto_p2"], tiebreak)]
 
     # ----------------------------
     # 4️⃣ Construir columnas de marcador
@@ -64,8 +78,52 @@ def asignar_informacion_saque_y_punto(df):
     df = df.copy()
 
     # -----------------------------------------
-    # 1️⃣ DETERMINAR PAREJA 1 Y PAREJA 2
+    # 1️⃣ + 2️⃣ PAREJA DE CADA JUGADOR Y DEL SACADOR
+    # -----------------------------------------
+    # Con el registro (jugador_id/pareja_id/saca_jugador_id) es un cruce de enteros
+    if {"pareja_id", "saca_pareja_id"}.issubset(df.columns):
+        partes = df["servicio"].astype("string").str.split()
+        df["pareja_jugador"] = df["pareja_id"]
+        df["pareja_sacador"] = df["saca_pareja_id"]
+        df["sacador"] = partes.str[-1].where(partes.str.len() >= 3)
+    else:
+        df = _parejas_por_nombre(df)
+        if "pareja_sacador" not in df.columns:
+            return df
+
+    # -----------------------------------------
+    # 3️⃣ IDENTIFICAR QUIÉN GANA EL PUNTO
+    # -----------------------------------------
+    # Comparamos con la fila anterior
+    df["punto_p1_prev"] = df["punto_p1"].shift(1)
+    df["punto_p2_prev"] = df["punto_p2"].shift(1)
+
+    def ganador_punto(row):
+        if pd.isna(row["punto_p1_prev"]) or pd.isna(row["punto_p2_prev"]):
+            return None
+        if row["punto_p1"] != row["punto_p1_prev"]:
+            return 1
+        if row["punto_p2"] != row["punto_p2_prev"]:
+            return 2
+        return None
+
+    df["pareja_ganadora_punto"] = df.apply(ganador_punto, axis=1)
+
+    # -----------------------------------------
+    # 4️⃣ SACADOR GANA EL PUNTO?
     # -----------------------------------------
+    def gana_saque(row):
+        if pd.isna(row["pareja_sacador"]) or pd.isna(row["pareja_ganadora_punto"]):
+            return None
+        return int(row["pareja_sacador"] == row["pareja_ganadora_punto"])
+
+    df["gana_punto_sacador"] = df.apply(gana_saque, axis=1)
+
+    return df
+
+
+def _parejas_por_nombre(df):
+    """Sin registro de jugadores: parejas por orden de aparición y nombres de 'pareja'."""
     primeras_parejas = df["pareja"].dropna().unique()
     if len(primeras_parejas) < 2:
         print("⚠ No se detectaron dos parejas distintas.")
@@ -86,9 +144,6 @@ def asignar_informacion_saque_y_punto(df):
 
     df["pareja_jugador"] = df["jugador"].apply(obtener_pareja)
 
-    # -----------------------------------------
-    # 2️⃣ EXTRAER NOMBRE DEL SACADOR
-    # -----------------------------------------
     def extraer_sacador(txt):
         if pd.isna(txt):
             return None
@@ -98,33 +153,4 @@ def asignar_informacion_saque_y_punto(df):
 
     df["sacador"] = df["servicio"].apply(extraer_sacador)
     df["pareja_sacador"] = df["sacador"].apply(obtener_pareja)
-
-    # -----------------------------------------
-    # 3️⃣ IDENTIFICAR QUIÉN GANA EL PUNTO
-    # -----------------------------------------
-    # Comparamos con la fila anterior
-    df["punto_p1_prev"] = df["punto_p1"].shift(1)
-    df["punto_p2_prev"] = df["punto_p2"].shift(1)
-
-    def ganador_punto(row):
-        if pd.isna(row["punto_p1_prev"]) or pd.isna(row["punto_p2_prev"]):
-            return None
-        if row["punto_p1"] != row["punto_p1_prev"]:
-            return 1
-        if row["punto_p2"] != row["punto_p2_prev"]:
-            return 2
-        return None
-
-    df["pareja_ganadora_punto"] = df.apply(ganador_punto, axis=1)
-
-    # -----------------------------------------
-    # 4️⃣ SACADOR GANA EL PUNTO?
-    # -----------------------------------------
-    def gana_saque(row):
-        if row["pareja_sacador"] is None or row["pareja_ganadora_punto"] is None:
-            return None
-        return int(row["pareja_sacador"] == row["pareja_ganadora_punto"])
-
-    df["gana_punto_sacador"] = df.apply(gana_saque, axis=1)
-
     return df
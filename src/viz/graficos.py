@@ -0,0 +1,62 @@
+"""
+Gráficos estáticos (PNG) como trabajos de render independientes.
+----------------------------------------------------------------
+Cada función recibe ya los datos agregados (unas pocas filas) y la ruta de
+salida, y usa la API orientada a objetos de matplotlib (Figure + Agg) en vez
+de pyplot: sin estado global, así que se pueden ejecutar en hilos o en un
+pool de procesos (ver src/viz/render.py).
+"""
+
+from __future__ import annotations
+import numpy as np
+from matplotlib.figure import Figure
+
+
+def barras_horizontales(ruta, etiquetas, valores, titulo, figsize=(6, 4), dpi=300,
+                        color=None, xlabel=None) -> str:
+    """Top de golpes (o cualquier ranking) como barras horizontales."""
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    ax.barh(list(etiquetas), list(valores), color=color)
+    ax.set_title(titulo)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    fig.tight_layout()
+    fig.savefig(ruta, dpi=dpi)
+    return ruta
+
+
+def heatmap_evolucion(ruta, matriz, filas, columnas, titulo, dpi=150) -> str:
+    """% por categoría (filas) y juego (columnas), escala fija 0-100."""
+    matriz = np.asarray(matriz, dtype=float)
+    fig = Figure(figsize=(max(6, 0.35 * matriz.shape[1]), 3))
+    ax = fig.subplots()
+    im = ax.imshow(matriz, aspect="auto", cmap="viridis", vmin=0, vmax=100)
+    ax.set_yticks(range(len(filas)), list(filas))
+    ax.set_xticks(range(matriz.shape[1]), list(columnas), fontsize=7)
+    ax.set_xlabel("Juego")
+    fig.colorbar(im, ax=ax, label="%")
+    ax.set_title(titulo)
+    fig.tight_layout()
+    fig.savefig(ruta, dpi=dpi)
+    return ruta
+
+
+def heatmap_pista(ruta, matrices: dict, ancho, largo, titulo, dpi=150) -> str:
+    """
+    Densidad binned sobre la pista: un panel por matriz (ny × nx), p. ej.
+    {"Inicio": ..., "Fin": ...}, con la red en largo/2.
+    """
+    fig = Figure(figsize=(2.6 * len(matrices) + 1, 5), layout="constrained")
+    axes = np.atleast_1d(fig.subplots(1, len(matrices)))
+    for ax, (nombre, matriz) in zip(axes, matrices.items()):
+        im = ax.imshow(np.asarray(matriz), origin="lower", extent=(0, ancho, 0, largo),
+                       cmap="magma", interpolation="nearest")
+        ax.axhline(largo / 2, color="white", lw=1.5)
+        ax.set_title(nombre, fontsize=9)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        fig.colorbar(im, ax=ax, fraction=0.08)
+    fig.suptitle(titulo, fontsize=10)
+    fig.savefig(ruta, dpi=dpi)
+    return ruta
@@ -0,0 +1,117 @@
+"""
+HTML de plotly con la librería compartida.
+------------------------------------------
+Por defecto fig.write_html incrusta plotly.js completo (~4.6 MB) en cada
+fichero; con una pista por jugador y set más la del partido, una temporada son
+GB de JavaScript repetido. En modo "compartido":
+
+- plotly.min.js se escribe UNA vez en la raíz de salida,
+- cada HTML lo referencia con una ruta relativa (<script src="../plotly.min.js">),
+- index.html en la raíz lista todas las vistas y solo carga cada una (iframe)
+  cuando se despliega.
+
+El modo "embebido" mantiene el comportamiento de siempre (HTML autónomo).
+"""
+
+from __future__ import annotations
+import html
+import os
+import threading
+from pathlib import Path
+
+from plotly.offline import get_plotlyjs
+
+ASSET_PLOTLYJS = "plotly.min.js"
+INDICE = "index.html"
+MODOS_HTML = ("compartido", "embebido")
+
+
+def _escribir_atomico(ruta: Path, texto: str):
+    """Varios hilos pueden escribir a la vez: el lector nunca ve un fichero a medias."""
+    tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(texto, encoding="utf-8")
+    os.replace(tmp, ruta)
+
+
+def asegurar_plotlyjs(raiz: str | Path) -> Path:
+    """Escribe plotly.min.js en la raíz si aún no está. Devuelve su ruta."""
+    raiz = Path(raiz)
+    raiz.mkdir(parents=True, exist_ok=True)
+    asset = raiz / ASSET_PLOTLYJS
+    if not asset.exists():
+        _escribir_atomico(asset, get_plotlyjs())
+    return asset
+
+
+def guardar_figura(fig, ruta: str | Path, raiz: str | Path | None = None, modo: str = "compartido"):
+    """
+    Guarda la figura como HTML. En modo "compartido" el HTML apunta al
+    plotly.min.js de `raiz` (por defecto, la carpeta del propio HTML).
+    """
+    if modo not in MODOS_HTML:
+        raise ValueError(f"modo HTML desconocido: {modo!r} (opciones: {MODOS_HTML})")
+
+    ruta = Path(ruta)
+    if modo == "embebido":
+        fig.write_html(ruta)
+        return ruta
+
+    asset = asegurar_plotlyjs(raiz if raiz is not None else ruta.parent)
+    src = Path(os.path.relpath(asset, ruta.parent)).as_posix()
+    fig.write_html(ruta, include_plotlyjs=src)
+    return ruta
+
+
+def escribir_indice(raiz: str | Path, titulo: str = "Pistas interactivas") -> Path:
+    """
+    index.html con todas las vistas bajo `raiz`, agrupadas por carpeta.
+    Cada vista es un <details>: el iframe solo se carga al desplegarlo.
+    """
+    raiz = Path(raiz)
+    vistas = sorted(
+        p.relative_to(raiz) for p in raiz.rglob("*.html") if p.name != INDICE
+    )
+
+    grupos: dict[str, list[Path]] = {}
+    for v in vistas:
+        grupos.setdefault(v.parent.as_posix(), []).append(v)
+
+    bloques = []
+    for carpeta, ficheros in grupos.items():
+        items = "\n".join(
+            f'<details><summary>{html.escape(f.stem)}</summary>'
+            f'<iframe data-src="{html.escape(f.as_posix())}"></iframe></details>'
+            for f in ficheros
+        )
+        nombre = "." if carpeta == "." else carpeta
+        bloques.append(f"<h2>{html.escape(nombre)}</h2>\n{items}")
+
+    pagina = f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(titulo)}</title>
+<style>
+  body {{ background:#00244D; color:white; font-family:sans-serif; margin:2em; }}
+  summary {{ cursor:pointer; padding:.3em 0; }}
+  iframe {{ width:100%; height:1050px; border:0; background:#00244D; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(titulo)}</h1>
+{chr(10).join(bloques) if bloques else "<p>No hay vistas.</p>"}
+<script>
+  // Carga diferida: el iframe no pide su HTML hasta que se despliega la vista
+  document.querySelectorAll("details").forEach(function (d) {{
+    d.addEventListener("toggle", function () {{
+      var f = d.querySelector("iframe");
+      if (d.open && !f.src) {{ f.src = f.dataset.src; }}
+    }});
+  }});
+</script>
+</body>
+</html>
+"""
+    ruta = raiz / INDICE
+    _escribir_atomico(ruta, pagina)
+    return ruta
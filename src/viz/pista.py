@@ -0,0 +1,141 @@
+"""
+Trayectorias de golpes sobre la pista (plotly).
+-----------------------------------------------
+Antes cada golpe eran dos trazas go.Scatter (línea + marcador final), así que
+un partido completo generaba miles de trazas por jugador, HTML de varios MB y
+navegadores que se atascaban. Aquí se agrupan los golpes por categoría:
+
+- una traza de líneas (segmentos inicio→fin separados por huecos None) con
+  marcador en cada extremo,
+- una traza con los marcadores de fin.
+
+Ambas comparten legendgroup, así que la leyenda sigue ocultando/mostrando la
+categoría completa. El nº de trazas depende de las categorías, no de los golpes.
+"""
+
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def _segmentos(ini: np.ndarray, fin: np.ndarray) -> np.ndarray:
+    """[i0, f0, nan, i1, f1, nan, ...]: un único array con huecos entre golpes."""
+    out = np.full(3 * len(ini), np.nan)
+    out[0::3] = ini
+    out[1::3] = fin
+    return out
+
+
+def trazas_trayectorias(
+    sub: pd.DataFrame,
+    columnas: list[str],
+    col_categ: str,
+    colores: dict,
+    tam_inicio: int = 6,
+    tam_fin: int = 8,
+    simbolo_fin: str = "triangle-up",
+    hover: bool = True,
+    webgl: bool = True,
+) -> list:
+    """
+    Dos trazas por categoría de `colores` presente en `sub`.
+    columnas = [inicio_x, inicio_y, fin_x, fin_y]. Con webgl=True se usa
+    go.Scattergl (WebGL); con False, go.Scatter (SVG).
+    """
+    Traza = go.Scattergl if webgl else go.Scatter
+    ix, iy, fx, fy = columnas
+    trazas = []
+
+    for cat, color in colores.items():
+        df_cat = sub[sub[col_categ] == cat]
+        if df_cat.empty:
+            continue
+
+        c = df_cat[columnas].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        trazas.append(Traza(
+            x=_segmentos(c[:, 0], c[:, 2]),
+            y=_segmentos(c[:, 1], c[:, 3]),
+            mode="lines+markers",
+            connectgaps=False,
+            line=dict(color=color, width=2),
+            marker=dict(size=tam_inicio, symbol="circle", color=color),
+            name=cat,
+            legendgroup=cat,
+            showlegend=True,
+            hovertext=f"Golpe ({cat})" if hover else None,
+            hoverinfo="text" if hover else "none",
+        ))
+        trazas.append(Traza(
+            x=c[:, 2],
+            y=c[:, 3],
+            mode="markers",
+            marker=dict(size=tam_fin, symbol=simbolo_fin, color=color),
+            name=f"{cat}_fin",
+            legendgroup=cat,
+            showlegend=False,
+            hovertext=f"Fin ({cat})" if hover else None,
+            hoverinfo="text" if hover else "none",
+        ))
+
+    return trazas
+
+
+# ------------------------------------------------------
+# Figura completa (pista + trayectorias) → HTML
+# ------------------------------------------------------
+SERVICIO_Y_OFFSET = 60
+
+
+def figura_pista(ancho: float, largo: float) -> go.Figure:
+    """Figura vacía con las líneas de la pista de pádel (campo, red, servicio)."""
+    fig = go.Figure()
+    centro_x = ancho / 2
+
+    fig.add_shape(type="rect", x0=0, y0=0, x1=ancho, y1=largo, line=dict(color="white", width=3))
+    fig.add_shape(type="line", x0=0, y0=largo/2, x1=ancho, y1=largo/2, line=dict(color="white", width=4))
+    fig.add_shape(type="line", x0=0, y0=largo/2 - SERVICIO_Y_OFFSET, x1=ancho, y1=largo/2 - SERVICIO_Y_OFFSET,
+                  line=dict(color="white", width=2))
+    fig.add_shape(type="line", x0=0, y0=largo/2 + SERVICIO_Y_OFFSET, x1=ancho, y1=largo/2 + SERVICIO_Y_OFFSET,
+                  line=dict(color="white", width=2))
+    fig.add_shape(type="line", x0=centro_x, y0=largo/2, x1=centro_x, y1=largo/2 - SERVICIO_Y_OFFSET,
+                  line=dict(color="white", width=2))
+    fig.add_shape(type="line", x0=centro_x, y0=largo/2, x1=centro_x, y1=largo/2 + SERVICIO_Y_OFFSET,
+                  line=dict(color="white", width=2))
+
+    fig.update_layout(
+        plot_bgcolor="#003C77",
+        paper_bgcolor="#00244D",
+        xaxis=dict(visible=False, range=[0, ancho]),
+        yaxis=dict(visible=False, range=[0, largo], scaleanchor="x", scaleratio=1),
+        font=dict(color="white"),
+        legend=dict(groupclick="togglegroup", itemclick="toggle"),
+    )
+    return fig
+
+
+def render_pista_html(
+    ruta: str,
+    sub: pd.DataFrame,
+    columnas: list[str],
+    col_categ: str,
+    colores: dict,
+    ancho: float,
+    largo: float,
+    titulo: str,
+    layout: dict | None = None,
+    estilo: dict | None = None,
+    modo_html: str = "compartido",
+    raiz_html: str | None = None,
+) -> str:
+    """
+    Trabajo de render autocontenido (apto para un pool de procesos): pinta la
+    pista, añade las trayectorias de `sub` y guarda el HTML en `ruta`.
+    """
+    from src.viz.html_compartido import guardar_figura
+
+    fig = figura_pista(ancho, largo)
+    fig.add_traces(trazas_trayectorias(sub, columnas, col_categ, colores, **(estilo or {})))
+    fig.update_layout(title=titulo, **(layout or {}))
+    guardar_figura(fig, ruta, raiz=raiz_html, modo=modo_html)
+    return ruta
@@ -0,0 +1,68 @@
+"""
+Fase de render en paralelo.
+---------------------------
+Los informes generan muchas figuras independientes (top golpes y pistas por
+jugador × set, heat maps...). En vez de pintarlas una a una, los pipelines
+construyen una lista de trabajos (functools.partial de funciones de
+src/viz/graficos.py y src/viz/pista.py con datos ya agregados) y se ejecutan
+en un pool de procesos con backend no interactivo (Agg).
+
+El grado de paralelismo sale de [render] procesos en config/config.toml
+(0 = nº de núcleos, 1 = secuencial en el propio proceso).
+"""
+
+from __future__ import annotations
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def _inicializar_worker():
+    os.environ["MPLBACKEND"] = "Agg"
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def procesos_configurados(config_path: str | Path = "config/config.toml") -> int:
+    """[render] procesos del config (0 o ausente = todos los núcleos)."""
+    procesos = 0
+    config_path = Path(config_path)
+    if config_path.exists():
+        from src.data.load_data import load_config
+        procesos = int(load_config(config_path).get("render", {}).get("procesos", 0))
+    return procesos if procesos > 0 else (os.cpu_count() or 1)
+
+
+def crear_pool(procesos: int | None = None) -> ProcessPoolExecutor:
+    """Pool reutilizable (p. ej. para varios partidos seguidos)."""
+    procesos = procesos or procesos_configurados()
+    return ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_worker)
+
+
+def ejecutar_trabajos(trabajos: list, procesos: int | None = None, pool: Executor | None = None) -> list:
+    """
+    Ejecuta los trabajos (callables sin argumentos y serializables) y devuelve
+    sus resultados en orden. Con `pool` se reutiliza uno existente; si no, se
+    crea uno de `procesos` workers (1 = secuencial, sin procesos hijos).
+    """
+    if not trabajos:
+        return []
+    if pool is not None:
+        return _en_pool(pool, trabajos)
+
+    procesos = procesos or procesos_configurados()
+    procesos = min(procesos, len(trabajos))
+    if procesos <= 1:
+        return [t() for t in trabajos]
+
+    logger.info(f"Render de {len(trabajos)} figuras en {procesos} procesos")
+    with crear_pool(procesos) as p:
+        return _en_pool(p, trabajos)
+
+
+def _en_pool(pool: Executor, trabajos: list) -> list:
+    futuros = [pool.submit(t) for t in trabajos]
+    return [f.result() for f in futuros]